@@ -0,0 +1,270 @@
+"""
+Apprentissage actif : scraper et garder les images là où le modèle est faible
+
+    python active_learning.py --budget 300
+    python active_learning.py --budget 300 --rounds 3 --retrain
+
+Un tour :
+  1. métriques par classe de la dernière évaluation (evaluation_report.json, en cache)
+  2. budget d'images réparti selon la faiblesse de chaque classe (1 - F1)
+  3. scraping des requêtes les plus utiles (historique) dans un dossier de candidats
+  4. le modèle note chaque candidat : les images incertaines ou mal classées sont
+     gardées, une part des images faciles aussi, les images d'une autre classe
+     avec forte confiance partent en revue manuelle, le reste est supprimé
+"""
+
+import os
+import json
+import math
+import shutil
+import argparse
+import numpy as np
+from PIL import Image
+
+from dataset_catalog import get_catalog
+from image_store import store_for
+from train_module import load_train_module
+
+CANDIDATES_DIR = "candidates"
+REVIEW_DIR = "_review"
+STATE_FILE = "active_learning.json"
+
+MIN_WEAKNESS = 0.02          # Une classe parfaite garde un petit budget
+QUERIES_PER_ROUND = 3        # Requêtes scrapées par classe et par tour
+OVERSAMPLE = 1.5             # Candidats scrapés par image à garder
+EASY_CONFIDENCE = 0.9        # Au-delà (bonne classe), l'image apporte peu
+EASY_KEEP_RATIO = 0.25       # Part des images faciles conservée (évite un biais)
+OFF_CLASS_CONFIDENCE = 0.9   # Autre classe prédite avec cette confiance : revue manuelle
+
+# =====================================================================
+# PLANIFICATION
+# =====================================================================
+
+def load_class_metrics(train, model):
+    """Métriques par classe de la dernière évaluation (recalculées depuis le cache sinon)"""
+    path = os.path.join(train.OUTPUT_DIR, "evaluation_report.json")
+    try:
+        with open(path) as f:
+            return json.load(f)["metrics"]["per_class"]
+    except (OSError, ValueError, KeyError):
+        from evaluation import evaluate
+        report = evaluate(model, train.DATASET_DIR, train.CLASSES, tuple(model.input_shape[1:3]),
+                          train.VALIDATION_SPLIT)
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2)
+        return report["metrics"]["per_class"]
+
+def allocate_budget(per_class, budget):
+    """Budget d'images par classe, proportionnel à la faiblesse (1 - F1)"""
+    weakness = {row["class"]: max(MIN_WEAKNESS, 1 - row["f1"]) for row in per_class}
+    total = sum(weakness.values())
+    allocation = {name: int(budget * w / total) for name, w in weakness.items()}
+    # Reste de l'arrondi aux classes les plus faibles
+    for name in sorted(weakness, key=weakness.get, reverse=True)[:budget - sum(allocation.values())]:
+        allocation[name] += 1
+    return allocation
+
+def query_utility(stats):
+    """Part d'images gardées par requête (a priori 0.5 pour une requête jamais essayée)"""
+    return (stats.get("kept", 0) + 1) / (stats.get("scraped", 0) + 2)
+
+def load_state(candidates_dir):
+    try:
+        with open(os.path.join(candidates_dir, STATE_FILE)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {"queries": {}, "rounds": []}
+
+def save_state(candidates_dir, state):
+    os.makedirs(candidates_dir, exist_ok=True)
+    with open(os.path.join(candidates_dir, STATE_FILE), "w") as f:
+        json.dump(state, f, indent=2)
+
+# =====================================================================
+# SCRAPING DES CANDIDATS
+# =====================================================================
+
+def scrape_candidates(model_name, config, quota, state, candidates_dir, dataset_dir):
+    """Scrape les requêtes les plus utiles ; retourne {fichier candidat: requête}"""
+    from multi_brand_scraper import scrape_model, load_existing_hashes
+
+    folder = config["folder"]
+    catalog = get_catalog(candidates_dir)
+    known = load_existing_hashes(os.path.join(dataset_dir, folder))
+    queries = sorted(config["queries"],
+                     key=lambda q: query_utility(state["queries"].get(q, {})), reverse=True)
+    per_query = math.ceil(quota * OVERSAMPLE / QUERIES_PER_ROUND)
+
+    provenance = {}
+    for query in queries[:QUERIES_PER_ROUND]:
+        before = set(catalog.files(folder))
+        scrape_model(model_name, folder, [query], max_images=len(before) + per_query,
+                     dataset_dir=candidates_dir, known_hashes=known)
+        for name in set(catalog.files(folder)) - before:
+            provenance[name] = query
+    return provenance
+
+# =====================================================================
+# SÉLECTION
+# =====================================================================
+
+def score_candidates(model, folder_dir, files, batch_size=32):
+    """Probabilités du modèle pour chaque candidat"""
+    img_size = tuple(model.input_shape[1:3])
+    probs = []
+    for start in range(0, len(files), batch_size):
+        batch = []
+        for name in files[start:start + batch_size]:
+            with Image.open(os.path.join(folder_dir, name)) as img:
+                img.draft("RGB", img_size)
+                batch.append(np.asarray(img.convert("RGB").resize(img_size), dtype=np.float32))
+        probs.append(model.predict_on_batch(np.stack(batch) / 255.0))
+    return np.concatenate(probs) if probs else np.zeros((0, model.output_shape[-1]))
+
+def select_candidates(probs, label, quota, rng):
+    """Décision par candidat : keep / review / drop (les plus informatifs d'abord)"""
+    p_true = probs[:, label]
+    predicted, confidence = probs.argmax(axis=1), probs.max(axis=1)
+
+    decisions = np.full(len(probs), "drop", dtype=object)
+    off_class = (predicted != label) & (confidence >= OFF_CLASS_CONFIDENCE)
+    informative = ~off_class & (p_true < EASY_CONFIDENCE)
+    easy = ~off_class & ~informative & (rng.random(len(probs)) < EASY_KEEP_RATIO)
+    decisions[off_class] = "review"
+
+    # Informatifs (p_true croissante) puis faciles, dans la limite du budget
+    order = [i for i in np.argsort(p_true) if informative[i]] + list(np.flatnonzero(easy))
+    for i in order[:quota]:
+        decisions[i] = "keep"
+    return decisions
+
+def apply_decisions(folder, files, decisions, candidates_dir, dataset_dir):
+    """Déplace les images gardées dans le dataset, les douteuses en revue, supprime le reste
+
+    Les images gardées entrent dans le store du dataset (vérification des conflits
+    de classes) ; le store des candidats oublie tous les candidats traités.
+    """
+    candidates, dataset = get_catalog(candidates_dir), get_catalog(dataset_dir)
+    candidate_store, _ = store_for(os.path.join(candidates_dir, folder))
+    dataset_store, _ = store_for(os.path.join(dataset_dir, folder))
+    described = candidate_store.describe(folder)
+    review_dir = os.path.join(candidates_dir, REVIEW_DIR, folder)
+    target_dir = os.path.join(dataset_dir, folder)
+    os.makedirs(target_dir, exist_ok=True)
+    next_index = dataset.next_index(folder)
+
+    for name, decision in zip(files, decisions):
+        src = os.path.join(candidates_dir, folder, name)
+        if decision == "keep":
+            dest_name = f"{next_index}.jpg"
+            key, info = described.get(name, (None, None))
+            with open(src, "rb") as f:
+                dataset_store.put(folder, dest_name, f.read(), key=key, info=info)
+            os.remove(src)
+            dataset.add(folder, dest_name)
+            next_index += 1
+        elif decision == "review":
+            os.makedirs(review_dir, exist_ok=True)
+            shutil.move(src, os.path.join(review_dir, name))
+        else:
+            os.remove(src)
+        candidates.discard(folder, name)
+        candidate_store.discard(folder, name)
+
+    # Blobs des candidats traités : plus aucune vue (une image en revue garde son lien)
+    candidate_store.gc()
+    candidate_store.save()
+    dataset_store.sync([folder])     # Hache les images gardées dont la clé manquait
+    dataset_store.save()
+
+# =====================================================================
+# TOUR D'APPRENTISSAGE ACTIF
+# =====================================================================
+
+def run_round(train, model, models_config, budget, state, candidates_dir, dataset_dir, seed=0):
+    """Un tour complet : planification, scraping, notation, sélection"""
+    per_class = load_class_metrics(train, model)
+    allocation = allocate_budget(per_class, budget)
+    f1 = {row["class"]: row["f1"] for row in per_class}
+    by_folder = {config["folder"]: (name, config) for name, config in models_config.items()}
+    rng = np.random.default_rng(seed)
+
+    summary = []
+    for label, class_name in enumerate(train.CLASSES):
+        quota = allocation.get(class_name, 0)
+        if quota <= 0 or class_name not in by_folder:
+            continue
+        model_name, config = by_folder[class_name]
+        print(f"\n🎯 {class_name}: F1 {f1.get(class_name, 0):.3f} → {quota} images à ajouter")
+
+        provenance = scrape_candidates(model_name, config, quota, state, candidates_dir, dataset_dir)
+        files = sorted(provenance)
+        if not files:
+            continue
+        probs = score_candidates(model, os.path.join(candidates_dir, config["folder"]), files)
+        decisions = select_candidates(probs, label, quota, rng)
+        apply_decisions(config["folder"], files, decisions, candidates_dir, dataset_dir)
+
+        for name, decision in zip(files, decisions):
+            stats = state["queries"].setdefault(provenance[name], {"scraped": 0, "kept": 0})
+            stats["scraped"] += 1
+            stats["kept"] += int(decision == "keep")
+
+        counts = {d: int((decisions == d).sum()) for d in ("keep", "review", "drop")}
+        summary.append({"class": class_name, "f1": f1.get(class_name, 0.0), "budget": quota,
+                        "scraped": len(files), **counts})
+        print(f"   ✅ {counts['keep']} gardées | 👀 {counts['review']} en revue | "
+              f"🗑️  {counts['drop']} supprimées")
+
+    state["rounds"].append({"budget": budget, "classes": summary})
+    save_state(candidates_dir, state)
+    return summary
+
+def print_summary(summary):
+    print("\n" + "="*70)
+    print("APPRENTISSAGE ACTIF - BILAN DU TOUR")
+    print("="*70)
+    print(f"{'classe':25} {'F1':>6} {'budget':>7} {'scrapées':>9} {'gardées':>8} {'revue':>6}")
+    for row in summary:
+        print(f"{row['class'][:25]:25} {row['f1']:6.3f} {row['budget']:>7} {row['scraped']:>9} "
+              f"{row['keep']:>8} {row['review']:>6}")
+
+def main():
+    from tensorflow import keras
+    from multi_brand_scraper import SNEAKER_MODELS
+
+    parser = argparse.ArgumentParser(description="Scraping guidé par les faiblesses du modèle")
+    parser.add_argument("--budget", type=int, default=300, help="Images à ajouter par tour")
+    parser.add_argument("--rounds", type=int, default=1)
+    parser.add_argument("--retrain", action="store_true",
+                        help="Ré-entraîne (et ré-évalue) entre deux tours")
+    parser.add_argument("--model", default=None, help="Modèle Keras (.h5/.keras)")
+    parser.add_argument("--dataset", default="dataset")
+    parser.add_argument("--candidates", default=CANDIDATES_DIR)
+    args = parser.parse_args()
+
+    train = load_train_module()
+    train.DATASET_DIR = args.dataset
+    state = load_state(args.candidates)
+
+    for round_index in range(args.rounds):
+        print("\n" + "="*70)
+        print(f"🔁 TOUR {round_index + 1}/{args.rounds} — budget {args.budget} images")
+        print("="*70)
+        model = keras.models.load_model(args.model or os.path.join(train.OUTPUT_DIR, "final_model.h5"))
+        summary = run_round(train, model, SNEAKER_MODELS, args.budget, state,
+                            args.candidates, args.dataset, seed=len(state["rounds"]))
+        print_summary(summary)
+
+        if args.retrain and round_index < args.rounds - 1:
+            # Réentraînement (phases en cache si rien n'a changé) + nouvelle évaluation
+            if train.main():
+                print("\n❌ Réentraînement impossible : arrêt des tours")
+                break
+            train = load_train_module()
+            train.DATASET_DIR = args.dataset
+
+    get_catalog(args.dataset).save_if_persistent()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+Comparatif des backbones : paramètres, FLOPs, taille TF.js, latence CPU, accuracy
+
+    python backbone_report.py --epochs 5 --min-accuracy 0.85
+    python backbone_report.py --candidates mobilenet_v2:0.35:160 mobilenet_v3_small:1.0:224
+
+Chaque candidat (backbone:alpha:résolution) est entraîné brièvement (tête seule)
+sur le dataset prétraité en cache, puis mesuré ; le rapport désigne le plus
+rapide qui atteint l'accuracy demandée.
+"""
+
+import os
+import json
+import time
+import tempfile
+import argparse
+import numpy as np
+import tensorflow as tf
+
+from dataset_cache import ensure_cache, load_split, cached_sequences, CACHE_DIR
+from train_module import load_train_module
+
+DEFAULT_CANDIDATES = [
+    "mobilenet_v2:1.0:224",
+    "mobilenet_v2:0.75:192",
+    "mobilenet_v2:0.5:160",
+    "mobilenet_v2:0.35:160",
+    "mobilenet_v3_large:1.0:224",
+    "mobilenet_v3_small:1.0:224",
+    "mobilenet_v3_small:0.75:192",
+    "efficientnet_v2_b0:1.0:224",
+]
+
+# =====================================================================
+# MESURES
+# =====================================================================
+
+def count_flops(model, img_size):
+    """FLOPs d'une inférence (batch 1) via le profiler du graphe figé"""
+    from tensorflow.python.framework.convert_to_constants import convert_variables_to_constants_v2
+    try:
+        concrete = tf.function(lambda x: model(x, training=False)).get_concrete_function(
+            tf.TensorSpec([1, *img_size, 3], tf.float32))
+        frozen = convert_variables_to_constants_v2(concrete)
+        options = tf.compat.v1.profiler.ProfileOptionBuilder.float_operation()
+        options["output"] = "none"
+        info = tf.compat.v1.profiler.profile(graph=frozen.graph, run_meta=tf.compat.v1.RunMetadata(),
+                                             cmd="op", options=options)
+        return info.total_float_ops
+    except Exception as e:
+        print(f"   ⚠️  FLOPs indisponibles: {e}")
+        return None
+
+def tfjs_size(model):
+    """Taille exportée en TF.js (model.json + shards) ; estimation float32 si tensorflowjs absent"""
+    try:
+        import tensorflowjs as tfjs
+    except ImportError:
+        return sum(w.size for w in model.get_weights()) * 4, False
+    with tempfile.TemporaryDirectory() as tmp:
+        tfjs.converters.save_keras_model(model, tmp)
+        return sum(os.path.getsize(os.path.join(tmp, f)) for f in os.listdir(tmp)), True
+
+def cpu_latency_ms(model, img_size, runs=30, warmup=5):
+    """Latence médiane d'une inférence batch 1 sur CPU"""
+    x = tf.constant(np.random.rand(1, *img_size, 3).astype(np.float32))
+    with tf.device("/CPU:0"):
+        # Graphe compilé : mesure le modèle, pas l'overhead du mode eager
+        infer = tf.function(lambda inputs: model(inputs, training=False))
+        for _ in range(warmup):
+            infer(x).numpy()
+        times = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            infer(x).numpy()
+            times.append((time.perf_counter() - start) * 1000)
+    return float(np.median(times))
+
+# =====================================================================
+# RAPPORT
+# =====================================================================
+
+def evaluate_candidate(train, backbone, alpha, size, epochs, dataset_dir, cache_dir):
+    """Construit, entraîne brièvement et mesure un candidat"""
+    train.BACKBONE, train.BACKBONE_ALPHA, train.IMG_SIZE = backbone, alpha, (size, size)
+    train.EPOCHS = epochs
+    train.OUTPUT_DIR = os.path.join(train.OUTPUT_DIR, "backbones", f"{backbone}_{alpha}_{size}")
+    os.makedirs(train.OUTPUT_DIR, exist_ok=True)
+
+    ensure_cache(dataset_dir, train.CLASSES, train.IMG_SIZE, cache_dir)
+    arrays, train_index, val_index = load_split(train.CLASSES, train.IMG_SIZE,
+                                                train.VALIDATION_SPLIT, cache_dir)
+    train_seq, val_seq = cached_sequences(arrays, train_index, val_index,
+                                          train.BATCH_SIZE, len(train.CLASSES),
+                                          balanced=train.CLASS_BALANCE == "sampler")
+
+    model = train.build_model()
+    history = train.train_model(model, train_seq, val_seq)
+    size_bytes, measured = tfjs_size(model)
+
+    return {
+        "backbone": backbone,
+        "alpha": alpha,
+        "input": size,
+        "params": model.count_params(),
+        "flops": count_flops(model, train.IMG_SIZE),
+        "tfjs_bytes": size_bytes,
+        "tfjs_measured": measured,
+        "cpu_latency_ms": cpu_latency_ms(model, train.IMG_SIZE),
+        "val_accuracy": max(history.history.get("val_accuracy", [0.0])),
+    }
+
+def print_report(rows, min_accuracy):
+    rows = sorted(rows, key=lambda r: r["cpu_latency_ms"])
+    print("\n" + "="*96)
+    print("COMPARATIF DES BACKBONES (trié par latence CPU)")
+    print("="*96)
+    print(f"{'backbone':20} {'alpha':>5} {'input':>5} {'params':>10} {'MFLOPs':>8} "
+          f"{'TF.js Mo':>9} {'latence ms':>10} {'val acc':>8}")
+    for r in rows:
+        mflops = f"{r['flops'] / 1e6:.0f}" if r["flops"] else "-"
+        size = f"{r['tfjs_bytes'] / 1024 ** 2:.1f}" + ("" if r["tfjs_measured"] else "*")
+        print(f"{r['backbone']:20} {r['alpha']:>5} {r['input']:>5} {r['params']:>10,} {mflops:>8} "
+              f"{size:>9} {r['cpu_latency_ms']:>10.1f} {r['val_accuracy']*100:>7.1f}%")
+    if any(not r["tfjs_measured"] for r in rows):
+        print("* estimation (poids float32), tensorflowjs non installé")
+
+    eligible = [r for r in rows if r["val_accuracy"] >= min_accuracy]
+    if eligible:
+        best = eligible[0]
+        print(f"\n🏆 Plus rapide à ≥ {min_accuracy*100:.0f}% : {best['backbone']} "
+              f"alpha {best['alpha']} @ {best['input']} ({best['cpu_latency_ms']:.1f} ms)")
+    else:
+        print(f"\n⚠️  Aucun candidat n'atteint {min_accuracy*100:.0f}% d'accuracy")
+    return eligible[0] if eligible else None
+
+def main():
+    parser = argparse.ArgumentParser(description="Comparatif accuracy / latence des backbones")
+    parser.add_argument("--candidates", nargs="+", default=DEFAULT_CANDIDATES,
+                        help="backbone:alpha:résolution")
+    parser.add_argument("--epochs", type=int, default=5, help="Epochs d'entraînement de la tête")
+    parser.add_argument("--min-accuracy", type=float, default=0.85)
+    parser.add_argument("--dataset", default="dataset")
+    parser.add_argument("--cache-dir", default=CACHE_DIR)
+    args = parser.parse_args()
+
+    rows = []
+    output_dir = None
+    for candidate in args.candidates:
+        backbone, alpha, size = candidate.split(":")
+        train = load_train_module()
+        train.DATASET_DIR = args.dataset
+        output_dir = output_dir or train.OUTPUT_DIR
+        if backbone not in train.BACKBONES:
+            parser.error(f"Backbone inconnu: {backbone} ({', '.join(train.BACKBONES)})")
+        print(f"\n🔎 Candidat {candidate}")
+        rows.append(evaluate_candidate(train, backbone, float(alpha), int(size),
+                                       args.epochs, args.dataset, args.cache_dir))
+        tf.keras.backend.clear_session()
+
+    best = print_report(rows, args.min_accuracy)
+    output = os.path.join(output_dir, "backbone_report.json")
+    with open(output, "w") as f:
+        json.dump({"candidates": rows, "selected": best, "min_accuracy": args.min_accuracy},
+                  f, indent=2)
+    print(f"✅ Rapport sauvegardé: {output}")
+
+if __name__ == "__main__":
+    main()
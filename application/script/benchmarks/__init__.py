@@ -0,0 +1,4 @@
+"""
+Benchmarks du pipeline de données (hash, qualité, nettoyage, téléchargement, entraînement)
+Lancement depuis application/script : python -m benchmarks.run
+"""
@@ -0,0 +1,484 @@
+"""
+Harness de benchmark du pipeline de données
+
+    python -m benchmarks.run --images 200 --classes 5
+    python -m benchmarks.run --compare <commit_a> <commit_b>
+
+Chaque étape est mesurée sur un dataset synthétique (débit, temps, pic mémoire)
+et les résultats sont enregistrés dans benchmarks/results/<commit>.json
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import resource
+import tracemalloc
+import subprocess
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.synthetic import generate_dataset, ImageServer, SearchServer
+
+SCRIPT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+# =====================================================================
+# MESURE
+# =====================================================================
+
+def measure(name, fn, items):
+    """Exécute fn() et retourne temps, débit et mémoire pour 'items' éléments traités
+    
+    items peut être une fonction, appelée après fn() (éléments réellement produits)
+    """
+    tracemalloc.start()
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    if callable(items):
+        items = items()
+    
+    result = {
+        "items": items,
+        "seconds": round(elapsed, 4),
+        "items_per_s": round(items / elapsed, 2) if elapsed > 0 else None,
+        "peak_py_mb": round(peak / 1024 ** 2, 2),
+        "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+    print(f"   ⏱️  {name:22} {result['seconds']:8.3f}s  "
+          f"{result['items_per_s'] or 0:9.1f} it/s  pic {result['peak_py_mb']:7.1f} Mo")
+    return result
+
+def check_quota(result, produced, quota):
+    """Marque l'étape en échec si elle n'a pas produit 'quota' éléments"""
+    if produced < quota:
+        result["failed"] = f"quota non atteint : {produced}/{quota}"
+        print(f"      ❌ {result['failed']}")
+    return result
+
+def git_commit():
+    """Commit courant (ou 'workdir' hors dépôt git)"""
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"],
+                                       cwd=SCRIPT_DIR, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "workdir"
+
+def stage_output(work_dir, stage, folder="images"):
+    """Dossier de classe d'un dataset propre à l'étape (un store par étape : pas de conflit de classes)"""
+    output = os.path.join(work_dir, stage, "dataset", folder)
+    os.makedirs(output, exist_ok=True)
+    return output
+
+def list_images(dataset_dir):
+    """Chemins de toutes les images du dataset synthétique"""
+    paths = []
+    for folder in sorted(os.listdir(dataset_dir)):
+        folder_path = os.path.join(dataset_dir, folder)
+        if os.path.isdir(folder_path) and not folder.startswith('_backup'):
+            paths.extend(os.path.join(folder_path, f) for f in sorted(os.listdir(folder_path)))
+    return paths
+
+# =====================================================================
+# ÉTAPES
+# =====================================================================
+
+def legacy_image_hash(img):
+    """Ancienne version de compute_image_hash (référence du benchmark)"""
+    import hashlib
+    from PIL import Image
+    img_small = img.resize((8, 8), Image.Resampling.LANCZOS).convert('L')
+    pixels = list(img_small.getdata())
+    avg = sum(pixels) / len(pixels)
+    bits = ''.join('1' if p > avg else '0' for p in pixels)
+    return hashlib.md5(bits.encode()).hexdigest()
+
+def bench_hash(dataset_dir):
+    from PIL import Image
+    from script_supp_doublons import compute_image_hash
+    
+    paths = list_images(dataset_dir)
+    
+    def run():
+        for path in paths:
+            compute_image_hash(Image.open(path).convert("RGB"))
+    
+    return measure("compute_image_hash", run, len(paths))
+
+def bench_legacy_hash(dataset_dir):
+    from PIL import Image
+    
+    paths = list_images(dataset_dir)
+    
+    def run():
+        for path in paths:
+            legacy_image_hash(Image.open(path).convert("RGB"))
+    
+    return measure("legacy_image_hash", run, len(paths))
+
+def bench_hash_batch(dataset_dir):
+    from image_hashing import load_thumbnails, compute_hashes
+    
+    paths = list_images(dataset_dir)
+    
+    def run():
+        stack, _ = load_thumbnails(paths)
+        compute_hashes(stack)
+    
+    return measure("hash_batch (a/d/pHash)", run, len(paths))
+
+def bench_quality(dataset_dir):
+    from script_supp_doublons import get_image_quality_score
+    
+    paths = list_images(dataset_dir)
+    
+    def run():
+        for path in paths:
+            get_image_quality_score(path)
+    
+    return measure("get_image_quality_score", run, len(paths))
+
+def bench_dedup(dataset_dir, work_dir, target):
+    from script_supp_doublons import remove_duplicates_and_balance
+    
+    # Copie de travail : le nettoyage déplace des fichiers
+    copy_dir = os.path.join(work_dir, "dedup_copy")
+    shutil.copytree(dataset_dir, copy_dir)
+    items = len(list_images(copy_dir))
+    
+    def run():
+        with open(os.devnull, "w") as devnull:
+            stdout, sys.stdout = sys.stdout, devnull
+            try:
+                remove_duplicates_and_balance(copy_dir, target=target)
+            finally:
+                sys.stdout = stdout
+    
+    return measure("remove_duplicates", run, items)
+
+def bench_download(work_dir, num_urls, latency, workers):
+    try:
+        from multi_brand_scraper import download_image
+    except ImportError as e:
+        print(f"   ⏭️  download_image ignoré ({e})")
+        return None
+    
+    output = stage_output(work_dir, "download")
+    
+    with ImageServer(num_images=num_urls, latency=latency) as server:
+        urls = server.urls()
+        
+        def run():
+            existing_hashes = set()
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = [executor.submit(download_image, url, output, i, existing_hashes)
+                           for i, url in enumerate(urls)]
+                for future in futures:
+                    future.result()
+        
+        return measure("download_image", run, len(urls))
+
+def bench_download_adaptive(work_dir, num_urls, latency, quota, max_concurrent):
+    """Contrôleur adaptatif face à un serveur qui limite les requêtes simultanées"""
+    try:
+        from multi_brand_scraper import download_image
+    except ImportError as e:
+        print(f"   ⏭️  download_image ignoré ({e})")
+        return None
+    from functools import partial
+    from download_controller import DownloadController
+    
+    output = stage_output(work_dir, "download_adaptive")
+    
+    with ImageServer(num_images=num_urls, latency=latency, max_concurrent=max_concurrent) as server:
+        controller = DownloadController()
+        downloaded = []
+        
+        def handle(result):
+            if result[0]:
+                downloaded.append(result[1])
+            return len(downloaded) >= quota
+        
+        def run():
+            existing_hashes = set()
+            jobs = (partial(download_image, url, output, i, existing_hashes)
+                    for i, url in enumerate(server.urls()))
+            controller.run(jobs, handle)
+        
+        result = measure("download_adaptive", run, lambda: len(downloaded))
+        result.update({"downloaded": len(downloaded), "requests": server.requests_served,
+                       **controller.stats, "final_limit": round(controller.limit, 2)})
+        print(f"      {len(downloaded)} images | {server.requests_served} requêtes | "
+              f"{controller.stats['throttled']} refus 429 | limite finale {controller.limit:.1f}")
+        return check_quota(result, len(downloaded), quota)
+
+def bench_collect_http(num_images, latency):
+    """Collecte d'URLs sans navigateur contre le serveur de recherche local"""
+    try:
+        from multi_brand_scraper import collect_images_http, http_session
+    except ImportError as e:
+        print(f"   ⏭️  collect_images_http ignoré ({e})")
+        return None
+    import re
+    
+    with SearchServer(num_images=num_images, latency=latency) as server:
+        urls = []
+        
+        def run():
+            with open(os.devnull, "w") as devnull:
+                stdout, sys.stdout = sys.stdout, devnull
+                try:
+                    urls.extend(collect_images_http("air jordan 4", session=http_session(),
+                                                    base_url=server.base_url,
+                                                    host=re.escape(server.base_url)))
+                finally:
+                    sys.stdout = stdout
+        
+        result = measure("collect_http", run, num_images)
+        result.update({"urls": len(urls), "pages": server.pages_served})
+        print(f"      {len(urls)} URLs | {server.pages_served} pages")
+        return result
+
+def bench_replay(work_dir, num_images, quota):
+    """Collecte + téléchargement enregistrés contre le serveur local, puis rejoués hors ligne"""
+    try:
+        from multi_brand_scraper import collect_images_http, download_image, http_session
+    except ImportError as e:
+        print(f"   ⏭️  rejeu ignoré ({e})")
+        return None
+    import re
+    from functools import partial
+    from download_controller import DownloadController
+    from session_archive import SessionArchive
+    
+    archive_dir = os.path.join(work_dir, "session")
+    
+    def session_run(archive, base_url, output):
+        session = http_session(session=archive.http())
+        with open(os.devnull, "w") as devnull:
+            stdout, sys.stdout = sys.stdout, devnull
+            try:
+                urls = sorted(collect_images_http("air jordan 4", session=session, base_url=base_url,
+                                                  host=re.escape(base_url)))
+            finally:
+                sys.stdout = stdout
+        downloaded = []
+        
+        def handle(result):
+            if result[0]:
+                downloaded.append(result[1])
+            return len(downloaded) >= quota
+        
+        jobs = (partial(download_image, url, output, i, set(), session=session)
+                for i, url in enumerate(urls))
+        DownloadController(initial=1, min_workers=1, max_workers=1).run(jobs, handle)
+        archive.save()
+        return len(urls), len(downloaded)
+    
+    with SearchServer(num_images=num_images) as server:
+        base_url = server.base_url
+        recorded = session_run(SessionArchive(archive_dir, "record"), base_url,
+                               stage_output(work_dir, "replay_recorded"))
+    
+    # Serveur arrêté : tout vient de l'archive
+    replayed = []
+    result = measure("replay", lambda: replayed.extend(session_run(
+        SessionArchive(archive_dir, "replay"), base_url, stage_output(work_dir, "replay_replayed"))),
+        lambda: replayed[1])
+    result.update({"recorded": recorded, "replayed": replayed})
+    print(f"      enregistré {recorded[0]} URLs / {recorded[1]} images | "
+          f"rejoué {replayed[0]} URLs / {replayed[1]} images")
+    return check_quota(result, min(recorded[1], replayed[1]), quota)
+
+def bench_train_input(dataset_dir, classes, batches):
+    from train_module import load_train_module
+    try:
+        train = load_train_module()
+    except ImportError as e:
+        print(f"   ⏭️  pipeline d'entraînement ignoré ({e})")
+        return None
+    
+    train.DATASET_DIR = dataset_dir
+    train.CLASSES = classes
+    with open(os.devnull, "w") as devnull:
+        stdout, sys.stdout = sys.stdout, devnull
+        try:
+            train_gen, _ = train.create_data_generators()
+        finally:
+            sys.stdout = stdout
+    
+    batches = min(batches, len(train_gen))
+    
+    def run():
+        for i in range(batches):
+            train_gen[i]
+    
+    return measure("train_input_pipeline", run, batches * train_gen.batch_size)
+
+def bench_progressive(dataset_dir, work_dir, classes, epochs, img_size):
+    """Temps pour atteindre la val_accuracy de l'entraînement à résolution fixe, avec --progressive"""
+    try:
+        import tensorflow as tf
+        from training_profiler import EpochTimer
+        from train_module import load_train_module
+        load_train_module()
+    except ImportError as e:
+        print(f"   ⏭️  redimensionnement progressif ignoré ({e})")
+        return None
+    
+    def run(progressive):
+        train = load_train_module()
+        train.DATASET_DIR, train.CLASSES = dataset_dir, classes
+        train.OUTPUT_DIR = os.path.join(work_dir, "progressive" if progressive else "fixed")
+        train.IMG_SIZE, train.EPOCHS = (img_size, img_size), epochs
+        train.HISTOGRAM_FREQ = 0
+        train.PROGRESSIVE_RESIZING = progressive
+        # Calendrier ramené à la résolution du benchmark (128 et 160 pour 224)
+        train.PROGRESSIVE_SCHEDULE = tuple((size * img_size // 224, share)
+                                           for size, share in train.PROGRESSIVE_SCHEDULE)
+        os.makedirs(train.OUTPUT_DIR, exist_ok=True)
+        tf.keras.utils.set_random_seed(0)
+        timer = EpochTimer()
+        with open(os.devnull, "w") as devnull:
+            stdout, sys.stdout = sys.stdout, devnull
+            try:
+                train_gen, val_gen = train.create_data_generators()
+                train.train_model(train.build_model(), train_gen, val_gen, extra_callbacks=[timer])
+            finally:
+                sys.stdout = stdout
+        return timer
+    
+    timers = {}
+    try:
+        fixed = measure("train_fixed", lambda: timers.update(fixed=run(False)), epochs)
+        result = measure("train_progressive", lambda: timers.update(progressive=run(True)), epochs)
+    except Exception as e:
+        # Poids ImageNet indisponibles hors ligne, par exemple
+        print(f"   ⏭️  redimensionnement progressif ignoré ({e})")
+        return None
+    
+    target = timers["fixed"].report()["best_val_accuracy"]
+    result.update({"fixed_seconds": fixed["seconds"], "target_accuracy": target,
+                   "fixed_to_target": timers["fixed"].time_to_accuracy(target),
+                   "progressive_to_target": timers["progressive"].time_to_accuracy(target)})
+    reached = result["progressive_to_target"]
+    print(f"      val_accuracy {target:.3f} : fixe {result['fixed_to_target']:.1f}s | progressif " +
+          (f"{reached:.1f}s" if reached is not None else "non atteinte"))
+    return result
+
+# =====================================================================
+# COMPARAISON
+# =====================================================================
+
+def compare(commit_a, commit_b):
+    """Affiche le rapport de débit entre deux résultats enregistrés"""
+    with open(os.path.join(RESULTS_DIR, f"{commit_a}.json")) as f:
+        a = json.load(f)
+    with open(os.path.join(RESULTS_DIR, f"{commit_b}.json")) as f:
+        b = json.load(f)
+    
+    print(f"\n{'Étape':24} {commit_a:>12} {commit_b:>12} {'ratio':>8}")
+    print("-" * 60)
+    for stage in sorted(set(a["stages"]) | set(b["stages"])):
+        ra, rb = a["stages"].get(stage), b["stages"].get(stage)
+        if not ra or not rb or ra.get("failed") or rb.get("failed"):
+            marks = ["échec" if r and r.get("failed") else "-" for r in (ra, rb)]
+            print(f"{stage:24} {marks[0]:>12} {marks[1]:>12}")
+            continue
+        ratio = rb["items_per_s"] / ra["items_per_s"] if ra["items_per_s"] else 0
+        print(f"{stage:24} {ra['items_per_s']:>10.1f}/s {rb['items_per_s']:>10.1f}/s {ratio:>7.2f}x")
+
+# =====================================================================
+# MAIN
+# =====================================================================
+
+STAGES = ["hash", "legacy_hash", "hash_batch", "quality", "dedup", "download", "download_adaptive", "collect_http", "replay",
+          "train_input", "progressive"]
+SLOW_STAGES = ["progressive"]   # Entraînements complets : seulement sur demande (--stages)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks du pipeline de données")
+    parser.add_argument("--classes", type=int, default=5, help="Nombre de classes synthétiques")
+    parser.add_argument("--images", type=int, default=100, help="Images par classe")
+    parser.add_argument("--duplicates", type=float, default=0.1, help="Part de doublons exacts")
+    parser.add_argument("--target", type=int, default=80, help="Cible d'équilibrage du nettoyage")
+    parser.add_argument("--urls", type=int, default=100, help="URLs servies au téléchargeur")
+    parser.add_argument("--latency", type=float, default=0.02, help="Latence simulée (s)")
+    parser.add_argument("--workers", type=int, default=12, help="Threads de téléchargement")
+    parser.add_argument("--quota", type=int, default=60, help="Images voulues (téléchargement adaptatif)")
+    parser.add_argument("--server-limit", type=int, default=8,
+                        help="Requêtes simultanées acceptées par le serveur simulé")
+    parser.add_argument("--batches", type=int, default=10, help="Batchs du pipeline d'entraînement")
+    parser.add_argument("--train-epochs", type=int, default=6, help="Epochs (redimensionnement progressif)")
+    parser.add_argument("--train-size", type=int, default=160, help="Résolution finale (redimensionnement progressif)")
+    parser.add_argument("--stages", nargs="+", choices=STAGES,
+                        default=[s for s in STAGES if s not in SLOW_STAGES])
+    parser.add_argument("--compare", nargs=2, metavar=("A", "B"), help="Compare deux commits")
+    args = parser.parse_args()
+    
+    if args.compare:
+        compare(*args.compare)
+        return
+    
+    commit = git_commit()
+    print("\n" + "="*70)
+    print(f"📏 BENCHMARK PIPELINE — commit {commit}")
+    print("="*70)
+    
+    results = {
+        "commit": commit,
+        "date": datetime.now().isoformat(),
+        "config": {k: v for k, v in vars(args).items() if k != "compare"},
+        "stages": {}
+    }
+    
+    with tempfile.TemporaryDirectory(prefix="sneakscan_bench_") as work_dir:
+        dataset_dir = os.path.join(work_dir, "dataset")
+        classes = generate_dataset(dataset_dir, args.classes, args.images, args.duplicates)
+        print(f"🧪 Dataset synthétique : {args.classes} classes × {args.images} images\n")
+        
+        runners = {
+            "hash": lambda: bench_hash(dataset_dir),
+            "legacy_hash": lambda: bench_legacy_hash(dataset_dir),
+            "hash_batch": lambda: bench_hash_batch(dataset_dir),
+            "quality": lambda: bench_quality(dataset_dir),
+            "dedup": lambda: bench_dedup(dataset_dir, work_dir, args.target),
+            "download": lambda: bench_download(work_dir, args.urls, args.latency, args.workers),
+            "download_adaptive": lambda: bench_download_adaptive(work_dir, args.urls, args.latency,
+                                                                 args.quota, args.server_limit),
+            "collect_http": lambda: bench_collect_http(args.urls, args.latency),
+            "replay": lambda: bench_replay(work_dir, args.urls, args.quota),
+            "train_input": lambda: bench_train_input(dataset_dir, classes, args.batches),
+            "progressive": lambda: bench_progressive(dataset_dir, work_dir, classes,
+                                                     args.train_epochs, args.train_size),
+        }
+        for stage in args.stages:
+            result = runners[stage]()
+            if result:
+                results["stages"][stage] = result
+        
+        for reference, name in (("hash", "compute_image_hash"), ("legacy_hash", "legacy_image_hash")):
+            if reference in results["stages"] and "hash_batch" in results["stages"]:
+                speedup = (results["stages"][reference]["seconds"]
+                           / max(results["stages"]["hash_batch"]["seconds"], 1e-9))
+                print(f"⚡ Hash par lot : x{speedup:.1f} par rapport à {name}")
+    
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    output = os.path.join(RESULTS_DIR, f"{commit}.json")
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\n💾 Résultats : {output}")
+    
+    failed = [stage for stage, result in results["stages"].items() if result.get("failed")]
+    if failed:
+        print(f"❌ Étapes en échec : {', '.join(failed)}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
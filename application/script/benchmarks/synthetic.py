@@ -0,0 +1,263 @@
+"""
+Génération de datasets synthétiques "type sneakers" et serveurs HTTP locaux
+qui remplacent Pinterest (recherche et images) pour les benchmarks du scraper
+"""
+
+import os
+import json
+import hashlib
+import random
+import threading
+import time
+from io import BytesIO
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+from PIL import Image, ImageDraw
+
+# =====================================================================
+# IMAGES SYNTHÉTIQUES
+# =====================================================================
+
+def make_sneaker_image(rng, size=(640, 480)):
+    """Dessine une silhouette de sneaker (semelle, tige, lacets) sur un fond uni"""
+    w, h = size
+    background = tuple(rng.randint(150, 250) for _ in range(3))
+    img = Image.new("RGB", size, background)
+    draw = ImageDraw.Draw(img)
+    
+    # Semelle
+    sole_top = int(h * rng.uniform(0.60, 0.70))
+    sole_color = tuple(rng.randint(200, 255) for _ in range(3))
+    draw.rounded_rectangle([w * 0.1, sole_top, w * 0.9, sole_top + h * 0.1],
+                           radius=int(h * 0.04), fill=sole_color)
+    
+    # Tige
+    upper_color = tuple(rng.randint(20, 200) for _ in range(3))
+    draw.polygon([
+        (w * 0.12, sole_top),
+        (w * 0.20, h * rng.uniform(0.35, 0.45)),
+        (w * 0.45, h * rng.uniform(0.25, 0.35)),
+        (w * 0.60, h * 0.45),
+        (w * 0.88, sole_top - h * 0.05),
+        (w * 0.88, sole_top),
+    ], fill=upper_color)
+    
+    # Lacets
+    for i in range(5):
+        x = w * (0.30 + i * 0.05)
+        draw.line([(x, h * 0.38 + i * 4), (x + w * 0.04, h * 0.45 + i * 4)],
+                  fill=(255, 255, 255), width=3)
+    
+    # Bruit léger pour éviter des hash identiques entre images
+    for _ in range(200):
+        draw.point((rng.randrange(w), rng.randrange(h)),
+                   fill=tuple(rng.randint(0, 255) for _ in range(3)))
+    
+    return img
+
+def encode_jpeg(img, quality=90):
+    """Encode une image PIL en JPEG (bytes)"""
+    buffer = BytesIO()
+    img.save(buffer, "JPEG", quality=quality)
+    return buffer.getvalue()
+
+def generate_dataset(root, num_classes=10, per_class=50, duplicate_ratio=0.1,
+                     size=(640, 480), seed=42):
+    """Crée root/<classe>/<index>.jpg avec une part de doublons exacts"""
+    rng = random.Random(seed)
+    classes = [f"class_{i:02d}" for i in range(num_classes)]
+    
+    for class_name in classes:
+        class_dir = os.path.join(root, class_name)
+        os.makedirs(class_dir, exist_ok=True)
+        originals = []
+        for index in range(per_class):
+            if originals and rng.random() < duplicate_ratio:
+                data = rng.choice(originals)
+            else:
+                data = encode_jpeg(make_sneaker_image(rng, size))
+                originals.append(data)
+            with open(os.path.join(class_dir, f"{index}.jpg"), "wb") as f:
+                f.write(data)
+    
+    return classes
+
+# =====================================================================
+# SERVEUR HTTP LOCAL (remplace i.pinimg.com)
+# =====================================================================
+
+class ImageServer:
+    """Sert /img/<n>.jpg depuis la mémoire, avec latence et erreurs simulées
+
+    max_concurrent : au-delà de ce nombre de requêtes simultanées, répond 429
+                     (serveur qui limite le débit comme Pinterest)
+    """
+    
+    def __init__(self, num_images=100, size=(640, 480), latency=0.0,
+                 error_rate=0.0, seed=42, max_concurrent=None):
+        rng = random.Random(seed)
+        self.images = [encode_jpeg(make_sneaker_image(rng, size)) for _ in range(num_images)]
+        self.latency = latency
+        self.error_rate = error_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.requests_served = 0
+        self.max_concurrent = max_concurrent
+        self.active = 0
+        self._server = None
+        self._thread = None
+    
+    def _make_handler(self):
+        server = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with server._lock:
+                    server.requests_served += 1
+                    server.active += 1
+                    fail = server._rng.random() < server.error_rate or \
+                        (server.max_concurrent is not None and server.active > server.max_concurrent)
+                try:
+                    if server.latency:
+                        time.sleep(server.latency)
+                    self._respond(fail)
+                finally:
+                    with server._lock:
+                        server.active -= 1
+            
+            def _respond(self, fail):
+                page = server.page(self.path)
+                if page is not None and not fail:
+                    content_type, body = page
+                    self.send_response(200)
+                    self.send_header("Content-Type", content_type)
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                    return
+                
+                index = server.image_index(self.path.split("?")[0])
+                if index is None or not 0 <= index < len(server.images):
+                    self.send_error(404)
+                    return
+                data = server.images[index]
+                if fail:
+                    self.send_error(429)
+                    return
+                
+                self.send_response(200)
+                self.send_header("Content-Type", "image/jpeg")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+            
+            def log_message(self, *args):
+                pass
+        
+        return Handler
+    
+    def page(self, path):
+        """(content-type, corps) pour une URL autre qu'une image, None sinon"""
+        return None
+    
+    def image_index(self, path):
+        """Index de l'image servie pour /.../<n>.jpg (None si inconnue)"""
+        try:
+            return int(os.path.splitext(os.path.basename(path))[0])
+        except ValueError:
+            return None
+    
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+    
+    def urls(self):
+        """URLs de toutes les images servies"""
+        return [f"{self.base_url}/img/{i}.jpg" for i in range(len(self.images))]
+    
+    def __enter__(self):
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+    
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+# =====================================================================
+# SERVEUR DE RECHERCHE LOCAL (remplace www.pinterest.fr)
+# =====================================================================
+
+class SearchServer(ImageServer):
+    """Recherche paginée façon Pinterest servie en local, images comprises
+
+    /search/pins/?q=...                      page HTML avec les premiers pins
+    /resource/BaseSearchResource/get/?data=  pages JSON suivantes (bookmark)
+    /<taille>/ab/cd/ef/<id>.jpg              images, comme i.pinimg.com
+    Comme sur Pinterest, le HTML ne contient que des miniatures (236x, 474x,
+    736x) ; une image sur 'missing_original' n'a pas de version originals.
+    Chaque requête a ses propres images (décalage stable par requête).
+    """
+    
+    def __init__(self, num_images=200, page_size=25, missing_original=4, **kwargs):
+        super().__init__(num_images=num_images, **kwargs)
+        self.page_size = page_size
+        self.missing_original = missing_original
+        self.pages_served = 0
+        self._ids = {hashlib.md5(str(n).encode()).hexdigest(): n for n in range(num_images)}
+        self._paths = {n: f"{i[:2]}/{i[2:4]}/{i[4:6]}/{i}.jpg" for i, n in self._ids.items()}
+    
+    def image_url(self, n, size):
+        return f"{self.base_url}/{size}/{self._paths[n]}"
+    
+    def image_index(self, path):
+        parts = path.strip("/").split("/")
+        n = self._ids.get(os.path.splitext(parts[-1])[0])
+        if n is None or (parts[0] == "originals" and self.missing_original
+                         and n % self.missing_original == 0):
+            return None
+        return n
+    
+    def _pins(self, query, page):
+        offset = sum(query.encode()) % len(self.images)
+        start = page * self.page_size
+        return [(offset + i) % len(self.images)
+                for i in range(start, min(start + self.page_size, len(self.images)))]
+    
+    def _pin_json(self, n):
+        return {"id": str(n), "images": {
+            "236x": {"url": self.image_url(n, "236x")},
+            "orig": {"url": self.image_url(n, "originals")}}}
+    
+    def page(self, path):
+        body = self._render(urlparse(path))
+        if body is not None:
+            with self._lock:
+                self.pages_served += 1
+        return body
+    
+    def _render(self, parsed):
+        params = parse_qs(parsed.query)
+        if parsed.path.startswith("/search/pins"):
+            query = params.get("q", [""])[0]
+            tiles = "".join(
+                f'<img src="{self.image_url(n, "236x")}" '
+                f'srcset="{self.image_url(n, "474x")} 2x">'
+                for n in self._pins(query, 0))
+            return "text/html", f"<html><body>{tiles}</body></html>".encode()
+        
+        if parsed.path.startswith("/resource/BaseSearchResource"):
+            options = json.loads(params["data"][0])["options"]
+            bookmarks = options.get("bookmarks") or []
+            page = int(bookmarks[0]) if bookmarks else 1
+            pins = self._pins(options["query"], page)
+            has_next = (page + 1) * self.page_size < len(self.images)
+            body = {"resource_response": {
+                "data": {"results": [self._pin_json(n) for n in pins]},
+                "bookmark": str(page + 1) if has_next else "-end-"}}
+            return "application/json", json.dumps(body).encode()
+        return None
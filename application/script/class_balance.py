@@ -0,0 +1,134 @@
+"""
+Équilibrage des classes à l'entraînement (sans déplacer de fichiers)
+
+Hors mode "move", le nettoyage ne met plus de côté les images au-delà de
+balance_target : toutes les images dédupliquées restent dans leur classe et
+l'équilibre est obtenu à l'entraînement (balance_mode de classes.json, "move" par défaut) :
+    "move"    : excédent déplacé dans _backup_*_excess au nettoyage
+    "weights" : perte pondérée par classe (n / (classes x n_classe))
+    "sampler" : chaque epoch tire autant d'images de chaque classe ; une grande
+                classe est parcourue sur plusieurs epochs, une petite répétée
+Les doublons d'un manifest seulement planifié (clean --plan) sont ignorés sans
+être déplacés. Les deux modes s'appliquent aussi aux séquences du cache
+(dataset_cache.cached_sequences) utilisées par les sweeps.
+"""
+
+import os
+import glob
+import json
+import math
+import numpy as np
+from tensorflow import keras
+
+def planned_exclusions(dataset_dir="dataset"):
+    """{"classe/fichier"} des doublons et images illisibles des manifests non appliqués"""
+    excluded = set()
+    for path in glob.glob(os.path.join(dataset_dir, "_dedup_manifest*.json")):
+        try:
+            with open(path) as f:
+                plan = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if plan.get("status") != "planned":
+            continue
+        for folder, info in plan["classes"].items():
+            excluded.update(f"{folder}/{e['file']}" for e in info["entries"]
+                            if e["action"] in ("duplicate", "error"))
+    return excluded
+
+def class_weights(labels, num_classes):
+    """{classe: poids} inversement proportionnels à la taille de chaque classe"""
+    counts = np.bincount(np.asarray(labels, dtype=int), minlength=num_classes)
+    present = np.count_nonzero(counts)
+    return {c: float(len(labels) / (present * n)) if n else 0.0 for c, n in enumerate(counts)}
+
+class BalancedSampler:
+    """Tire le même nombre d'images par classe, sans remise classe par classe
+
+    Toutes les images d'une classe servent avant qu'une ne se répète ; une
+    grande classe est parcourue sur plusieurs epochs, une petite répétée.
+    """
+
+    def __init__(self, labels, rng):
+        labels = np.asarray(labels, dtype=int)
+        self._rng = rng
+        self._by_class = [np.flatnonzero(labels == c) for c in np.unique(labels)]
+        self._queues = [np.empty(0, dtype=int) for _ in self._by_class]
+
+    def _draw(self, c, n):
+        """n positions de la classe c, en parcourant des permutations successives"""
+        drawn = []
+        while n > 0:
+            if not len(self._queues[c]):
+                self._queues[c] = self._rng.permutation(self._by_class[c])
+            take = self._queues[c][:n]
+            self._queues[c] = self._queues[c][n:]
+            drawn.append(take)
+            n -= len(take)
+        return np.concatenate(drawn) if drawn else np.empty(0, dtype=int)
+
+    def epoch(self, total):
+        """Positions d'une epoch équilibrée d'environ 'total' images (ordre par classe)"""
+        if not self._by_class:
+            return np.empty(0, dtype=int)
+        per_class = math.ceil(total / len(self._by_class))
+        return np.concatenate([self._draw(c, per_class) for c in range(len(self._by_class))])
+
+class ManifestBatches(keras.utils.PyDataset):
+    """Batches d'un DirectoryIterator (class_mode "categorical"), sans les fichiers
+    exclus, éventuellement équilibrés
+
+    balanced : chaque epoch contient le même nombre d'images par classe (autant
+               d'images au total qu'avant, voir BalancedSampler)
+    """
+
+    def __init__(self, iterator, excluded=(), balanced=False, shuffle=True, seed=None, **kwargs):
+        super().__init__(**kwargs)
+        self.iterator, self.balanced, self.shuffle = iterator, balanced, shuffle
+        self.batch_size = iterator.batch_size
+        self.class_indices = iterator.class_indices
+        self._filepaths = iterator.filepaths
+        self._rng = np.random.default_rng(seed)
+        filenames = [name.replace(os.sep, "/") for name in iterator.filenames]
+        keep = np.array([i for i, name in enumerate(filenames) if name not in excluded], dtype=int)
+        self._keep = keep
+        self._sampler = BalancedSampler(iterator.classes[keep], self._rng) if balanced else None
+        self.on_epoch_end()
+
+    def on_epoch_end(self):
+        if self.balanced:
+            index = self._keep[self._sampler.epoch(len(self._keep))]
+        else:
+            index = self._keep
+        self.index = self._rng.permutation(index) if self.shuffle else index
+
+    @property
+    def samples(self):
+        return len(self.index)
+
+    @property
+    def classes(self):
+        return self.iterator.classes[self.index]
+
+    def __len__(self):
+        return math.ceil(len(self.index) / self.batch_size)
+
+    def _load(self, j):
+        """Image j décodée, augmentée et normalisée comme par le DirectoryIterator"""
+        it = self.iterator
+        img = keras.utils.load_img(self._filepaths[j], color_mode=it.color_mode,
+                                   target_size=it.target_size, interpolation=it.interpolation)
+        x = keras.utils.img_to_array(img, data_format=it.data_format, dtype=it.dtype)
+        img.close()
+        datagen = it.image_data_generator
+        if datagen:
+            x = datagen.standardize(datagen.random_transform(x))
+        return x
+
+    def __getitem__(self, i):
+        # API publique (load_img + random_transform/standardize) sur nos indices
+        batch = self.index[i * self.batch_size:(i + 1) * self.batch_size]
+        batch_x = np.stack([self._load(j) for j in batch])
+        batch_y = np.zeros((len(batch), len(self.class_indices)), dtype=self.iterator.dtype)
+        batch_y[np.arange(len(batch)), self.iterator.classes[batch]] = 1.0
+        return batch_x, batch_y
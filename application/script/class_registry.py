@@ -0,0 +1,75 @@
+"""
+Registre des classes (classes.json) partagé par le scraper, le nettoyage et l'entraînement
+
+Chaque classe a :
+    name    : nom affiché par le scraper ("Adidas Forum Low")
+    label   : libellé exporté vers l'application ("adidas forum low")
+    folder  : dossier du dataset ("adidas_forum_low"), utilisé pour l'entraînement
+    queries : requêtes de recherche
+    target  : objectif de scraping (optionnel, sinon scrape_target)
+
+L'ordre des classes est l'ordre des sorties du modèle.
+balance_mode choisit comment l'équilibre à balance_target est obtenu
+(voir class_balance) : "move", "weights" ou "sampler".
+"""
+
+import os
+import json
+
+from dataset_catalog import get_catalog
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+REGISTRY_FILE = os.path.join(SCRIPT_DIR, "classes.json")
+BALANCE_MODES = ("move", "weights", "sampler")
+
+_REGISTRIES = {}
+
+def load_registry(path=REGISTRY_FILE):
+    """Registre validé (mis en cache par chemin)"""
+    key = os.path.abspath(path)
+    if key not in _REGISTRIES:
+        with open(path, encoding="utf-8") as f:
+            registry = json.load(f)
+        for field in ("name", "label", "folder"):
+            values = [c[field] for c in registry["classes"]]
+            duplicates = {v for v in values if values.count(v) > 1}
+            if duplicates:
+                raise ValueError(f"{path}: {field} en double ({', '.join(sorted(duplicates))})")
+        _REGISTRIES[key] = registry
+    return _REGISTRIES[key]
+
+def class_folders(registry=None):
+    """Dossiers des classes, dans l'ordre des sorties du modèle"""
+    registry = registry or load_registry()
+    return [c["folder"] for c in registry["classes"]]
+
+def class_labels(folders, registry=None):
+    """Libellés d'export pour une liste de dossiers (le dossier lui-même si inconnu)"""
+    registry = registry or load_registry()
+    labels = {c["folder"]: c["label"] for c in registry["classes"]}
+    return [labels.get(folder, folder) for folder in folders]
+
+def scrape_target(entry, registry=None):
+    registry = registry or load_registry()
+    return entry.get("target", registry["scrape_target"])
+
+def balance_mode(registry=None):
+    """Mode d'équilibrage des classes ("move" si absent du registre)"""
+    registry = registry or load_registry()
+    mode = registry.get("balance_mode", "move")
+    if mode not in BALANCE_MODES:
+        raise ValueError(f"balance_mode inconnu: {mode} ({', '.join(BALANCE_MODES)})")
+    return mode
+
+def scraper_models(registry=None):
+    """{nom: {"folder", "queries", "target"}} au format historique de SNEAKER_MODELS"""
+    registry = registry or load_registry()
+    return {c["name"]: {"folder": c["folder"], "queries": c["queries"],
+                        "target": scrape_target(c, registry)}
+            for c in registry["classes"]}
+
+def incomplete_classes(dataset_dir="dataset", registry=None):
+    """Classes sous leur objectif d'après le catalogue (sans relister les dossiers)"""
+    catalog = get_catalog(dataset_dir)
+    return {name: config for name, config in scraper_models(registry).items()
+            if catalog.count(config["folder"]) < config["target"]}
@@ -0,0 +1,90 @@
+"""
+Point d'entrée unique des scripts du dataset et du modèle
+
+    python cli.py verify                 # dataset suffisant pour l'entraînement ?
+    python cli.py report                 # état par classe + store (conflits de classes)
+    python cli.py scrape [--collector http ...]
+    python cli.py clean [--plan ...]
+    python cli.py train [--backbone ... --img-size ...]
+    python cli.py export                 # export TF.js de trained_model/final_model.h5
+
+Chaque commande n'importe que ce dont elle a besoin : verify et report ne
+chargent ni TensorFlow, ni Selenium, ni matplotlib (démarrage < 1 s).
+scrape, clean et train exécutent le script d'origine avec les arguments
+restants (mêmes options que python <script>.py).
+"""
+
+import os
+import sys
+import runpy
+import argparse
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Commande -> script exécuté tel quel avec les arguments restants
+SCRIPTS = {
+    "scrape": "multi_brand_scraper.py",
+    "clean": "script_supp_doublons.py",
+    "train": "train-model.py",
+}
+
+def run_script(name, argv):
+    """Exécute un script du dossier comme 'python <script> <argv>'"""
+    path = os.path.join(SCRIPT_DIR, name)
+    sys.argv = [path] + list(argv)
+    runpy.run_path(path, run_name="__main__")
+
+def verify(args):
+    from dataset_report import verify_dataset
+    ok = verify_dataset(args.dataset)
+    print("\n✅ Dataset prêt pour l'entraînement" if ok else
+          "\n❌ Dataset insuffisant. Minimum 80 images par classe requis.")
+    return 0 if ok else 1
+
+def report(args):
+    from dataset_report import print_dataset_status
+    print("\n📊 ÉTAT DU DATASET")
+    print("-"*70)
+    print_dataset_status(args.dataset)
+
+    from image_store import find_store, print_collisions
+    store = find_store(args.dataset)
+    if store is not None:
+        summary = store.stats()
+        print(f"\n💾 Store : {summary['blobs']} blobs pour {summary['views']} images | "
+              f"{summary['saved'] / 1e6:.1f} Mo économisés")
+        print_collisions(store)
+    return 0
+
+def export(args):
+    from train_module import load_train_module
+    from pipeline import export_model
+    train = load_train_module()
+    train.DATASET_DIR = args.dataset
+    export_model(train, args.dataset, args.cache_dir)
+    return 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Dataset et modèle sneakers")
+    parser.add_argument("--dataset", default="dataset", help="Dossier du dataset")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("verify", help="Vérifie que le dataset est suffisant et équilibré")
+    commands.add_parser("report", help="État des classes et conflits entre classes")
+    export_parser = commands.add_parser("export", help="Exporte le modèle entraîné en TF.js")
+    export_parser.add_argument("--cache-dir", default="dataset_cache")
+    for command, script in SCRIPTS.items():
+        # Options non reconnues (--help compris) transmises telles quelles au script
+        commands.add_parser(command, help=f"python {script}", add_help=False)
+
+    args, extra = parser.parse_known_args(argv)
+    if args.command in SCRIPTS:
+        # Chaque script prend --dataset (DATASET_DIR pour train-model.py)
+        run_script(SCRIPTS[args.command], ["--dataset", args.dataset] + extra)
+        return 0
+    if extra:
+        parser.error(f"arguments non reconnus : {' '.join(extra)}")
+    return {"verify": verify, "report": report, "export": export}[args.command](args)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,162 @@
+"""
+Cache du dataset prétraité : une archive .npy (uint8) par classe et par résolution
+Chaque archive n'est reconstruite que si le contenu de sa classe a changé,
+et se relit en mmap (partagée entre processus via le cache disque de l'OS)
+"""
+
+import os
+import json
+import hashlib
+import numpy as np
+from PIL import Image
+from concurrent.futures import ThreadPoolExecutor
+from dataset_catalog import get_catalog
+
+CACHE_DIR = "dataset_cache"
+# Même redimensionnement que keras load_img (générateurs de train-model.py) : les
+# métriques calculées sur le cache portent sur les mêmes pixels que la validation
+RESAMPLE = "nearest"
+
+def class_fingerprint(dataset_dir, folder):
+    """Empreinte d'une classe : noms et tailles de ses images"""
+    digest = hashlib.sha256()
+    for name, size in sorted(get_catalog(dataset_dir).entries(folder).items()):
+        digest.update(f"{name}:{size};".encode())
+    return digest.hexdigest()
+
+def _shard_paths(cache_dir, folder, img_size):
+    size_dir = os.path.join(cache_dir, f"{img_size[0]}x{img_size[1]}")
+    return os.path.join(size_dir, f"{folder}.npy"), os.path.join(size_dir, f"{folder}.json")
+
+def _load_resized(path, img_size):
+    with Image.open(path) as img:
+        return np.asarray(img.convert("RGB").resize(img_size, Image.Resampling.NEAREST),
+                          dtype=np.uint8)
+
+def pack_class(dataset_dir, folder, img_size, cache_dir=CACHE_DIR, workers=8):
+    """Décode et redimensionne toutes les images d'une classe dans une archive .npy"""
+    array_path, meta_path = _shard_paths(cache_dir, folder, img_size)
+    os.makedirs(os.path.dirname(array_path), exist_ok=True)
+
+    files = get_catalog(dataset_dir).files(folder)
+    paths = [os.path.join(dataset_dir, folder, f) for f in files]
+    width, height = img_size
+
+    images = np.empty((len(paths), height, width, 3), dtype=np.uint8)
+    kept = []
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(lambda p: _safe_load(p, img_size), paths)
+        for name, result in zip(files, results):
+            if result is not None:
+                images[len(kept)] = result
+                kept.append(name)
+    images = images[:len(kept)]
+
+    tmp_path = array_path + ".tmp.npy"
+    np.save(tmp_path, images)
+    os.replace(tmp_path, array_path)
+    with open(meta_path, "w") as f:
+        json.dump({"fingerprint": class_fingerprint(dataset_dir, folder),
+                   "img_size": list(img_size), "resample": RESAMPLE, "files": kept}, f)
+    return array_path
+
+def _safe_load(path, img_size):
+    try:
+        return _load_resized(path, img_size)
+    except Exception as e:
+        print(f"   ⚠️  Erreur sur {path}: {e}")
+        return None
+
+def is_fresh(dataset_dir, folder, img_size, cache_dir=CACHE_DIR):
+    """True si l'archive de la classe correspond au contenu actuel du dossier"""
+    array_path, meta_path = _shard_paths(cache_dir, folder, img_size)
+    try:
+        with open(meta_path) as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return False
+    return (os.path.exists(array_path) and meta.get("resample") == RESAMPLE
+            and meta["fingerprint"] == class_fingerprint(dataset_dir, folder))
+
+def ensure_cache(dataset_dir, classes, img_size, cache_dir=CACHE_DIR):
+    """Reconstruit uniquement les archives des classes modifiées"""
+    repacked = []
+    for folder in classes:
+        if not is_fresh(dataset_dir, folder, img_size, cache_dir):
+            print(f"   📦 Archive {folder} ({img_size[0]}x{img_size[1]})")
+            pack_class(dataset_dir, folder, img_size, cache_dir)
+            repacked.append(folder)
+    return repacked
+
+def load_split(classes, img_size, validation_split=0.2, cache_dir=CACHE_DIR, excluded=()):
+    """Archives en mmap + index (classe, ligne) d'entraînement et de validation
+
+    Comme flow_from_directory, la validation prend la première fraction
+    (triée par nom de fichier) de chaque classe. excluded : {"classe/fichier"}
+    retirés après le découpage, comme ManifestBatches (doublons planifiés).
+    """
+    arrays, train_index, val_index = [], [], []
+    for label, folder in enumerate(classes):
+        array_path, meta_path = _shard_paths(cache_dir, folder, img_size)
+        array = np.load(array_path, mmap_mode="r")
+        arrays.append(array)
+        if excluded:
+            with open(meta_path) as f:
+                names = json.load(f)["files"]
+            kept = [row for row, name in enumerate(names) if f"{folder}/{name}" not in excluded]
+        else:
+            kept = range(len(array))
+        n_val = int(validation_split * len(array))
+        val_index.extend((label, row) for row in kept if row < n_val)
+        train_index.extend((label, row) for row in kept if row >= n_val)
+    return arrays, np.array(train_index, dtype=np.int64), np.array(val_index, dtype=np.int64)
+
+def cached_sequences(arrays, train_index, val_index, batch_size, num_classes, balanced=False):
+    """Séquences Keras sur les archives mmap (augmentation légère : flip horizontal)
+
+    balanced : epochs d'entraînement équilibrées par classe (balance_mode "sampler")
+    """
+    from tensorflow import keras
+    from class_balance import BalancedSampler
+
+    class CachedImageSequence(keras.utils.Sequence):
+        def __init__(self, index, shuffle, balanced=False):
+            super().__init__()
+            self.all_index = index.copy()
+            self.shuffle = shuffle
+            self.rng = np.random.default_rng(0)
+            self.sampler = BalancedSampler(index[:, 0], self.rng) if balanced else None
+            self.index = self.all_index
+            self.on_epoch_end()
+
+        @property
+        def samples(self):
+            return len(self.index)
+
+        @property
+        def classes(self):
+            # Étiquettes de l'epoch courante (poids de classes, comme DirectoryIterator)
+            return self.index[:, 0]
+
+        def __len__(self):
+            return int(np.ceil(len(self.index) / batch_size))
+
+        def __getitem__(self, i):
+            batch = self.index[i * batch_size:(i + 1) * batch_size]
+            x = np.stack([arrays[label][row] for label, row in batch]).astype(np.float32) / 255.0
+            if self.shuffle:
+                flip = self.rng.random(len(x)) < 0.5
+                x[flip] = x[flip, :, ::-1]
+            y = np.eye(num_classes, dtype=np.float32)[batch[:, 0]]
+            return x, y
+
+        def on_epoch_end(self):
+            if self.sampler is not None:
+                self.index = self.all_index[self.sampler.epoch(len(self.all_index))]
+            else:
+                self.index = self.all_index.copy()
+            if self.shuffle:
+                self.rng.shuffle(self.index)
+
+    return (CachedImageSequence(train_index, True, balanced),
+            CachedImageSequence(val_index, False))
@@ -0,0 +1,212 @@
+"""
+Catalogue du dataset partagé par le scraper, le nettoyage et l'entraînement
+Un seul parcours os.scandir par dossier de classe et par exécution,
+avec persistance optionnelle (revalidée par le mtime de chaque dossier)
+"""
+
+import os
+import json
+import threading
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+CATALOG_FILE = "_catalog.json"
+
+class DatasetCatalog:
+    """Index {dossier de classe: {fichier: taille}} construit à la demande"""
+
+    def __init__(self, dataset_dir="dataset", persist=False):
+        self.dataset_dir = dataset_dir
+        self.persist = persist
+        self._folders = {}       # dossier -> {nom: taille en octets}
+        self._mtimes = {}        # dossier -> mtime du dossier lors du scan
+        self._folder_names = None
+        self._lock = threading.RLock()
+        self._persisted = self._load_persisted() if persist else {}
+
+    # -----------------------------------------------------------------
+    # Persistance
+    # -----------------------------------------------------------------
+
+    @property
+    def catalog_path(self):
+        return os.path.join(self.dataset_dir, CATALOG_FILE)
+
+    def _load_persisted(self):
+        try:
+            with open(self.catalog_path) as f:
+                return json.load(f).get("folders", {})
+        except (OSError, ValueError):
+            return {}
+
+    def save_if_persistent(self):
+        if self.persist:
+            self.save()
+
+    def save(self):
+        """Écrit le catalogue sur disque (fichier temporaire + rename)"""
+        with self._lock:
+            # Dossiers modifiés via add()/discard() : le listing mémoire est à jour
+            for folder in self._folders:
+                if self._mtimes.get(folder) is None:
+                    try:
+                        self._mtimes[folder] = os.stat(
+                            os.path.join(self.dataset_dir, folder)).st_mtime_ns
+                    except FileNotFoundError:
+                        pass
+            data = {"folders": {
+                folder: {"mtime": self._mtimes.get(folder), "files": files}
+                for folder, files in self._folders.items()
+            }}
+        os.makedirs(self.dataset_dir, exist_ok=True)
+        tmp_path = self.catalog_path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.catalog_path)
+
+    # -----------------------------------------------------------------
+    # Scan
+    # -----------------------------------------------------------------
+
+    def _scan(self, folder):
+        """Liste un dossier de classe (une seule fois tant qu'il n'est pas invalidé)"""
+        folder_path = os.path.join(self.dataset_dir, folder)
+        try:
+            mtime = os.stat(folder_path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+        cached = self._persisted.get(folder)
+        if cached and cached.get("mtime") == mtime:
+            self._mtimes[folder] = mtime
+            return dict(cached["files"])
+
+        files = {}
+        with os.scandir(folder_path) as it:
+            for entry in it:
+                if entry.name.lower().endswith(IMAGE_EXTENSIONS) and entry.is_file():
+                    files[entry.name] = entry.stat().st_size
+        self._mtimes[folder] = mtime
+        return files
+
+    def _get(self, folder):
+        with self._lock:
+            if folder not in self._folders:
+                files = self._scan(folder)
+                if files is None:
+                    return None
+                self._folders[folder] = files
+            return self._folders[folder]
+
+    # -----------------------------------------------------------------
+    # Requêtes
+    # -----------------------------------------------------------------
+
+    def folders(self):
+        """Dossiers de classes (hors _backup_* et _store), triés"""
+        with self._lock:
+            if self._folder_names is None:
+                if not os.path.isdir(self.dataset_dir):
+                    return []
+                with os.scandir(self.dataset_dir) as it:
+                    self._folder_names = sorted(
+                        entry.name for entry in it
+                        if entry.is_dir() and not entry.name.startswith('_')
+                    )
+            return list(self._folder_names)
+
+    def exists(self, folder):
+        return self._get(folder) is not None
+
+    def files(self, folder):
+        """Noms des images d'un dossier, triés"""
+        return sorted(self._get(folder) or {})
+
+    def entries(self, folder):
+        """{nom: taille en octets} des images d'un dossier"""
+        return dict(self._get(folder) or {})
+
+    def count(self, folder):
+        return len(self._get(folder) or {})
+
+    def size(self, folder):
+        """Taille totale des images d'un dossier, en octets"""
+        return sum((self._get(folder) or {}).values())
+
+    def next_index(self, folder):
+        """Prochain index libre pour nommer les images (<index>.jpg)"""
+        indices = []
+        for name in self._get(folder) or {}:
+            try:
+                indices.append(int(os.path.splitext(name)[0]))
+            except ValueError:
+                continue
+        return max(indices) + 1 if indices else 0
+
+    def stats(self, folders=None):
+        """Statistiques par classe : nombre d'images, octets, prochain index"""
+        return {
+            folder: {
+                "count": self.count(folder),
+                "bytes": self.size(folder),
+                "next_index": self.next_index(folder),
+            }
+            for folder in (folders if folders is not None else self.folders())
+        }
+
+    # -----------------------------------------------------------------
+    # Mises à jour (évitent un nouveau scan après écriture)
+    # -----------------------------------------------------------------
+
+    def add(self, folder, name, size=None):
+        """Enregistre une image écrite pendant l'exécution"""
+        if size is None:
+            size = os.path.getsize(os.path.join(self.dataset_dir, folder, name))
+        with self._lock:
+            files = self._get(folder)
+            if files is None:
+                files = self._folders[folder] = {}
+                if self._folder_names is not None and folder not in self._folder_names:
+                    self._folder_names = sorted(self._folder_names + [folder])
+            files[name] = size
+            self._mtimes.pop(folder, None)
+
+    def discard(self, folder, name):
+        """Retire une image déplacée ou supprimée pendant l'exécution"""
+        with self._lock:
+            files = self._get(folder)
+            if files is not None:
+                files.pop(name, None)
+            self._mtimes.pop(folder, None)
+
+    def invalidate(self, folder=None):
+        """Force un nouveau scan (d'un dossier ou de tout le dataset)"""
+        with self._lock:
+            if folder is None:
+                self._folders.clear()
+                self._mtimes.clear()
+                self._persisted = {}
+                self._folder_names = None
+            else:
+                self._folders.pop(folder, None)
+                self._mtimes.pop(folder, None)
+                self._persisted.pop(folder, None)
+
+# Un catalogue par dataset et par exécution
+_CATALOGS = {}
+
+# Persistance activable sans modifier les scripts (utile sur stockage réseau)
+PERSIST_DEFAULT = os.environ.get("DATASET_CATALOG_PERSIST", "0") == "1"
+
+def get_catalog(dataset_dir="dataset", persist=None):
+    """Catalogue partagé (mis en cache) pour un dossier de dataset"""
+    if persist is None:
+        persist = PERSIST_DEFAULT
+    key = os.path.abspath(dataset_dir)
+    if key not in _CATALOGS:
+        _CATALOGS[key] = DatasetCatalog(dataset_dir, persist=persist)
+    return _CATALOGS[key]
+
+def catalog_for(folder_path, persist=None):
+    """(catalogue, nom de dossier) à partir d'un chemin dataset/<classe>"""
+    dataset_dir, folder = os.path.split(os.path.normpath(folder_path))
+    return get_catalog(dataset_dir or ".", persist=persist), folder
@@ -0,0 +1,76 @@
+"""
+Rapports sur le dataset sans dépendance lourde (ni TensorFlow, ni Selenium)
+Partagés par le scraper, l'entraînement et la CLI (cli.py verify / report)
+"""
+
+from dataset_catalog import get_catalog
+from class_registry import class_folders, scraper_models, incomplete_classes
+
+MIN_IMAGES = 80           # Minimum par classe pour lancer l'entraînement
+
+def verify_dataset(dataset_dir="dataset", classes=None):
+    """Vérifie que le dataset est équilibré et suffisant"""
+    print("\n" + "="*60)
+    print("VÉRIFICATION DU DATASET")
+    print("="*60)
+
+    total_images = 0
+    class_counts = {}
+    catalog = get_catalog(dataset_dir)
+
+    for class_name in (class_folders() if classes is None else classes):
+        if not catalog.exists(class_name):
+            print(f"❌ Dossier manquant: {class_name}")
+            return False
+
+        count = catalog.count(class_name)
+        class_counts[class_name] = count
+        total_images += count
+
+        status = "✅" if count >= 150 else "⚠️" if count >= 100 else "❌"
+        print(f"{status} {class_name:25} {count:4} images")
+
+    print("-"*60)
+    print(f"Total: {total_images} images")
+
+    # Vérification de l'équilibre
+    counts = list(class_counts.values())
+    min_count, max_count = min(counts), max(counts)
+    imbalance_ratio = (max_count - min_count) / max_count * 100 if max_count else 0.0
+
+    print(f"\nDéséquilibre: {imbalance_ratio:.1f}%")
+    if imbalance_ratio > 20:
+        print("⚠️  ATTENTION: Dataset déséquilibré (>20%)")
+        print("   Recommandation: Équilibrer à ~150 images par classe")
+    else:
+        print("✅ Dataset bien équilibré")
+
+    catalog.save_if_persistent()
+    return min_count >= MIN_IMAGES
+
+def print_dataset_status(dataset_dir="dataset"):
+    """État du dataset par rapport aux objectifs du registre"""
+    catalog = get_catalog(dataset_dir)
+    models = scraper_models()
+    total_images = 0
+    total_target = sum(config["target"] for config in models.values())
+
+    for model_name, config in models.items():
+        target = config["target"]
+        if catalog.exists(config['folder']):
+            count = catalog.count(config['folder'])
+            total_images += count
+            status = "✅" if count >= target else "⚠️" if count >= 0.9 * target else "❌"
+            print(f"{status} {model_name:25} {count:3}/{target} images")
+        else:
+            print(f"❌ {model_name:25}   0/{target} images (dossier non créé)")
+
+    print("-"*70)
+    print(f"📈 Total: {total_images}/{total_target} images")
+    avg = total_images / len(models) if total_images > 0 else 0
+    print(f"📊 Moyenne: {avg:.0f} images par classe")
+
+    if not incomplete_classes(dataset_dir):
+        print("\n🎉 DATASET COMPLET ! Toutes les classes ont atteint leur objectif")
+    else:
+        print("\n⚠️  Certaines classes sont encore incomplètes")
@@ -0,0 +1,212 @@
+"""
+Distillation : entraîne un modèle élève compact à partir du modèle fine-tuné
+
+    python distillation.py --teacher trained_model/final_model.h5 \
+        --backbone mobilenet_v2 --alpha 0.35 --img-size 160
+
+Les prédictions du professeur (soft labels) sont calculées une seule fois par
+classe et mises en cache ; l'élève est exporté via export_to_tfjs comme le
+modèle principal.
+"""
+
+import os
+import json
+import time
+import argparse
+import numpy as np
+import tensorflow as tf
+from tensorflow import keras
+
+from dataset_cache import ensure_cache, load_split, class_fingerprint, CACHE_DIR
+from train_module import load_train_module
+from training_state import file_fingerprint
+
+SOFT_LABELS_DIR = "soft_labels"
+
+# =====================================================================
+# SOFT LABELS (CACHE)
+# =====================================================================
+
+def teacher_soft_labels(teacher, teacher_path, dataset_dir, classes, img_size,
+                        cache_dir=CACHE_DIR, batch_size=64):
+    """Probabilités du professeur par classe, recalculées seulement si la classe a changé"""
+    teacher_key = file_fingerprint(teacher_path)[:16]
+    out_dir = os.path.join(cache_dir, SOFT_LABELS_DIR, teacher_key)
+    os.makedirs(out_dir, exist_ok=True)
+
+    ensure_cache(dataset_dir, classes, img_size, cache_dir)
+    arrays, _, _ = load_split(classes, img_size, 0.0, cache_dir)
+
+    soft = []
+    for folder, array in zip(classes, arrays):
+        path = os.path.join(out_dir, f"{folder}.npz")
+        fingerprint = class_fingerprint(dataset_dir, folder)
+        if os.path.exists(path):
+            cached = np.load(path)
+            if str(cached["fingerprint"]) == fingerprint:
+                soft.append(cached["probs"])
+                continue
+
+        print(f"   🧑‍🏫 Soft labels {folder} ({len(array)} images)")
+        probs = np.concatenate([
+            teacher.predict_on_batch(array[i:i + batch_size].astype(np.float32) / 255.0)
+            for i in range(0, len(array), batch_size)
+        ]) if len(array) else np.zeros((0, len(classes)), np.float32)
+        np.savez(path, probs=probs.astype(np.float32), fingerprint=fingerprint)
+        soft.append(probs.astype(np.float32))
+    return soft
+
+# =====================================================================
+# PERTE DE DISTILLATION
+# =====================================================================
+
+def distillation_loss(num_classes, temperature, alpha):
+    """alpha * CE(vraie classe) + (1 - alpha) * T² * KL(professeur || élève) à température T
+
+    y_true = [one-hot (C) | probabilités du professeur (C)]
+    """
+    def loss(y_true, y_pred):
+        hard, teacher_probs = y_true[:, :num_classes], y_true[:, num_classes:]
+        eps = 1e-7
+        hard_loss = keras.losses.categorical_crossentropy(hard, y_pred)
+        # log(p) est un logit à une constante près : softmax(log(p) / T)
+        soft_teacher = tf.nn.softmax(tf.math.log(teacher_probs + eps) / temperature)
+        soft_student = tf.nn.softmax(tf.math.log(y_pred + eps) / temperature)
+        kl = tf.reduce_sum(soft_teacher * (tf.math.log(soft_teacher + eps)
+                                           - tf.math.log(soft_student + eps)), axis=-1)
+        return alpha * hard_loss + (1 - alpha) * temperature ** 2 * kl
+    return loss
+
+def hard_accuracy(num_classes):
+    def accuracy(y_true, y_pred):
+        return keras.metrics.categorical_accuracy(y_true[:, :num_classes], y_pred)
+    return accuracy
+
+class DistillationSequence(keras.utils.Sequence):
+    """Images de l'élève + cibles [one-hot | soft labels du professeur]"""
+
+    def __init__(self, arrays, soft, index, batch_size, num_classes, shuffle):
+        super().__init__()
+        self.arrays, self.soft = arrays, soft
+        self.index = index.copy()
+        self.batch_size, self.num_classes, self.shuffle = batch_size, num_classes, shuffle
+        self.rng = np.random.default_rng(0)
+        if shuffle:
+            self.rng.shuffle(self.index)
+
+    def __len__(self):
+        return int(np.ceil(len(self.index) / self.batch_size))
+
+    def __getitem__(self, i):
+        batch = self.index[i * self.batch_size:(i + 1) * self.batch_size]
+        x = np.stack([self.arrays[label][row] for label, row in batch]).astype(np.float32) / 255.0
+        if self.shuffle:
+            flip = self.rng.random(len(x)) < 0.5
+            x[flip] = x[flip, :, ::-1]
+        hard = np.eye(self.num_classes, dtype=np.float32)[batch[:, 0]]
+        soft = np.stack([self.soft[label][row] for label, row in batch])
+        return x, np.concatenate([hard, soft], axis=1)
+
+    def on_epoch_end(self):
+        if self.shuffle:
+            self.rng.shuffle(self.index)
+
+# =====================================================================
+# MAIN
+# =====================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description="Distillation vers un élève compact")
+    parser.add_argument("--teacher", default=None, help="Modèle professeur (.h5/.keras)")
+    parser.add_argument("--backbone", default="mobilenet_v2")
+    parser.add_argument("--alpha", type=float, default=0.35, help="Largeur du backbone élève")
+    parser.add_argument("--img-size", type=int, default=160, help="Résolution de l'élève")
+    parser.add_argument("--temperature", type=float, default=4.0)
+    parser.add_argument("--hard-weight", type=float, default=0.3,
+                        help="Poids de la perte sur les vraies classes (alpha)")
+    parser.add_argument("--epochs", type=int, default=30)
+    parser.add_argument("--dataset", default="dataset")
+    parser.add_argument("--cache-dir", default=CACHE_DIR)
+    parser.add_argument("--no-export", action="store_true", help="N'exporte pas en TF.js")
+    args = parser.parse_args()
+
+    train = load_train_module()
+    train.DATASET_DIR = args.dataset
+    teacher_path = args.teacher or os.path.join(train.OUTPUT_DIR, "final_model.h5")
+    classes, num_classes = train.CLASSES, len(train.CLASSES)
+
+    print("\n" + "="*60)
+    print("DISTILLATION")
+    print("="*60)
+    print(f"Professeur: {teacher_path}")
+    teacher = keras.models.load_model(teacher_path)
+    teacher_size = tuple(teacher.input_shape[1:3])
+    soft = teacher_soft_labels(teacher, teacher_path, args.dataset, classes,
+                               teacher_size, args.cache_dir)
+
+    # Images de l'élève à sa propre résolution (mêmes fichiers, même ordre)
+    student_size = (args.img_size, args.img_size)
+    ensure_cache(args.dataset, classes, student_size, args.cache_dir)
+    arrays, train_index, val_index = load_split(classes, student_size,
+                                                train.VALIDATION_SPLIT, args.cache_dir)
+    if [len(a) for a in arrays] != [len(s) for s in soft]:
+        raise RuntimeError("Caches professeur/élève désalignés : reconstruire dataset_cache")
+
+    train.BACKBONE, train.BACKBONE_ALPHA, train.IMG_SIZE = args.backbone, args.alpha, student_size
+    student = train.build_model()
+    # Élève entièrement entraînable : ce n'est pas du transfer learning tête seule
+    student.layers[1].trainable = True
+
+    train_seq = DistillationSequence(arrays, soft, train_index, train.BATCH_SIZE, num_classes, True)
+    val_seq = DistillationSequence(arrays, soft, val_index, train.BATCH_SIZE, num_classes, False)
+    student.compile(
+        optimizer=keras.optimizers.Adam(learning_rate=train.LEARNING_RATE * 10),
+        loss=distillation_loss(num_classes, args.temperature, args.hard_weight),
+        metrics=[hard_accuracy(num_classes)]
+    )
+    student.fit(train_seq, validation_data=val_seq, epochs=args.epochs, callbacks=[
+        keras.callbacks.EarlyStopping(monitor="val_accuracy", mode="max", patience=6,
+                                      restore_best_weights=True),
+        keras.callbacks.ReduceLROnPlateau(monitor="val_loss", factor=0.5, patience=3),
+    ])
+
+    # Comparaison professeur / élève sur la validation
+    student.compile(loss="categorical_crossentropy",
+                    metrics=["accuracy", keras.metrics.TopKCategoricalAccuracy(k=3, name="top_3_accuracy")])
+    teacher_arrays, _, teacher_val = load_split(classes, teacher_size,
+                                                train.VALIDATION_SPLIT, args.cache_dir)
+    report = {}
+    for name, model, data, index in (("professeur", teacher, teacher_arrays, teacher_val),
+                                     ("élève", student, arrays, val_index)):
+        x = np.stack([data[label][row] for label, row in index]).astype(np.float32) / 255.0
+        start = time.perf_counter()
+        probs = model.predict(x, batch_size=train.BATCH_SIZE, verbose=0)
+        report[name] = {
+            "accuracy": float((probs.argmax(1) == index[:, 0]).mean()),
+            "params": model.count_params(),
+            "ms_per_image": (time.perf_counter() - start) * 1000 / max(1, len(x)),
+        }
+
+    print("\n" + "="*60)
+    print("PROFESSEUR vs ÉLÈVE")
+    print("="*60)
+    for name, r in report.items():
+        print(f"{name:12} acc {r['accuracy']*100:5.1f}% | {r['params']:>10,} params | "
+              f"{r['ms_per_image']:.1f} ms/image")
+
+    os.makedirs(train.OUTPUT_DIR, exist_ok=True)
+    student_path = os.path.join(train.OUTPUT_DIR, "student_model.h5")
+    student.save(student_path)
+    with open(os.path.join(train.OUTPUT_DIR, "distillation_report.json"), "w") as f:
+        json.dump({"args": vars(args), "report": report}, f, indent=2)
+    print(f"\n✅ Élève sauvegardé: {student_path}")
+
+    if not args.no_export:
+        # Export vérifié sur un batch de validation du cache, avec [loss, acc, top3] de l'élève
+        x_val = np.stack([arrays[label][row] for label, row in val_index]).astype(np.float32) / 255.0
+        y_val = np.eye(num_classes, dtype=np.float32)[val_index[:, 0]]
+        results = student.evaluate(x_val, y_val, batch_size=train.BATCH_SIZE, verbose=0)
+        train.export_to_tfjs(student, x_val[:train.BATCH_SIZE], results)
+
+if __name__ == "__main__":
+    main()
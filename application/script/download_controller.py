@@ -0,0 +1,122 @@
+"""
+Contrôleur de téléchargements : soumission à la demande, annulation au quota,
+concurrence adaptative (AIMD)
+
+Seuls 'limit' téléchargements sont en vol ; chaque résultat en libère un.
+    - réponse normale         : limit += 1 / limit (environ +1 par vague)
+    - HTTP 429 / 5xx          : limit divisé par 2 (au plus une fois par vague),
+                                pause de la soumission, URL remise en file
+    - latence qui se dégrade  : pas d'augmentation (le serveur sature)
+Dès que le quota est atteint, les tâches en cours voient l'événement 'cancel'
+et abandonnent leur téléchargement ; rien d'autre n'est soumis.
+"""
+
+import re
+import time
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+INITIAL_WORKERS = 8
+MIN_WORKERS = 2
+MAX_WORKERS = 32
+LATENCY_FACTOR = 2.0      # Latence moyenne > 2x la meilleure observée : plus d'augmentation
+THROTTLE_PAUSE = 1.0      # Pause maximale (s) de la soumission après un 429 / 5xx
+MAX_RETRIES = 2           # Nouvelles tentatives d'une URL refusée pour surcharge
+EWMA_ALPHA = 0.2
+
+THROTTLE_PATTERN = re.compile(r"HTTP (429|5\d\d)")
+CANCELLED = "Annulé"      # Raison d'échec d'une tâche arrêtée par le contrôleur
+
+def is_throttled(result):
+    """Résultat de download_image signalant une surcharge du serveur"""
+    success, info = result[0], result[1]
+    return not success and bool(THROTTLE_PATTERN.match(str(info)))
+
+class DownloadController:
+    """Exécute des téléchargements avec une concurrence qui s'adapte au serveur"""
+
+    def __init__(self, initial=INITIAL_WORKERS, min_workers=MIN_WORKERS, max_workers=MAX_WORKERS):
+        self.limit = float(initial)
+        self.min_workers, self.max_workers = min_workers, max_workers
+        self.cancel = threading.Event()
+        self.latency = None          # Moyenne glissante (s)
+        self.best_latency = None
+        self.stats = {"submitted": 0, "completed": 0, "throttled": 0, "cancelled": 0,
+                      "max_in_flight": 0}
+        self.history = []            # (secondes depuis le début, limite)
+        self._start = None
+        self._last_decrease = 0.0
+        self._paused_until = 0.0
+
+    def _record(self, seconds, throttled):
+        now = time.perf_counter()
+        if throttled:
+            self.stats["throttled"] += 1
+            self._paused_until = now + min(THROTTLE_PAUSE, 4 * (self.latency or THROTTLE_PAUSE))
+            # Une seule réduction par vague de requêtes (sinon une rafale de 429 effondre la limite)
+            if now - self._last_decrease > (self.latency or 0):
+                self.limit = max(self.min_workers, self.limit / 2)
+                self._last_decrease = now
+        else:
+            self.latency = seconds if self.latency is None else \
+                (1 - EWMA_ALPHA) * self.latency + EWMA_ALPHA * seconds
+            self.best_latency = min(self.best_latency or self.latency, self.latency)
+            if self.latency <= LATENCY_FACTOR * self.best_latency:
+                self.limit = min(self.max_workers, self.limit + 1 / self.limit)
+        self.history.append((round(now - self._start, 3), round(self.limit, 2)))
+
+    def _timed(self, job):
+        start = time.perf_counter()
+        result = job(cancel=self.cancel)
+        return job, result, time.perf_counter() - start
+
+    def run(self, jobs, handle):
+        """Exécute les tâches jusqu'à épuisement ou jusqu'à ce que handle(résultat) retourne True
+
+        jobs   : itérable de fonctions job(cancel=threading.Event) (consommé à la demande)
+        handle : appelé dans le thread principal pour chaque résultat
+        """
+        self._start = time.perf_counter()
+        jobs = iter(jobs)
+        retries = deque()
+        attempts = {}
+        exhausted = False
+        in_flight = set()
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        try:
+            while in_flight or not ((exhausted and not retries) or self.cancel.is_set()):
+                while not ((exhausted and not retries) or self.cancel.is_set()) \
+                        and len(in_flight) < int(self.limit) and time.perf_counter() >= self._paused_until:
+                    job = retries.popleft() if retries else next(jobs, None)
+                    if job is None:
+                        exhausted = True
+                        continue
+                    in_flight.add(executor.submit(self._timed, job))
+                    self.stats["submitted"] += 1
+                self.stats["max_in_flight"] = max(self.stats["max_in_flight"], len(in_flight))
+                if not in_flight:
+                    time.sleep(max(0.0, self._paused_until - time.perf_counter()))
+                    continue
+
+                done, in_flight = wait(in_flight, timeout=THROTTLE_PAUSE, return_when=FIRST_COMPLETED)
+                for future in done:
+                    job, result, seconds = future.result()
+                    self.stats["completed"] += 1
+                    if self.cancel.is_set():
+                        # Quota atteint : les tâches restantes s'arrêtent d'elles-mêmes,
+                        # un fichier déjà écrit est quand même transmis à handle
+                        self.stats["cancelled"] += int(result[1] == CANCELLED)
+                    else:
+                        throttled = is_throttled(result)
+                        self._record(seconds, throttled)
+                        if throttled and attempts.get(job, 0) < MAX_RETRIES:
+                            attempts[job] = attempts.get(job, 0) + 1
+                            retries.append(job)
+                            continue
+                    if handle(result):
+                        self.cancel.set()
+        finally:
+            self.cancel.set()
+            executor.shutdown(wait=True, cancel_futures=True)
+        return self.stats
@@ -0,0 +1,230 @@
+"""
+Évaluation détaillée : TTA, top-k, matrice de confusion, précision/rappel, calibration
+
+    python evaluation.py --model trained_model/final_model.h5 --tta flip crop
+
+Toute la validation est lue depuis le dataset prétraité (dataset_cache) et
+passée au modèle par gros batches ; les vues TTA d'un batch partent dans une
+seule inférence. Les probabilités sont mises en cache par (poids du modèle,
+contenu du dataset, TTA) : une nouvelle analyse ne relance pas le modèle.
+"""
+
+import os
+import json
+import hashlib
+import argparse
+import numpy as np
+import tensorflow as tf
+
+from dataset_cache import ensure_cache, load_split, class_fingerprint, CACHE_DIR
+from class_balance import planned_exclusions
+
+PREDICTIONS_DIR = "predictions"
+TTA_MODES = ("flip", "crop", "corners")
+CROP_FRACTION = 0.875
+CALIBRATION_BINS = 15
+TOP_K = 3
+
+# =====================================================================
+# INFÉRENCE (TTA)
+# =====================================================================
+
+def _crop_boxes(fraction, corners):
+    """Boîtes normalisées (y1, x1, y2, x2) : centre ou quatre coins"""
+    margin = 1 - fraction
+    if not corners:
+        return [[margin / 2, margin / 2, 1 - margin / 2, 1 - margin / 2]]
+    return [[0, 0, fraction, fraction], [0, margin, fraction, 1],
+            [margin, 0, 1, fraction], [margin, margin, 1, 1]]
+
+def tta_views(x, modes):
+    """Empile les vues TTA d'un batch : (V * B, H, W, 3), vue 0 = image d'origine"""
+    views = [x]
+    if "flip" in modes:
+        views.append(tf.image.flip_left_right(x))
+    size = tf.shape(x)[1:3]
+    batch = tf.shape(x)[0]
+    for mode, corners in (("crop", False), ("corners", True)):
+        if mode not in modes:
+            continue
+        for box in _crop_boxes(CROP_FRACTION, corners):
+            boxes = tf.tile(tf.constant([box], tf.float32), [batch, 1])
+            views.append(tf.image.crop_and_resize(x, boxes, tf.range(batch), size))
+    return tf.concat(views, axis=0), len(views)
+
+def predict_views(model, arrays, index, modes=(), batch_size=64):
+    """Probabilités par vue TTA : tableau (V, N, C) sur tous les exemples de l'index"""
+    infer = tf.function(lambda inputs: model(inputs, training=False), reduce_retracing=True)
+    outputs = []
+    for start in range(0, len(index), batch_size):
+        batch = index[start:start + batch_size]
+        x = np.stack([arrays[label][row] for label, row in batch]).astype(np.float32) / 255.0
+        views, n_views = tta_views(tf.constant(x), modes)
+        probs = infer(views).numpy()
+        outputs.append(probs.reshape(n_views, len(batch), -1))
+    return np.concatenate(outputs, axis=1)
+
+def model_fingerprint(model):
+    """Empreinte des poids du modèle (indépendante du chemin du fichier)"""
+    digest = hashlib.sha256(str(model.input_shape).encode())
+    for weight in model.get_weights():
+        digest.update(np.ascontiguousarray(weight).tobytes())
+    return digest.hexdigest()
+
+# =====================================================================
+# MÉTRIQUES
+# =====================================================================
+
+def compute_metrics(probs, labels, classes, k=TOP_K, bins=CALIBRATION_BINS):
+    """Métriques vectorisées sur toute la validation"""
+    n, num_classes = probs.shape
+    pred = probs.argmax(axis=1)
+    correct = pred == labels
+
+    confusion = np.bincount(labels * num_classes + pred,
+                            minlength=num_classes ** 2).reshape(num_classes, num_classes)
+    tp = np.diag(confusion)
+    predicted, support = confusion.sum(axis=0), confusion.sum(axis=1)
+    precision = np.divide(tp, predicted, out=np.zeros(num_classes), where=predicted > 0)
+    recall = np.divide(tp, support, out=np.zeros(num_classes), where=support > 0)
+    f1 = np.divide(2 * precision * recall, precision + recall,
+                   out=np.zeros(num_classes), where=precision + recall > 0)
+
+    top_k = np.argsort(-probs, axis=1)[:, :k]
+    confidence = probs.max(axis=1)
+    one_hot = np.eye(num_classes)[labels]
+
+    # Calibration : écart confiance / accuracy par tranche de confiance (ECE)
+    bin_ids = np.minimum((confidence * bins).astype(int), bins - 1)
+    counts = np.bincount(bin_ids, minlength=bins)
+    conf_sum = np.bincount(bin_ids, weights=confidence, minlength=bins)
+    acc_sum = np.bincount(bin_ids, weights=correct, minlength=bins)
+    safe = np.maximum(counts, 1)
+
+    off_diagonal = confusion * (1 - np.eye(num_classes, dtype=int))
+    worst = np.argsort(-off_diagonal, axis=None)[:5]
+
+    return {
+        "samples": int(n),
+        "accuracy": float(correct.mean()),
+        f"top_{k}_accuracy": float((top_k == labels[:, None]).any(axis=1).mean()),
+        "loss": float(-np.log(probs[np.arange(n), labels] + 1e-7).mean()),
+        "ece": float(np.abs(acc_sum - conf_sum).sum() / max(n, 1)),
+        "brier": float(((probs - one_hot) ** 2).sum(axis=1).mean()),
+        "mean_confidence": float(confidence.mean()),
+        "confusion": confusion.tolist(),
+        "per_class": [
+            {"class": name, "precision": float(precision[i]), "recall": float(recall[i]),
+             "f1": float(f1[i]), "support": int(support[i]),
+             "mean_confidence": float(confidence[labels == i].mean()) if support[i] else 0.0}
+            for i, name in enumerate(classes)
+        ],
+        "reliability": [
+            {"bin": [b / bins, (b + 1) / bins], "count": int(counts[b]),
+             "confidence": float(conf_sum[b] / safe[b]), "accuracy": float(acc_sum[b] / safe[b])}
+            for b in range(bins) if counts[b]
+        ],
+        "top_confusions": [
+            {"true": classes[i // num_classes], "predicted": classes[i % num_classes],
+             "count": int(off_diagonal.flat[i])}
+            for i in worst if off_diagonal.flat[i]
+        ],
+    }
+
+# =====================================================================
+# ÉVALUATION (AVEC CACHE)
+# =====================================================================
+
+def evaluate(model, dataset_dir, classes, img_size, validation_split=0.2, tta=(),
+             batch_size=64, cache_dir=CACHE_DIR):
+    """Rapport complet sur la validation ; prédictions réutilisées si rien n'a changé"""
+    unknown = set(tta) - set(TTA_MODES)
+    if unknown:
+        raise ValueError(f"Modes TTA inconnus: {', '.join(sorted(unknown))}")
+
+    # Même échantillon que la validation de l'entraînement (doublons planifiés exclus)
+    excluded = planned_exclusions(dataset_dir)
+    ensure_cache(dataset_dir, classes, img_size, cache_dir)
+    arrays, _, val_index = load_split(classes, img_size, validation_split, cache_dir, excluded)
+    labels = val_index[:, 0]
+
+    key = hashlib.sha256(json.dumps({
+        "model": model_fingerprint(model),
+        "classes": {c: class_fingerprint(dataset_dir, c) for c in classes},
+        "img_size": list(img_size),
+        "validation_split": validation_split,
+        "excluded": sorted(excluded),
+        "tta": sorted(tta),
+        "crop_fraction": CROP_FRACTION,
+    }, sort_keys=True).encode()).hexdigest()[:16]
+    path = os.path.join(cache_dir, PREDICTIONS_DIR, f"{key}.npz")
+
+    if os.path.exists(path):
+        print(f"   ⚡ Prédictions en cache ({key})")
+        views = np.load(path)["views"]
+    else:
+        views = predict_views(model, arrays, val_index, tta, batch_size)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        np.savez(path, views=views, labels=labels)
+
+    report = {
+        "tta": list(tta),
+        "views": int(len(views)),
+        "predictions": path,
+        "metrics": compute_metrics(views.mean(axis=0), labels, classes),
+    }
+    if len(views) > 1:
+        report["metrics_no_tta"] = compute_metrics(views[0], labels, classes)
+    return report
+
+def print_report(report):
+    metrics = report["metrics"]
+    print(f"Exemples:        {metrics['samples']} ({report['views']} vue(s) TTA)")
+    print(f"Loss:            {metrics['loss']:.4f}")
+    print(f"Accuracy:        {metrics['accuracy']*100:.2f}%")
+    print(f"Top-{TOP_K} Accuracy:  {metrics[f'top_{TOP_K}_accuracy']*100:.2f}%")
+    if "metrics_no_tta" in report:
+        print(f"Sans TTA:        {report['metrics_no_tta']['accuracy']*100:.2f}%")
+    print(f"Calibration:     ECE {metrics['ece']:.3f} | Brier {metrics['brier']:.3f} | "
+          f"confiance moyenne {metrics['mean_confidence']*100:.1f}%")
+
+    print(f"\n{'classe':25} {'précision':>9} {'rappel':>7} {'f1':>6} {'n':>5}")
+    for row in sorted(metrics["per_class"], key=lambda r: r["f1"]):
+        print(f"{row['class'][:25]:25} {row['precision']*100:8.1f}% {row['recall']*100:6.1f}% "
+              f"{row['f1']:6.3f} {row['support']:>5}")
+
+    if metrics["top_confusions"]:
+        print("\nConfusions les plus fréquentes:")
+        for c in metrics["top_confusions"]:
+            print(f"   {c['true']} → {c['predicted']}: {c['count']}")
+
+def main():
+    from tensorflow import keras
+    from train_module import load_train_module
+
+    parser = argparse.ArgumentParser(description="Rapport d'évaluation détaillé")
+    parser.add_argument("--model", default=None, help="Modèle Keras (.h5/.keras)")
+    parser.add_argument("--tta", nargs="*", default=[], choices=TTA_MODES)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--dataset", default="dataset")
+    parser.add_argument("--cache-dir", default=CACHE_DIR)
+    args = parser.parse_args()
+
+    train = load_train_module()
+    model_path = args.model or os.path.join(train.OUTPUT_DIR, "final_model.h5")
+    model = keras.models.load_model(model_path)
+
+    print("\n" + "="*60)
+    print("ÉVALUATION DÉTAILLÉE")
+    print("="*60)
+    report = evaluate(model, args.dataset, train.CLASSES, tuple(model.input_shape[1:3]),
+                      train.VALIDATION_SPLIT, args.tta, args.batch_size, args.cache_dir)
+    print_report(report)
+
+    output = os.path.join(os.path.dirname(model_path) or ".", "evaluation_report.json")
+    with open(output, "w") as f:
+        json.dump({"model": model_path, **report}, f, indent=2)
+    print(f"\n✅ Rapport sauvegardé: {output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+"""
+Recherche d'hyperparamètres pour train-model.py
+
+    python hyperparam_sweep.py --space sweep_space.json --trials 8 --workers 2
+
+Les essais tournent en parallèle dans des processus séparés (threads TF limités
+par essai), lisent le même dataset prétraité (dataset_cache, en mmap) et sont
+élagués tôt quand ils sont sous la médiane des autres essais à la même epoch.
+
+Exemple d'espace de recherche (listes = valeurs possibles) :
+    {"learning_rate": [0.0001, 0.0003], "batch_size": [16, 32],
+     "img_size": [160, 224], "dropout_rate": [0.2, 0.3], "fine_tune_layers": [20, 30]}
+"""
+
+import os
+import csv
+import json
+import time
+import random
+import argparse
+import itertools
+import multiprocessing
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from dataset_cache import ensure_cache, load_split, cached_sequences, CACHE_DIR
+
+from train_module import load_train_module
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+SWEEP_DIR = "sweeps"
+
+# Clés de l'espace de recherche -> constantes de train-model.py
+PARAMS = {
+    "backbone": "BACKBONE",
+    "backbone_alpha": "BACKBONE_ALPHA",
+    "learning_rate": "LEARNING_RATE",
+    "batch_size": "BATCH_SIZE",
+    "img_size": "IMG_SIZE",
+    "dense_units": "DENSE_UNITS",
+    "dropout_rate": "DROPOUT_RATE",
+    "dense_dropout_rate": "DENSE_DROPOUT_RATE",
+    "fine_tune_layers": "FINE_TUNE_LAYERS",
+    "epochs": "EPOCHS",
+    "fine_tune_epochs": "FINE_TUNE_EPOCHS",
+}
+
+# =====================================================================
+# ESPACE DE RECHERCHE
+# =====================================================================
+
+def sample_trials(space, n_trials, seed=42):
+    """Grille complète si elle tient dans n_trials, sinon tirage aléatoire sans remise"""
+    keys = sorted(space)
+    grid = [dict(zip(keys, values)) for values in itertools.product(*(space[k] for k in keys))]
+    if len(grid) <= n_trials:
+        return grid
+    return random.Random(seed).sample(grid, n_trials)
+
+def image_size(params, default):
+    size = params.get("img_size", default)
+    return (size, size) if isinstance(size, int) else tuple(size)
+
+# =====================================================================
+# ESSAI (processus enfant)
+# =====================================================================
+
+def _limit_threads(threads):
+    """Limite les threads de chaque essai (à appeler avant tout import de TensorFlow)"""
+    for var in ("OMP_NUM_THREADS", "TF_NUM_INTRAOP_THREADS", "TF_NUM_INTEROP_THREADS"):
+        os.environ[var] = str(threads)
+
+def _make_pruner(keras, trials_dir, trial_id, warmup, min_trials):
+    """Élagage médian : arrête un essai sous la médiane des autres à la même epoch"""
+
+    class MedianPruner(keras.callbacks.Callback):
+        def __init__(self):
+            super().__init__()
+            self.curve = []
+            self.pruned = False
+            self.path = os.path.join(trials_dir, f"{trial_id}.curve.json")
+
+        def on_epoch_end(self, epoch, logs=None):
+            self.curve.append(float((logs or {}).get("val_accuracy", 0.0)))
+            with open(self.path, "w") as f:
+                json.dump(self.curve, f)
+
+            if len(self.curve) <= warmup:
+                return
+            others = []
+            for name in os.listdir(trials_dir):
+                if name.endswith(".curve.json") and name != os.path.basename(self.path):
+                    try:
+                        with open(os.path.join(trials_dir, name)) as f:
+                            curve = json.load(f)
+                    except (OSError, ValueError):
+                        continue
+                    if len(curve) >= len(self.curve):
+                        others.append(max(curve[:len(self.curve)]))
+            if len(others) >= min_trials and max(self.curve) < np.median(others):
+                print(f"✂️  Essai {trial_id} élagué à l'epoch {epoch + 1}")
+                self.pruned = True
+                self.model.stop_training = True
+
+    return MedianPruner()
+
+def run_trial(trial_id, params, config):
+    """Entraîne un essai et retourne ses métriques"""
+    _limit_threads(config["threads"])
+    import tensorflow as tf
+    from tensorflow import keras
+    tf.config.threading.set_intra_op_parallelism_threads(config["threads"])
+    tf.config.threading.set_inter_op_parallelism_threads(max(1, config["threads"] // 2))
+
+    train = load_train_module()
+    for key, value in params.items():
+        setattr(train, PARAMS[key], image_size(params, value) if key == "img_size" else value)
+    train.CLASSES = config["classes"]
+    train.OUTPUT_DIR = os.path.join(config["sweep_dir"], trial_id)
+    os.makedirs(train.OUTPUT_DIR, exist_ok=True)
+
+    arrays, train_index, val_index = load_split(
+        train.CLASSES, train.IMG_SIZE, train.VALIDATION_SPLIT, config["cache_dir"])
+    train_seq, val_seq = cached_sequences(arrays, train_index, val_index,
+                                          train.BATCH_SIZE, len(train.CLASSES),
+                                          balanced=train.CLASS_BALANCE == "sampler")
+
+    pruner = _make_pruner(keras, config["sweep_dir"], trial_id,
+                          config["warmup"], config["min_trials"])
+    start = time.perf_counter()
+    model = train.build_model()
+    history = train.train_model(model, train_seq, val_seq, extra_callbacks=[pruner])
+    if config["fine_tune"] and not pruner.pruned:
+        history = train.fine_tune_model(model, train_seq, val_seq, history,
+                                        extra_callbacks=[pruner])
+
+    return {
+        "trial": trial_id,
+        **params,
+        "best_val_accuracy": max(history.history.get("val_accuracy", [0.0])),
+        "best_val_top3": max(history.history.get("val_top_3_accuracy", [0.0])),
+        "epochs": len(history.history.get("loss", [])),
+        "seconds": round(time.perf_counter() - start, 1),
+        "pruned": pruner.pruned,
+    }
+
+# =====================================================================
+# RÉSULTATS
+# =====================================================================
+
+def write_results(results, sweep_dir):
+    """Tableau des essais trié par accuracy (CSV + affichage)"""
+    results = sorted(results, key=lambda r: r["best_val_accuracy"], reverse=True)
+    columns = list(dict.fromkeys(k for r in results for k in r))
+    path = os.path.join(sweep_dir, "results.csv")
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=columns)
+        writer.writeheader()
+        writer.writerows(results)
+
+    print("\n" + "="*70)
+    print("RÉSULTATS DE LA RECHERCHE")
+    print("="*70)
+    print(" | ".join(f"{c:>12}" for c in columns))
+    for r in results:
+        print(" | ".join(f"{str(r.get(c, '')):>12}" for c in columns))
+    print(f"\n✅ Tableau sauvegardé: {path}")
+    return path
+
+# =====================================================================
+# MAIN
+# =====================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description="Recherche d'hyperparamètres en parallèle")
+    parser.add_argument("--space", required=True, help="Espace de recherche (JSON)")
+    parser.add_argument("--trials", type=int, default=8, help="Nombre maximal d'essais")
+    parser.add_argument("--workers", type=int, default=2, help="Essais en parallèle")
+    parser.add_argument("--threads", type=int, default=None, help="Threads TF par essai")
+    parser.add_argument("--warmup", type=int, default=3, help="Epochs avant élagage possible")
+    parser.add_argument("--min-trials", type=int, default=2,
+                        help="Essais de référence nécessaires pour élaguer")
+    parser.add_argument("--fine-tune", action="store_true", help="Inclut la phase de fine-tuning")
+    parser.add_argument("--dataset", default="dataset")
+    parser.add_argument("--cache-dir", default=CACHE_DIR)
+    parser.add_argument("--name", default=time.strftime("%Y%m%d_%H%M%S"))
+    args = parser.parse_args()
+
+    with open(args.space) as f:
+        space = json.load(f)
+    unknown = set(space) - set(PARAMS)
+    if unknown:
+        parser.error(f"Paramètres inconnus: {', '.join(sorted(unknown))}")
+
+    threads = args.threads or max(1, (os.cpu_count() or 1) // args.workers)
+    trials = sample_trials(space, args.trials)
+    sweep_dir = os.path.join(SWEEP_DIR, args.name)
+    os.makedirs(sweep_dir, exist_ok=True)
+
+    # Classes et valeurs par défaut de train-model.py (les essais sont des processus "spawn")
+    defaults = load_train_module()
+    classes = defaults.CLASSES
+
+    print("\n" + "="*70)
+    print(f"🔬 RECHERCHE D'HYPERPARAMÈTRES — {len(trials)} essais, {args.workers} en parallèle")
+    print(f"   {threads} threads TF par essai | résultats: {sweep_dir}")
+    print("="*70)
+
+    # Dataset prétraité une seule fois par résolution, partagé par tous les essais
+    for size in sorted({image_size(t, defaults.IMG_SIZE) for t in trials}):
+        ensure_cache(args.dataset, classes, size, args.cache_dir)
+
+    config = {
+        "classes": classes,
+        "threads": threads,
+        "sweep_dir": sweep_dir,
+        "cache_dir": args.cache_dir,
+        "warmup": args.warmup,
+        "min_trials": args.min_trials,
+        "fine_tune": args.fine_tune,
+    }
+    with open(os.path.join(sweep_dir, "sweep.json"), "w") as f:
+        json.dump({"space": space, "trials": trials, "config": config}, f, indent=2)
+
+    results = []
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=args.workers, mp_context=context) as executor:
+        futures = {executor.submit(run_trial, f"trial_{i:03d}", params, config): params
+                   for i, params in enumerate(trials)}
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except Exception as e:
+                print(f"❌ Essai {futures[future]} en échec: {e}")
+                continue
+            results.append(result)
+            status = "✂️ " if result["pruned"] else "✅"
+            print(f"{status} {result['trial']}: val_acc {result['best_val_accuracy']*100:.1f}% "
+                  f"en {result['seconds']}s")
+
+    write_results(results, sweep_dir)
+
+if __name__ == "__main__":
+    main()
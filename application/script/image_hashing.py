@@ -0,0 +1,137 @@
+"""
+Hash perceptuels vectorisés (aHash, dHash, pHash) sur des lots d'images
+
+Les images sont décodées en parallèle (draft JPEG) en vignettes 32x32 niveaux
+de gris, empilées dans un tableau NumPy, puis hachées toutes ensemble.
+Chaque hash est un uint64 (64 bits) :
+    aHash : pixels 8x8 au-dessus de la moyenne
+    dHash : gradient horizontal sur 9x8
+    pHash : signe des basses fréquences de la DCT 32x32 (robuste à la recompression)
+
+La clé de doublon (nettoyage et scraper) est le couple aHash + pHash : l'aHash
+seul confond trop souvent des sneakers différentes sur fond uni.
+"""
+
+import numpy as np
+from PIL import Image
+from concurrent.futures import ThreadPoolExecutor
+
+THUMB_SIZE = 32
+HASH_SIZE = 8
+HASH_KINDS = ("ahash", "dhash", "phash")
+
+# =====================================================================
+# VIGNETTES
+# =====================================================================
+
+def _draft_factor(width, height):
+    """Réduction appliquée par draft() pour une cible 64x64 (1, 2, 4 ou 8)"""
+    factor = 1
+    while factor < 8 and min(width, height) // (factor * 2) >= THUMB_SIZE * 2:
+        factor *= 2
+    return factor
+
+def thumbnail(img):
+    """Vignette 32x32 niveaux de gris (uint8) d'une image PIL déjà ouverte"""
+    factor = _draft_factor(img.width, img.height)
+    if factor > 1:
+        # Même réduction que draft() à la lecture d'un fichier : hash identiques fichier / mémoire
+        img = img.reduce(factor)
+    return np.asarray(img.convert("L").resize((THUMB_SIZE, THUMB_SIZE), Image.Resampling.LANCZOS),
+                      dtype=np.uint8)
+
+def _load(path):
+    with Image.open(path) as img:
+        info = {"width": img.width, "height": img.height, "format": img.format}
+        # Le décodeur JPEG réduit directement l'image (la moyenne est conservée)
+        img.draft("L", (THUMB_SIZE * 2, THUMB_SIZE * 2))
+        gray = img.convert("L")
+        info["brightness"] = float(np.asarray(gray).mean())
+        return thumbnail(gray), info
+
+def load_thumbnails(paths, workers=8):
+    """Vignettes de plusieurs fichiers : (tableau (N, 32, 32), infos)
+
+    infos[i] contient taille d'origine, format et luminosité moyenne,
+    ou None si l'image est illisible (sa vignette reste à zéro).
+    """
+    stack = np.zeros((len(paths), THUMB_SIZE, THUMB_SIZE), dtype=np.uint8)
+    infos = [None] * len(paths)
+
+    def load(i):
+        try:
+            stack[i], infos[i] = _load(paths[i])
+        except Exception:
+            pass
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(load, range(len(paths))))
+    return stack, infos
+
+# =====================================================================
+# HASH
+# =====================================================================
+
+_BIT_WEIGHTS = np.uint64(1) << np.arange(63, -1, -1, dtype=np.uint64)
+
+def _pack(bits):
+    """(N, 8, 8) booléens → (N,) uint64, premier pixel = bit de poids fort"""
+    return (bits.reshape(len(bits), -1).astype(np.uint64) * _BIT_WEIGHTS).sum(axis=1, dtype=np.uint64)
+
+def _block_means(stack, rows, cols):
+    """Moyennes par blocs (réduction de la vignette à rows x cols)"""
+    x = stack.astype(np.float32)
+    row_edges = np.linspace(0, THUMB_SIZE, rows + 1).astype(int)
+    col_edges = np.linspace(0, THUMB_SIZE, cols + 1).astype(int)
+    x = np.add.reduceat(x, row_edges[:-1], axis=1) / np.diff(row_edges)[None, :, None]
+    return np.add.reduceat(x, col_edges[:-1], axis=2) / np.diff(col_edges)[None, None, :]
+
+def ahash(stack):
+    small = _block_means(stack, HASH_SIZE, HASH_SIZE)
+    return _pack(small > small.mean(axis=(1, 2), keepdims=True))
+
+def dhash(stack):
+    small = _block_means(stack, HASH_SIZE, HASH_SIZE + 1)
+    return _pack(small[:, :, 1:] > small[:, :, :-1])
+
+def _dct_matrix(n):
+    k = np.arange(n)[:, None]
+    matrix = np.cos(np.pi * (2 * np.arange(n)[None, :] + 1) * k / (2 * n)) * np.sqrt(2 / n)
+    matrix[0] /= np.sqrt(2)
+    return matrix.astype(np.float32)
+
+_DCT = _dct_matrix(THUMB_SIZE)[:HASH_SIZE]
+
+def phash(stack):
+    # DCT 2D de tout le lot en deux produits matriciels, 8x8 basses fréquences gardées
+    coeffs = _DCT @ stack.astype(np.float32) @ _DCT.T
+    flat = coeffs.reshape(len(coeffs), -1)
+    median = np.median(flat[:, 1:], axis=1)     # Sans la composante continue
+    return _pack(coeffs > median[:, None, None])
+
+_HASHERS = {"ahash": ahash, "dhash": dhash, "phash": phash}
+
+def compute_hashes(stack, kinds=HASH_KINDS):
+    """{type: tableau (N,) uint64} pour un lot de vignettes"""
+    stack = np.asarray(stack, dtype=np.uint8).reshape(-1, THUMB_SIZE, THUMB_SIZE)
+    return {kind: _HASHERS[kind](stack) for kind in kinds}
+
+def to_hex(values):
+    return [f"{int(v):016x}" for v in values]
+
+def duplicate_keys(stack):
+    """Clés de doublon (aHash + pHash, 32 caractères hexadécimaux) d'un lot de vignettes"""
+    hashes = compute_hashes(stack, ("ahash", "phash"))
+    return [a + p for a, p in zip(to_hex(hashes["ahash"]), to_hex(hashes["phash"]))]
+
+def image_key(img):
+    """Clé de doublon d'une image PIL déjà ouverte"""
+    return duplicate_keys(thumbnail(img)[None])[0]
+
+def hamming(a, b):
+    """Distance de Hamming entre hash uint64 (broadcast NumPy)"""
+    xor = np.bitwise_xor(np.asarray(a, dtype=np.uint64), np.asarray(b, dtype=np.uint64))
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(xor).astype(np.int64)
+    as_bytes = xor[..., None].view(np.uint8)
+    return np.unpackbits(as_bytes, axis=-1).sum(axis=-1).astype(np.int64)
@@ -0,0 +1,284 @@
+"""
+Stockage des images adressé par contenu, partagé par toutes les classes
+
+    python image_store.py sync          # importe les images existantes (une fois)
+    python image_store.py report        # conflits de classes en une passe globale
+    python image_store.py gc            # supprime les blobs qui ne sont plus utilisés
+
+Chaque image n'est stockée qu'une fois, sous dataset/_store/objects/<sha256>,
+et les dossiers de classes (dataset/<classe>/<index>.jpg) n'en sont que des
+vues : des liens physiques vers le blob (copie si le système de fichiers ne
+les permet pas). L'entraînement et le nettoyage lisent donc toujours les mêmes
+chemins. L'index garde par blob sa clé de doublon (aHash + pHash) et ses
+infos (taille, format, luminosité) : une image présente dans deux classes
+n'est hachée qu'une fois, et une même image rangée sous deux classes
+différentes (conflit d'étiquette) est détectée sur tout le dataset.
+
+Les images ne sont jamais modifiées en place (le scraper écrit de nouveaux
+fichiers, le nettoyage les déplace) : un lien physique partagé est sûr.
+"""
+
+import os
+import json
+import shutil
+import hashlib
+import argparse
+import threading
+from collections import defaultdict
+
+from dataset_catalog import get_catalog
+from image_hashing import load_thumbnails, duplicate_keys
+
+STORE_DIR = "_store"
+INDEX_FILE = "index.json"
+
+def _link(source, destination):
+    """Remplace destination par un lien physique vers source (copie en repli)"""
+    tmp_path = destination + ".tmp"
+    if os.path.lexists(tmp_path):
+        os.remove(tmp_path)
+    try:
+        os.link(source, tmp_path)
+    except OSError:
+        shutil.copyfile(source, tmp_path)
+    os.replace(tmp_path, destination)
+
+class ImageStore:
+    """Blobs {sha256: clé de doublon, infos} et vues {"classe/nom": [sha256, taille, mtime_ns]}"""
+
+    def __init__(self, dataset_dir="dataset"):
+        self.dataset_dir = dataset_dir
+        self.root = os.path.join(dataset_dir, STORE_DIR)
+        self._lock = threading.RLock()
+        self._by_key = None          # clé de doublon -> {classes}, construit à la demande
+        try:
+            with open(os.path.join(self.root, INDEX_FILE)) as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            index = {}
+        self.blobs = index.get("blobs", {})
+        self.views = index.get("views", {})
+
+    def blob_path(self, digest):
+        return os.path.join(self.root, "objects", digest[:2], digest)
+
+    def save(self):
+        with self._lock:
+            os.makedirs(self.root, exist_ok=True)
+            path = os.path.join(self.root, INDEX_FILE)
+            with open(path + ".tmp", "w") as f:
+                json.dump({"blobs": self.blobs, "views": self.views}, f)
+            os.replace(path + ".tmp", path)
+
+    # -----------------------------------------------------------------
+    # Écriture
+    # -----------------------------------------------------------------
+
+    def _set_view(self, folder, name, digest):
+        st = os.stat(os.path.join(self.dataset_dir, folder, name))
+        self.views[f"{folder}/{name}"] = [digest, st.st_size, st.st_mtime_ns]
+        key = self.blobs[digest].get("key")
+        if self._by_key is not None and key:
+            self._by_key[key].add(folder)
+
+    def put(self, folder, name, data, key=None, info=None):
+        """Écrit une image dans le store et sa vue dataset/<folder>/<name> ; retourne son sha256"""
+        digest = hashlib.sha256(data).hexdigest()
+        blob = self.blob_path(digest)
+        with self._lock:
+            if not os.path.exists(blob):
+                os.makedirs(os.path.dirname(blob), exist_ok=True)
+                with open(blob + ".tmp", "wb") as f:
+                    f.write(data)
+                os.replace(blob + ".tmp", blob)
+            os.makedirs(os.path.join(self.dataset_dir, folder), exist_ok=True)
+            _link(blob, os.path.join(self.dataset_dir, folder, name))
+            meta = self.blobs.setdefault(digest, {})
+            if key:
+                meta["key"], meta["info"] = key, info
+            self._set_view(folder, name, digest)
+        return digest
+
+    def sync(self, folders=None):
+        """Rattache au store les fichiers ajoutés, remplacés ou supprimés hors du store
+
+        Un fichier identique à un blob existant devient un lien vers lui (place
+        partagée) ; les nouveaux blobs sont hachés en un seul lot.
+        """
+        catalog = get_catalog(self.dataset_dir)
+        stats = {"adopted": 0, "shared": 0, "removed": 0, "hashed": 0}
+        with self._lock:
+            for folder in (catalog.folders() if folders is None else folders):
+                names = set(catalog.files(folder))
+                prefix = folder + "/"
+                for view in [v for v in self.views if v.startswith(prefix)]:
+                    if view[len(prefix):] not in names:
+                        del self.views[view]
+                        stats["removed"] += 1
+                for name in sorted(names):
+                    path = os.path.join(self.dataset_dir, folder, name)
+                    st = os.stat(path)
+                    entry = self.views.get(prefix + name)
+                    if entry and entry[1:] == [st.st_size, st.st_mtime_ns]:
+                        continue
+                    with open(path, "rb") as f:
+                        digest = hashlib.sha256(f.read()).hexdigest()
+                    blob = self.blob_path(digest)
+                    if not os.path.exists(blob):
+                        os.makedirs(os.path.dirname(blob), exist_ok=True)
+                        _link(path, blob)
+                        stats["adopted"] += 1
+                    elif not os.path.samefile(blob, path):
+                        _link(blob, path)
+                        stats["shared"] += 1
+                    self.blobs.setdefault(digest, {})
+                    self._set_view(folder, name, digest)
+
+            stats["hashed"] = self._hash_missing()
+            if any(stats.values()):
+                self._by_key = None
+        return stats
+
+    def _hash_missing(self):
+        """Clés de doublon et infos des blobs qui n'en ont pas encore"""
+        missing = [d for d, meta in self.blobs.items() if "key" not in meta]
+        if not missing:
+            return 0
+        stack, infos = load_thumbnails([self.blob_path(d) for d in missing])
+        for digest, info, key in zip(missing, infos, duplicate_keys(stack)):
+            self.blobs[digest]["key"] = key if info is not None else None
+            self.blobs[digest]["info"] = info
+        return len(missing)
+
+    def discard(self, folder, name):
+        """Retire la vue d'une image déplacée ou supprimée (le blob reste jusqu'au gc)"""
+        with self._lock:
+            if self.views.pop(f"{folder}/{name}", None) is not None:
+                self._by_key = None
+
+    def gc(self):
+        """Supprime les blobs qu'aucune vue n'utilise ; retourne le nombre supprimé"""
+        with self._lock:
+            used = {entry[0] for entry in self.views.values()}
+            unused = [d for d in self.blobs if d not in used]
+            for digest in unused:
+                if os.path.exists(self.blob_path(digest)):
+                    os.remove(self.blob_path(digest))
+                del self.blobs[digest]
+        return len(unused)
+
+    # -----------------------------------------------------------------
+    # Requêtes
+    # -----------------------------------------------------------------
+
+    def describe(self, folder):
+        """{nom: (clé de doublon, infos)} des images lisibles d'une classe"""
+        prefix = folder + "/"
+        with self._lock:
+            return {view[len(prefix):]: (self.blobs[entry[0]]["key"], self.blobs[entry[0]]["info"])
+                    for view, entry in self.views.items()
+                    if view.startswith(prefix) and self.blobs[entry[0]].get("key")}
+
+    def keys(self, folder):
+        """Clés de doublon d'une classe (sans relire les images)"""
+        return {key for key, _ in self.describe(folder).values()}
+
+    def classes_of(self, key):
+        """Classes qui contiennent déjà une image de cette clé de doublon"""
+        with self._lock:
+            if self._by_key is None:
+                self._by_key = defaultdict(set)
+                for view, entry in self.views.items():
+                    blob_key = self.blobs[entry[0]].get("key")
+                    if blob_key:
+                        self._by_key[blob_key].add(view.split("/")[0])
+            return set(self._by_key.get(key, ()))
+
+    def collisions(self):
+        """Images présentes dans plusieurs classes : identiques (sha256) ou quasi identiques (clé)"""
+        by_digest, by_key = defaultdict(list), defaultdict(list)
+        with self._lock:
+            for view, entry in sorted(self.views.items()):
+                by_digest[entry[0]].append(view)
+                if self.blobs[entry[0]].get("key"):
+                    by_key[self.blobs[entry[0]]["key"]].append(view)
+
+        found = []
+        exact = set()
+        for kind, groups in (("identique", by_digest), ("perceptuel", by_key)):
+            for value, views in groups.items():
+                classes = sorted({view.split("/")[0] for view in views})
+                if len(classes) < 2 or (kind == "perceptuel" and tuple(views) in exact):
+                    continue
+                exact.add(tuple(views))
+                found.append({"kind": kind, "hash": value, "classes": classes, "files": views})
+        return found
+
+    def stats(self):
+        """Nombre de blobs et de vues, octets stockés et octets économisés"""
+        with self._lock:
+            stored = {entry[0]: entry[1] for entry in self.views.values()}
+            viewed = sum(entry[1] for entry in self.views.values())
+            return {"blobs": len(self.blobs), "views": len(self.views),
+                    "bytes": sum(stored.values()), "saved": viewed - sum(stored.values())}
+
+# Un store par dataset et par exécution
+_STORES = {}
+
+def get_store(dataset_dir="dataset"):
+    """Store partagé (mis en cache) pour un dossier de dataset"""
+    key = os.path.abspath(dataset_dir)
+    if key not in _STORES:
+        _STORES[key] = ImageStore(dataset_dir)
+    return _STORES[key]
+
+def find_store(dataset_dir="dataset"):
+    """Store du dataset s'il a déjà été créé, None sinon"""
+    if not os.path.isdir(os.path.join(dataset_dir, STORE_DIR)):
+        return None
+    return get_store(dataset_dir)
+
+def store_for(folder_path):
+    """(store, nom de dossier) à partir d'un chemin dataset/<classe>"""
+    dataset_dir, folder = os.path.split(os.path.normpath(folder_path))
+    return get_store(dataset_dir or "."), folder
+
+def print_collisions(store):
+    """Rapport des conflits de classes sur tout le dataset"""
+    found = store.collisions()
+    print("\n🔀 CONFLITS ENTRE CLASSES")
+    print("-" * 70)
+    for collision in found:
+        print(f"⚠️  {collision['kind']:10} {' / '.join(collision['classes'])}")
+        for view in collision["files"]:
+            print(f"      {view}")
+    if not found:
+        print("✅ Aucune image partagée entre deux classes")
+    print("-" * 70)
+    return found
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stockage des images adressé par contenu")
+    parser.add_argument("command", choices=("sync", "report", "gc"))
+    parser.add_argument("--dataset", default="dataset", help="Dossier du dataset")
+    parser.add_argument("--output", help="Rapport des conflits en JSON")
+    args = parser.parse_args()
+
+    store = get_store(args.dataset)
+    if args.command == "gc":
+        print(f"🗑️  {store.gc()} blobs inutilisés supprimés")
+    else:
+        stats = store.sync()
+        print(f"📦 {stats['adopted']} images importées | {stats['shared']} fichiers dédupliqués | "
+              f"{stats['removed']} vues retirées | {stats['hashed']} blobs hachés")
+    store.save()
+
+    summary = store.stats()
+    print(f"💾 {summary['blobs']} blobs pour {summary['views']} images | "
+          f"{summary['bytes'] / 1e6:.1f} Mo stockés | {summary['saved'] / 1e6:.1f} Mo économisés")
+
+    if args.command == "report":
+        found = print_collisions(store)
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump(found, f, indent=2)
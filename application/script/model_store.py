@@ -0,0 +1,212 @@
+"""
+Magasin versionné des exports TensorFlow.js
+
+    python model_store.py --list
+    python model_store.py --diff <ancienne_version> <nouvelle_version>
+
+Chaque version est identifiée par le hash de son model.json. Les poids sont
+regroupés par partie du modèle (backbone / tête) dans des shards nommés par le
+hash de leur contenu : un ré-entraînement qui ne touche que la tête ne produit
+qu'un nouveau shard, les clients gardent les autres en cache.
+
+    model_store/
+        shards/<hash>.bin
+        versions/<version>/model.json, manifest.json, <hash>.bin (liens)
+        latest.json
+"""
+
+import os
+import json
+import shutil
+import hashlib
+import argparse
+from datetime import datetime
+
+from tfjs_validator import weight_key, weight_nbytes
+
+STORE_DIR = "model_store"
+SHARD_BYTES = 4 * 1024 * 1024  # Taille de shard par défaut du convertisseur TF.js
+LATEST_FILE = "latest.json"
+GROUPS = ("base", "head")
+
+# =====================================================================
+# SHARDS
+# =====================================================================
+
+def _digest(data):
+    return hashlib.sha256(data).hexdigest()
+
+def _write_atomic(path, data):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+def read_weight_bytes(tfjs_dir):
+    """model.json + octets bruts de chaque poids (quantification conservée)"""
+    with open(os.path.join(tfjs_dir, "model.json")) as f:
+        model_json = json.load(f)
+
+    weights = []
+    for group in model_json["weightsManifest"]:
+        buffer = b""
+        for path in group["paths"]:
+            with open(os.path.join(tfjs_dir, path), "rb") as f:
+                buffer += f.read()
+        offset = 0
+        for spec in group["weights"]:
+            size = weight_nbytes(spec)
+            weights.append((spec, buffer[offset:offset + size]))
+            offset += size
+    return model_json, weights
+
+def backbone_keys(model):
+    """Clés des poids du backbone (couche 1 du modèle Sequential) et nom du backbone"""
+    base = model.layers[1]
+    return {weight_key(getattr(w, "path", w.name)) for w in base.weights}, base.name
+
+def split_groups(weights, base_keys, base_name):
+    """Répartit les poids entre backbone et tête, dans un ordre stable (tri par nom)"""
+    groups = {name: [] for name in GROUPS}
+    for spec, data in sorted(weights, key=lambda w: w[0]["name"]):
+        is_base = weight_key(spec["name"]) in base_keys or f"/{base_name}/" in spec["name"]
+        groups["base" if is_base else "head"].append((spec, data))
+    return groups
+
+def write_shards(store_dir, data):
+    """Découpe un groupe en shards nommés par leur hash ; les shards existants sont réutilisés"""
+    shards_dir = os.path.join(store_dir, "shards")
+    os.makedirs(shards_dir, exist_ok=True)
+    paths = []
+    for start in range(0, len(data), SHARD_BYTES):
+        chunk = data[start:start + SHARD_BYTES]
+        name = f"{_digest(chunk)[:16]}.bin"
+        path = os.path.join(shards_dir, name)
+        if not os.path.exists(path):
+            _write_atomic(path, chunk)
+        paths.append(name)
+    return paths
+
+def _link(src, dst):
+    """Lien physique (copie si le système de fichiers ne le permet pas)"""
+    if os.path.exists(dst):
+        return
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+# =====================================================================
+# VERSIONS
+# =====================================================================
+
+def load_manifest(version=None, store_dir=STORE_DIR):
+    """Manifeste d'une version (la dernière publiée par défaut), None si absente"""
+    if version is None:
+        try:
+            with open(os.path.join(store_dir, LATEST_FILE)) as f:
+                version = json.load(f)["version"]
+        except (OSError, ValueError, KeyError):
+            return None
+    try:
+        with open(os.path.join(store_dir, "versions", version, "manifest.json")) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def shard_sizes(manifest):
+    return {path: size for group in manifest["groups"].values()
+            for path, size in zip(group["paths"], group["shard_bytes"])}
+
+def publish(tfjs_dir, base_keys, base_name, metadata, store_dir=STORE_DIR):
+    """Publie un export TF.js comme nouvelle version ; retourne son manifeste"""
+    model_json, weights = read_weight_bytes(tfjs_dir)
+    groups = split_groups(weights, base_keys, base_name)
+
+    weights_manifest, group_info = [], {}
+    for name in GROUPS:
+        if not groups[name]:
+            continue
+        data = b"".join(d for _, d in groups[name])
+        paths = write_shards(store_dir, data)
+        weights_manifest.append({"paths": paths, "weights": [s for s, _ in groups[name]]})
+        sizes = [os.path.getsize(os.path.join(store_dir, "shards", p)) for p in paths]
+        group_info[name] = {"paths": paths, "shard_bytes": sizes, "bytes": sum(sizes)}
+
+    model_json = {**model_json, "weightsManifest": weights_manifest}
+    model_json_bytes = json.dumps(model_json, sort_keys=True).encode()
+    version = _digest(model_json_bytes)[:12]
+    version_dir = os.path.join(store_dir, "versions", version)
+
+    previous = load_manifest(store_dir=store_dir)
+    if previous and previous["version"] == version:
+        print(f"⏭️  Version {version} inchangée (déjà publiée)")
+        return previous
+
+    existing = load_manifest(version, store_dir)
+    if existing is None:
+        os.makedirs(version_dir, exist_ok=True)
+        for info in group_info.values():
+            for path in info["paths"]:
+                _link(os.path.join(store_dir, "shards", path), os.path.join(version_dir, path))
+        _write_atomic(os.path.join(version_dir, "model.json"), model_json_bytes)
+
+        cached = set(shard_sizes(previous)) if previous else set()
+        new_shards = {p: s for info in group_info.values()
+                      for p, s in zip(info["paths"], info["shard_bytes"]) if p not in cached}
+        existing = {
+            "version": version,
+            "created": datetime.now().isoformat(),
+            "previous": previous["version"] if previous else None,
+            **metadata,
+            "size_bytes": len(model_json_bytes) + sum(i["bytes"] for i in group_info.values()),
+            "groups": group_info,
+            "download_bytes": len(model_json_bytes) + sum(new_shards.values()),
+            "changed_shards": sorted(new_shards),
+        }
+        _write_atomic(os.path.join(version_dir, "manifest.json"),
+                      json.dumps(existing, indent=2).encode())
+
+    _write_atomic(os.path.join(store_dir, LATEST_FILE),
+                  json.dumps({"version": version}).encode())
+    print(f"📦 Version {version} publiée: {existing['size_bytes'] / 1024 ** 2:.2f} Mo, "
+          f"{len(existing['changed_shards'])} shard(s) à télécharger "
+          f"({existing['download_bytes'] / 1024 ** 2:.2f} Mo)")
+    return existing
+
+def diff_versions(old, new, store_dir=STORE_DIR):
+    """Shards à télécharger pour passer d'une version à une autre"""
+    old_shards = shard_sizes(load_manifest(old, store_dir))
+    new_shards = shard_sizes(load_manifest(new, store_dir))
+    return {p: s for p, s in new_shards.items() if p not in old_shards}
+
+def list_versions(store_dir=STORE_DIR):
+    versions_dir = os.path.join(store_dir, "versions")
+    if not os.path.isdir(versions_dir):
+        return []
+    manifests = [load_manifest(v, store_dir) for v in os.listdir(versions_dir)]
+    return sorted((m for m in manifests if m), key=lambda m: m["created"])
+
+def main():
+    parser = argparse.ArgumentParser(description="Magasin versionné des modèles TF.js")
+    parser.add_argument("--store", default=STORE_DIR)
+    parser.add_argument("--list", action="store_true", help="Liste les versions publiées")
+    parser.add_argument("--diff", nargs=2, metavar=("ANCIENNE", "NOUVELLE"))
+    args = parser.parse_args()
+
+    if args.diff:
+        changed = diff_versions(*args.diff, store_dir=args.store)
+        print(f"{len(changed)} shard(s) à télécharger ({sum(changed.values()) / 1024 ** 2:.2f} Mo)")
+        for path, size in sorted(changed.items()):
+            print(f"   {path} ({size / 1024:.0f} Ko)")
+        return
+
+    latest = load_manifest(store_dir=args.store)
+    for m in list_versions(args.store):
+        accuracy = f"{m['accuracy'] * 100:.1f}%" if m.get("accuracy") is not None else "-"
+        marker = "⭐" if latest and m["version"] == latest["version"] else "  "
+        print(f"{marker} {m['version']}  {m['created'][:19]}  acc {accuracy:>6}  "
+              f"{m['size_bytes'] / 1024 ** 2:6.2f} Mo  (delta {m['download_bytes'] / 1024 ** 2:.2f} Mo)")
+
+if __name__ == "__main__":
+    main()
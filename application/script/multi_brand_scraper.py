@@ -1,16 +1,29 @@
-import os, re, time, requests, random
+import os, re, json, time, requests, random, argparse
+from urllib.parse import quote, urlencode
 from io import BytesIO
+import numpy as np
 from PIL import Image
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from requests.adapters import HTTPAdapter
+from functools import partial
+from dataset_catalog import get_catalog, catalog_for
+from class_registry import scraper_models, incomplete_classes
+from dataset_report import print_dataset_status
+from image_hashing import image_key
+from download_controller import DownloadController, CANCELLED
+from image_store import store_for
+
+PINTEREST_URL = "https://www.pinterest.fr"
+PINIMG_HOST = r"https://i\.pinimg\.com"
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+COLLECTORS = ("browser", "http")
 
 def setup_driver():
     """Configure un driver Selenium avec options anti-détection"""
+    # Import ici : le mode HTTP n'a besoin ni de Chrome ni de Selenium
+    from selenium import webdriver
+    from selenium.webdriver.chrome.service import Service
+    from webdriver_manager.chrome import ChromeDriverManager
+    
     options = webdriver.ChromeOptions()
     options.add_argument("--headless=new")
     options.add_argument("--disable-blink-features=AutomationControlled")
@@ -33,76 +46,133 @@ def setup_driver():
     
     return driver
 
-def scroll_and_collect_images(query, scroll_count=40, wait_time=2):
-    """Collecte les URLs d'images avec attente du chargement dynamique"""
-    driver = setup_driver()
-    image_urls = set()
+# Tailles servies par pinimg, de la meilleure à la moins bonne (repli si absente)
+FULL_SIZES = ("originals", "736x", "564x")
+PIN_IMAGE_URL = re.compile(r'(?P<prefix>https?://[^/]+/)(?P<size>[^/]+)/'
+                           r'(?P<path>(?:[0-9a-f]{2}/){3}(?P<id>[0-9a-f]{32})\.(?:jpg|jpeg|png|webp))$')
+
+def canonical_image_url(url):
+    """(identifiant de l'image, URL pleine taille) ; miniatures 236x/474x... réécrites"""
+    match = PIN_IMAGE_URL.match(url)
+    if not match:
+        return url, url
+    return match["id"], match["prefix"] + FULL_SIZES[0] + "/" + match["path"]
+
+def image_url_variants(url):
+    """URL demandée puis tailles de repli (une image 'originals' manque parfois)"""
+    match = PIN_IMAGE_URL.match(url)
+    if not match:
+        return [url]
+    return [url] + [match["prefix"] + size + "/" + match["path"]
+                    for size in FULL_SIZES if size != match["size"]]
+
+def extract_image_urls(text, host=PINIMG_HOST):
+    """URLs d'images pleine taille trouvées dans du HTML ou du JSON (une par image)"""
+    # Toutes les URLs pinimg : src, srcset et champs JSON, quelle que soit la taille
+    all_urls = re.findall(host + r'/[^"\'>\s,]+\.(?:jpg|jpeg|png|webp)', text)
+    
+    # Miniatures réécrites en pleine taille, dédupliquées par identifiant d'image
+    # (une même image apparaît en 236x, 474x, 736x et originals)
+    by_id = {}
+    for url in all_urls:
+        image_id, full_url = canonical_image_url(url.split('?')[0])
+        by_id.setdefault(image_id, full_url)
+    return set(by_id.values())
+
+# Arrêt adaptatif de la collecte d'une requête
+MIN_NEW_URLS = 3          # Nouvelles URLs par scroll en dessous desquelles la requête s'épuise
+LOW_YIELD_SCROLLS = 3     # Scrolls consécutifs sous ce seuil avant d'arrêter
+IDLE_QUIET = 0.6          # Page chargée : rien n'a changé depuis 0.6 s
+IDLE_TIMEOUT = 8.0        # Attente maximale après un scroll
+IDLE_SCRIPT = ("return [document.body.scrollHeight, document.images.length, "
+               "performance.getEntriesByType('resource').length];")
+
+class CollectionProgress:
+    """Rendement d'une requête : nouvelles URLs par scroll, quota, URLs/s
+
+    seen  : URLs déjà collectées par les requêtes précédentes (pas comptées comme nouvelles)
+    quota : nombre de nouvelles URLs au-delà duquel la requête s'arrête
+    """
+    
+    def __init__(self, seen=None, quota=None):
+        self.seen = seen if seen is not None else set()
+        self.quota = quota
+        self.urls, self.new = set(), set()
+        self.steps = 0
+        self.low_yield = 0
+        self.reason = None
+        self.start = time.perf_counter()
+    
+    def add(self, urls):
+        """Ajoute les URLs d'un scroll ; retourne le nombre de nouvelles"""
+        new = set(urls) - self.urls - self.seen
+        self.urls.update(urls)
+        self.new |= new
+        self.steps += 1
+        self.low_yield = self.low_yield + 1 if len(new) < MIN_NEW_URLS else 0
+        return len(new)
+    
+    def should_stop(self):
+        if self.quota is not None and len(self.new) >= self.quota:
+            self.reason = "quota atteint"
+        elif self.low_yield >= LOW_YIELD_SCROLLS:
+            self.reason = f"moins de {MIN_NEW_URLS} nouvelles URLs sur {LOW_YIELD_SCROLLS} scrolls"
+        return self.reason is not None
+    
+    def report(self):
+        seconds = time.perf_counter() - self.start
+        print(f"   ⏱️  {len(self.new)} nouvelles URLs en {seconds:.1f}s "
+              f"({len(self.new) / max(seconds, 1e-6):.1f} URLs/s, {self.steps} scrolls) "
+              f"— arrêt : {self.reason or 'fin des résultats'}")
+
+def wait_for_idle(driver, timeout=IDLE_TIMEOUT, quiet=IDLE_QUIET, poll=0.2):
+    """Attend que la page ne bouge plus (hauteur, images, requêtes réseau) pendant 'quiet' s
+
+    Remplace les pauses fixes : on repart dès que le chargement est fini,
+    et on attend plus longtemps quand le réseau est lent.
+    """
+    deadline = time.monotonic() + timeout
+    state, since = driver.execute_script(IDLE_SCRIPT), time.monotonic()
+    while time.monotonic() < deadline:
+        time.sleep(poll)
+        current = driver.execute_script(IDLE_SCRIPT)
+        if current != state:
+            state, since = current, time.monotonic()
+        elif time.monotonic() - since >= quiet:
+            break
+    return state
+
+def scroll_and_collect_images(query, scroll_count=40, driver=None, seen=None, quota=None):
+    """Collecte les URLs d'images en scrollant jusqu'à épuisement du rendement
+
+    Après chaque scroll (jusqu'en bas de page), attente que la page soit
+    inactive, extraction, puis arrêt si le quota de nouvelles URLs est atteint
+    ou si les derniers scrolls n'apportent presque plus rien.
+    driver : navigateur à utiliser (enregistré ou rejoué, cf. session_archive),
+             Chrome headless par défaut ; un navigateur rejoué n'attend jamais
+    """
+    driver = driver or setup_driver()
+    timeout = 0 if getattr(driver, "replay", False) else IDLE_TIMEOUT
+    progress = CollectionProgress(seen, quota)
     
     try:
-        url = f"https://www.pinterest.fr/search/pins/?q={query.replace(' ', '%20')}"
+        url = f"{PINTEREST_URL}/search/pins/?q={quote(query)}"
         print(f"🌐 Ouverture : {url}")
         driver.get(url)
-        
-        # Attendre le chargement initial
-        time.sleep(3)
-        
-        last_height = driver.execute_script("return document.body.scrollHeight")
-        no_change_count = 0
+        wait_for_idle(driver, timeout)
+        progress.add(extract_image_urls(driver.page_source))
         
         for i in range(scroll_count):
-            # Scroll progressif (plus naturel)
-            driver.execute_script(f"window.scrollTo(0, {last_height * (i+1) / scroll_count});")
-            time.sleep(wait_time)
-            
-            # Attendre que de nouveaux éléments se chargent
-            try:
-                WebDriverWait(driver, 5).until(
-                    lambda d: d.execute_script("return document.body.scrollHeight") > last_height
-                )
-            except:
-                no_change_count += 1
-                if no_change_count > 3:
-                    print("⚠️ Plus de nouvelles images détectées")
-                    break
-            
-            new_height = driver.execute_script("return document.body.scrollHeight")
-            if new_height == last_height:
-                no_change_count += 1
-            else:
-                no_change_count = 0
-                last_height = new_height
-            
-            # Extraire les images avec plusieurs patterns
-            html = driver.page_source
-            
-            # Pattern 1: URLs directes pinimg
-            urls_pinimg = re.findall(r'https://i\.pinimg\.com/[^"\'>\s]+\.(?:jpg|jpeg|png)', html)
-            
-            # Pattern 2: URLs dans srcset
-            urls_srcset = re.findall(r'https://i\.pinimg\.com/[^"\'>\s,]+(?:jpg|jpeg|png)', html)
-            
-            # Pattern 3: URLs origsize (meilleure qualité)
-            urls_origsize = re.findall(r'https://i\.pinimg\.com/originals/[^"\'>\s]+\.(?:jpg|jpeg|png)', html)
-            
-            all_urls = set(urls_pinimg + urls_srcset + urls_origsize)
-            
-            # Filtrer les miniatures (contiennent 236x ou 474x)
-            filtered_urls = {url for url in all_urls if '236x' not in url and '474x' not in url}
-            
-            # Éviter les doublons d'URL (parfois Pinterest duplique avec des paramètres)
-            unique_filtered = set()
-            for url in filtered_urls:
-                # Nettoyer l'URL des paramètres de tracking
-                clean_url = url.split('?')[0]
-                unique_filtered.add(clean_url)
+            if progress.should_stop():
+                break
+            driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+            wait_for_idle(driver, timeout)
             
-            image_urls.update(unique_filtered)
+            # Extraire les images du HTML rendu
+            new_count = progress.add(extract_image_urls(driver.page_source))
             
             if i % 5 == 0:
-                print(f"  Scroll {i+1}/{scroll_count} → {len(image_urls)} URLs uniques")
-            
-            # Pause aléatoire pour simuler comportement humain
-            time.sleep(random.uniform(0.5, 1.5))
+                print(f"  Scroll {i+1}/{scroll_count} → +{new_count} | {len(progress.urls)} URLs uniques")
     
     except Exception as e:
         print(f"❌ Erreur lors du scroll : {e}")
@@ -110,7 +180,72 @@ def scroll_and_collect_images(query, scroll_count=40, wait_time=2):
     finally:
         driver.quit()
     
-    return list(image_urls)
+    progress.report()
+    return list(progress.urls)
+
+# =====================================================================
+# COLLECTE SANS NAVIGATEUR (HTTP)
+# =====================================================================
+
+def http_session(pool_size=32, session=None):
+    """Session HTTP avec connexions réutilisées (keep-alive)
+
+    session : session à configurer (enregistrée ou rejouée), nouvelle par défaut
+    """
+    session = session or requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=2)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update({'User-Agent': USER_AGENT, 'Accept-Language': 'fr-FR,fr;q=0.9'})
+    return session
+
+def search_resource_url(query, bookmark=None, base_url=PINTEREST_URL):
+    """URL de la ressource JSON de recherche (celle qu'appelle la page au scroll)"""
+    options = {"query": query, "scope": "pins", "page_size": 25,
+               "bookmarks": [bookmark] if bookmark else []}
+    params = urlencode({"source_url": f"/search/pins/?q={quote(query)}",
+                        "data": json.dumps({"options": options, "context": {}}, separators=(",", ":"))})
+    return f"{base_url}/resource/BaseSearchResource/get/?{params}"
+
+def collect_images_http(query, max_pages=40, session=None, base_url=PINTEREST_URL, host=PINIMG_HOST,
+                        seen=None, quota=None):
+    """Collecte les URLs d'images sans navigateur : page de recherche puis pages JSON
+
+    Chaque page JSON correspond à un scroll ; le 'bookmark' de la réponse
+    donne la page suivante. Même arrêt adaptatif que le navigateur
+    (quota, rendement), ou fin des résultats.
+    """
+    session = session or http_session()
+    progress = CollectionProgress(seen, quota)
+    
+    try:
+        url = f"{base_url}/search/pins/?q={quote(query)}"
+        print(f"🌐 Requête HTTP : {url}")
+        response = session.get(url, timeout=10)
+        response.raise_for_status()
+        progress.add(extract_image_urls(response.text, host))
+        
+        bookmark = None
+        for page in range(max_pages):
+            if progress.should_stop():
+                break
+            response = session.get(search_resource_url(query, bookmark, base_url), timeout=10,
+                                   headers={"Accept": "application/json",
+                                            "X-Requested-With": "XMLHttpRequest"})
+            response.raise_for_status()
+            new_count = progress.add(extract_image_urls(response.text, host))
+            
+            bookmark = response.json().get("resource_response", {}).get("bookmark")
+            if page % 5 == 0:
+                print(f"  Page {page+1}/{max_pages} → +{new_count} | {len(progress.urls)} URLs uniques")
+            if not bookmark or bookmark == "-end-":
+                break
+    
+    except (requests.RequestException, ValueError) as e:
+        print(f"❌ Erreur lors de la collecte HTTP : {e}")
+    
+    progress.report()
+    return list(progress.urls)
 
 def is_valid_sneaker_image(img):
     """Vérifie la qualité et pertinence de l'image"""
@@ -125,7 +260,6 @@ def is_valid_sneaker_image(img):
             return False, f"Ratio incorrect: {ratio:.2f}"
         
         # Vérifier que l'image n'est pas trop sombre/claire (souvent = erreur)
-        import numpy as np
         img_array = np.array(img.convert('L'))
         mean_brightness = img_array.mean()
         
@@ -138,84 +272,76 @@ def is_valid_sneaker_image(img):
         return False, f"Erreur: {e}"
 
 def load_existing_hashes(model_dir):
-    """Charge les hash de toutes les images existantes dans le dossier"""
+    """Charge les hash de toutes les images existantes dans le dossier
+
+    Les clés viennent de l'index du store : seules les images ajoutées hors du
+    scraper (copie manuelle, restauration d'un backup) sont relues.
+    """
     existing_hashes = set()
+    catalog, folder = catalog_for(model_dir)
     
-    if not os.path.exists(model_dir):
+    if not catalog.exists(folder):
         return existing_hashes
     
     print(f"   📂 Analyse des images existantes dans {model_dir}...")
     
-    image_files = [f for f in os.listdir(model_dir) if f.endswith(('.jpg', '.jpeg', '.png'))]
-    
-    if not image_files:
+    if not catalog.count(folder):
         print(f"   ℹ️  Aucune image existante")
         return existing_hashes
     
-    for img_file in image_files:
-        try:
-            img_path = os.path.join(model_dir, img_file)
-            img = Image.open(img_path).convert("RGB")
-            img_hash = compute_image_hash(img)
-            existing_hashes.add(img_hash)
-        except Exception as e:
-            print(f"   ⚠️  Erreur sur {img_file}: {e}")
+    store, folder = store_for(model_dir)
+    stats = store.sync([folder])
+    if stats["hashed"]:
+        print(f"   🔑 {stats['hashed']} nouvelles images hachées")
+    unreadable = catalog.count(folder) - len(store.describe(folder))
+    if unreadable:
+        print(f"   ⚠️  {unreadable} images illisibles")
+    existing_hashes.update(store.keys(folder))
     
     print(f"   ✅ {len(existing_hashes)} images existantes indexées")
     return existing_hashes
 
 def get_next_available_index(model_dir):
     """Trouve le prochain index disponible pour nommer les images"""
-    if not os.path.exists(model_dir):
-        return 0
-    
-    existing_files = [f for f in os.listdir(model_dir) if f.endswith(('.jpg', '.jpeg', '.png'))]
-    
-    if not existing_files:
-        return 0
-    
-    # Extraire les numéros des fichiers existants
-    indices = []
-    for f in existing_files:
-        try:
-            index = int(os.path.splitext(f)[0])
-            indices.append(index)
-        except ValueError:
-            continue
-    
-    return max(indices) + 1 if indices else 0
+    catalog, folder = catalog_for(model_dir)
+    return catalog.next_index(folder)
 
 def compute_image_hash(img):
-    """Calcule un hash perceptuel pour détecter les doublons"""
-    import hashlib
-    # Redimensionner à 8x8 pour comparaison rapide
-    img_small = img.resize((8, 8), Image.Resampling.LANCZOS).convert('L')
-    
-    # Calculer la moyenne
-    pixels = list(img_small.getdata())
-    avg = sum(pixels) / len(pixels)
-    
-    # Créer un hash basé sur les pixels au-dessus de la moyenne
-    bits = ''.join('1' if p > avg else '0' for p in pixels)
-    
-    # Convertir en hash hex
-    return hashlib.md5(bits.encode()).hexdigest()
+    """Calcule un hash perceptuel pour détecter les doublons (aHash + pHash)"""
+    return image_key(img)
 
-def download_image(img_url, output, index, existing_hashes):
-    """Télécharge et valide une image en évitant les doublons"""
+def download_image(img_url, output, index, existing_hashes, cancel=None, session=None):
+    """Télécharge et valide une image en évitant les doublons
+
+    cancel  : threading.Event ; s'il est levé, le téléchargement est abandonné
+              et rien n'est écrit (quota atteint par les autres téléchargements)
+    session : session HTTP (pool de connexions, enregistrement / rejeu)
+    """
     try:
         # Headers pour éviter le blocage
         headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-            'Referer': 'https://www.pinterest.fr/'
+            'User-Agent': USER_AGENT,
+            'Referer': PINTEREST_URL + '/'
         }
         
-        response = requests.get(img_url, timeout=10, headers=headers)
-        
-        if response.status_code != 200:
+        # Taille demandée, puis tailles de repli si elle n'existe pas pour cette image
+        for candidate in image_url_variants(img_url):
+            with (session or requests).get(candidate, timeout=10, headers=headers, stream=True) as response:
+                if response.status_code in (403, 404):
+                    continue
+                if response.status_code != 200:
+                    return False, f"HTTP {response.status_code}", None
+                
+                buffer = BytesIO()
+                for chunk in response.iter_content(chunk_size=64 * 1024):
+                    if cancel is not None and cancel.is_set():
+                        return False, CANCELLED, None
+                    buffer.write(chunk)
+                break
+        else:
             return False, f"HTTP {response.status_code}", None
         
-        img = Image.open(BytesIO(response.content)).convert("RGB")
+        img = Image.open(buffer).convert("RGB")
         
         # Validation de base
         is_valid, reason = is_valid_sneaker_image(img)
@@ -228,24 +354,51 @@ def download_image(img_url, output, index, existing_hashes):
         if img_hash in existing_hashes:
             return False, "Doublon détecté", None
         
-        # Sauvegarder avec métadonnées
+        # Même image déjà rangée sous une autre classe : conflit d'étiquette
+        # (sauf au rejeu : les images de la session enregistrée sont déjà dans le store)
+        store, folder = store_for(output)
+        other_classes = store.classes_of(img_hash) - {folder}
+        if other_classes and not getattr(session, "replay", False):
+            return False, f"Déjà dans {min(other_classes)}", None
+        
+        if cancel is not None and cancel.is_set():
+            return False, CANCELLED, None
+        
+        # Sauvegarder dans le store (la classe n'en garde qu'un lien)
+        buffer = BytesIO()
+        img.save(buffer, "JPEG", quality=95)
+        info = {"width": img.width, "height": img.height, "format": "JPEG",
+                "brightness": float(np.asarray(img.convert('L')).mean())}
         filepath = os.path.join(output, f"{index}.jpg")
-        img.save(filepath, "JPEG", quality=95)
+        store.put(folder, f"{index}.jpg", buffer.getvalue(), key=img_hash, info=info)
+        
+        # Tenir le catalogue à jour (pas de nouveau listing pour les rapports)
+        catalog, folder = catalog_for(output)
+        catalog.add(folder, f"{index}.jpg")
         
         return True, filepath, img_hash
     
     except Exception as e:
         return False, str(e), None
 
-def scrape_model(model_name, folder_name, search_variations, max_images=500):
-    """Scrape principal avec gestion d'erreurs robuste"""
-    model_dir = f"dataset/{folder_name}"
+def scrape_model(model_name, folder_name, search_variations, max_images=500,
+                 dataset_dir="dataset", known_hashes=None, collector="browser", archive=None):
+    """Scrape principal avec gestion d'erreurs robuste (retourne le nombre d'images ajoutées)
+
+    collector : "browser" (Chrome headless qui scrolle) ou "http" (requêtes directes)
+    archive   : SessionArchive pour enregistrer la session ou la rejouer hors ligne
+    """
+    model_dir = os.path.join(dataset_dir, folder_name)
     os.makedirs(model_dir, exist_ok=True)
     
     # Charger les hash des images existantes
     existing_hashes = load_existing_hashes(model_dir)
     current_count = len(existing_hashes)
     
+    # Hash déjà connus ailleurs (ex: classe du dataset quand on scrape des candidats)
+    if known_hashes:
+        existing_hashes |= known_hashes
+    
     # Calculer combien d'images manquent
     images_needed = max(0, max_images - current_count)
     
@@ -259,14 +412,24 @@ def scrape_model(model_name, folder_name, search_variations, max_images=500):
     
     if images_needed <= 0:
         print(f"✅ Objectif déjà atteint ! ({current_count} images)")
-        return
+        return 0
     
     collected_urls = set()
+    session = http_session(session=archive.http() if archive else None)
+    pause = (lambda seconds: None) if archive and archive.replay else time.sleep
     
     # Collecte des URLs
     for query in search_variations:
         print(f"\n🔍 Recherche : '{query}'")
-        urls = scroll_and_collect_images(query, scroll_count=40)
+        # Marge pour filtrage et doublons : 2 URLs par image manquante
+        quota = images_needed * 2 - len(collected_urls)
+        if collector == "http":
+            urls = collect_images_http(query, max_pages=40, session=session,
+                                       seen=collected_urls, quota=quota)
+        else:
+            driver = archive.driver(query, setup_driver) if archive else None
+            urls = scroll_and_collect_images(query, scroll_count=40, driver=driver,
+                                             seen=collected_urls, quota=quota)
         
         new_urls = set(urls) - collected_urls
         collected_urls.update(urls)
@@ -277,9 +440,10 @@ def scrape_model(model_name, folder_name, search_variations, max_images=500):
             print("   ⚠️ Quota d'URLs atteint, arrêt de la collecte")
             break
         
-        time.sleep(random.uniform(2, 4))  # Pause entre recherches
+        pause(random.uniform(2, 4))  # Pause entre recherches
     
-    collected_urls = list(collected_urls)[:int(images_needed * 2)]
+    # Ordre stable : un rejeu télécharge les mêmes URLs dans le même ordre
+    collected_urls = sorted(collected_urls)[:int(images_needed * 2)]
     
     print(f"\n{'='*60}")
     print(f"📦 TÉLÉCHARGEMENT : {len(collected_urls)} URLs à traiter")
@@ -288,33 +452,46 @@ def scrape_model(model_name, folder_name, search_variations, max_images=500):
     # Obtenir le prochain index disponible
     next_index = get_next_available_index(model_dir)
     
-    # Téléchargement parallèle avec suivi
+    # Téléchargement parallèle : soumission à la demande, concurrence adaptative,
+    # arrêt des téléchargements en cours dès que l'objectif est atteint
     downloaded_count = 0
     failed_reasons = {}
     
-    with ThreadPoolExecutor(max_workers=12) as executor:
-        futures = {
-            executor.submit(download_image, url, model_dir, next_index + i, existing_hashes): (i, url) 
-            for i, url in enumerate(collected_urls)
-        }
+    def handle(result):
+        nonlocal downloaded_count
+        success, info, img_hash = result
         
-        for future in as_completed(futures):
-            success, info, img_hash = future.result()
-            
-            if success:
-                downloaded_count += 1
-                if img_hash:
-                    existing_hashes.add(img_hash)  # Ajouter le hash
-                if downloaded_count % 10 == 0:
-                    total_now = current_count + downloaded_count
-                    print(f"   ✅ +{downloaded_count} nouvelles | Total: {total_now}/{max_images}")
-            else:
-                # Compter les raisons d'échec
-                failed_reasons[info] = failed_reasons.get(info, 0) + 1
-            
-            if downloaded_count >= images_needed:
-                print(f"   🎉 Objectif atteint : {max_images} images au total !")
-                break
+        if success:
+            downloaded_count += 1
+            if img_hash:
+                existing_hashes.add(img_hash)  # Ajouter le hash
+            if downloaded_count % 10 == 0:
+                total_now = current_count + downloaded_count
+                print(f"   ✅ +{downloaded_count} nouvelles | Total: {total_now}/{max_images}")
+        elif info != CANCELLED:
+            # Compter les raisons d'échec
+            failed_reasons[info] = failed_reasons.get(info, 0) + 1
+        
+        return downloaded_count >= images_needed
+    
+    jobs = (partial(download_image, url, model_dir, next_index + i, existing_hashes, session=session)
+            for i, url in enumerate(collected_urls))
+    if archive and archive.replay:
+        # Rejeu déterministe : URLs traitées dans l'ordre, arrêt exact au quota
+        controller = DownloadController(initial=1, min_workers=1, max_workers=1)
+    else:
+        controller = DownloadController()
+    stats = controller.run(jobs, handle)
+    
+    if downloaded_count >= images_needed:
+        print(f"   🎉 Objectif atteint : {max_images} images au total !")
+    print(f"   ⚙️  {stats['submitted']} requêtes pour {len(collected_urls)} URLs | "
+          f"{stats['max_in_flight']} en parallèle au maximum | "
+          f"{stats['throttled']} refus serveur | {stats['cancelled']} annulées")
+    
+    if archive:
+        archive.save()
+    store_for(model_dir)[0].save()
     
     # Rapport final
     final_count = current_count + downloaded_count
@@ -332,304 +509,61 @@ def scrape_model(model_name, folder_name, search_variations, max_images=500):
             print(f"   - {reason}: {count}x")
     
     print(f"{'='*60}\n")
+    return downloaded_count
 
-# CONFIGURATION DES MODÈLES À SCRAPER
-SNEAKER_MODELS = {
-    "Adidas Forum Low": {
-        "folder": "adidas_forum_low",
-        "queries": [
-            "Adidas Forum Low sneakers",
-            "Adidas Forum Low white",
-            "Adidas Forum Low side view",
-            "Adidas Forum Low on feet",
-            "Adidas Forum Low close up",
-            "Adidas Forum Low product photo",
-            "Adidas Forum 84 Low",
-            "Adidas Forum Low detail"
-        ]
-    },
-    "Adidas Spezial": {
-        "folder": "adidas_spezial",
-        "queries": [
-            "Adidas Spezial blue",
-            "Adidas Spezial sneakers",
-            "Adidas Spezial handball",
-            "Adidas Spezial side view",
-            "Adidas Spezial on feet",
-            "Adidas Spezial close up",
-            "Adidas Spezial product",
-            "Adidas Spezial gum sole"
-        ]
-    },
-    "Asics Gel-Kayano": {
-        "folder": "asics_gel-kayano",
-        "queries": [
-            "Asics Gel Kayano 14",
-            "Asics Gel Kayano sneakers",
-            "Gel Kayano close up",
-            "Asics Gel Kayano side view",
-            "Asics Gel Kayano on feet",
-            "Gel Kayano product photo",
-            "Asics Gel Kayano detail",
-            "Asics Kayano street style"
-        ]
-    },
-    "Asics Gel-NYC": {
-        "folder": "asics_gel-nyc",
-        "queries": [
-            "Asics Gel NYC sneakers",
-            "Asics Gel NYC colorway",
-            "Asics Gel NYC side view",
-            "Asics Gel NYC on feet",
-            "Asics Gel NYC close up",
-            "Asics Gel NYC product",
-            "Asics Gel NYC detail",
-            "Asics Gel NYC street style"
-        ]
-    },
-    "Jordan 4": {
-        "folder": "jordan_4",
-        "queries": [
-            "Air Jordan 4 sneakers",
-            "Jordan 4 retro",
-            "Jordan 4 military black",
-            "Jordan 4 side view",
-            "Jordan 4 on feet",
-            "Jordan 4 close up",
-            "Jordan 4 product photo",
-            "Jordan 4 detail"
-        ]
-    },
-    "New Balance 530": {
-        "folder": "new_balance_530",
-        "queries": [
-            "New Balance 530 sneakers",
-            "NB 530 grey",
-            "New Balance 530 side view",
-            "New Balance 530 on feet",
-            "New Balance 530 close up",
-            "New Balance 530 product",
-            "New Balance 530 colorway",
-            "New Balance 530 retro"
-        ]
-    },
-    "New Balance 550": {
-        "folder": "new_balance_550",
-        "queries": [
-            "New Balance 550 sneakers",
-            "NB 550 white green",
-            "New Balance 550 side view",
-            "New Balance 550 on feet",
-            "New Balance 550 close up",
-            "New Balance 550 product",
-            "New Balance 550 colorway",
-            "New Balance 550 basketball"
-        ]
-    },
-    "New Balance 2002R": {
-        "folder": "new_balance_2002r",
-        "queries": [
-            "New Balance 2002R protection pack",
-            "New Balance 2002R sneakers",
-            "NB 2002R grey",
-            "New Balance 2002R side view",
-            "New Balance 2002R on feet",
-            "New Balance 2002R close up",
-            "New Balance 2002R product",
-            "New Balance 2002R detail"
-        ]
-    },
-    "Nike Dunk Low": {
-        "folder": "nike_dunk_low",
-        "queries": [
-            "Nike Dunk Low panda",
-            "Nike Dunk Low retro",
-            "Nike Dunk Low sneakers",
-            "Nike Dunk Low side view",
-            "Nike Dunk Low on feet",
-            "Nike Dunk Low close up",
-            "Nike Dunk Low product photo",
-            "Nike Dunk Low detail"
-        ]
-    },
-    "Nike P6000": {
-        "folder": "nike_p6000",
-        "queries": [
-            "Nike P6000 sneakers",
-            "Nike P6000 CNPT",
-            "Nike P6000 silver",
-            "Nike P6000 side view",
-            "Nike P6000 on feet",
-            "Nike P6000 close up",
-            "Nike P6000 product",
-            "Nike P6000 runner"
-        ]
-    }
-}
+# CONFIGURATION DES MODÈLES À SCRAPER (registre partagé : classes.json)
+SNEAKER_MODELS = scraper_models()
 
-# EXEMPLE D'UTILISATION
+# SCRAPING - classes sous leur objectif (calculées depuis le catalogue)
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scraper multi-modèles de sneakers")
+    parser.add_argument("--all", action="store_true",
+                        help="Passe sur toutes les classes, pas seulement les incomplètes")
+    parser.add_argument("--dataset", default="dataset", help="Dossier du dataset")
+    parser.add_argument("--collector", choices=COLLECTORS, default="browser",
+                        help="Collecte des URLs : navigateur (Selenium) ou HTTP direct")
+    session_group = parser.add_mutually_exclusive_group()
+    session_group.add_argument("--record", metavar="DIR", help="Enregistre la session dans DIR")
+    session_group.add_argument("--replay", metavar="DIR", help="Rejoue hors ligne la session DIR")
+    args = parser.parse_args()
+    
+    archive = None
+    if args.record or args.replay:
+        from session_archive import SessionArchive
+        archive = SessionArchive(args.record or args.replay, "record" if args.record else "replay")
+    
+    models_to_scrape = SNEAKER_MODELS if args.all else incomplete_classes(args.dataset)
+    
     print("\n" + "="*70)
     print("🚀 SCRAPER MULTI-MODÈLES DE SNEAKERS - ÉQUILIBRAGE DATASET")
     print("="*70)
-    print(f"📊 {len(SNEAKER_MODELS)} modèles à scraper")
-    print(f"🎯 Objectif: 220 images par modèle (total: 2200 images)")
+    print(f"📊 {len(models_to_scrape)}/{len(SNEAKER_MODELS)} classes à compléter")
     print("="*70 + "\n")
     
-    # Scraper tous les modèles avec objectif 220 images
-    for model_name, config in SNEAKER_MODELS.items():
+    for model_name, config in models_to_scrape.items():
         try:
             scrape_model(
                 model_name=model_name,
                 folder_name=config["folder"],
                 search_variations=config["queries"],
-                max_images=220  # Objectif équilibré à 220
+                max_images=config["target"],
+                dataset_dir=args.dataset,
+                collector=args.collector,
+                archive=archive
             )
-            print(f"\n⏳ Pause de 5 secondes avant le prochain modèle...\n")
-            time.sleep(5)  # Pause entre modèles pour éviter le blocage
+            if not args.replay:
+                print(f"\n⏳ Pause de 5 secondes avant le prochain modèle...\n")
+                time.sleep(5)  # Pause entre modèles pour éviter le blocage
         except Exception as e:
             print(f"\n❌ ERREUR sur {model_name}: {e}\n")
             continue
     
     print("\n" + "="*70)
-    print("🎉 SCRAPING TERMINÉ POUR TOUS LES MODÈLES")
+    print("🎉 SCRAPING TERMINÉ")
     print("="*70)
     
-    # Rapport final du dataset
     print("\n📊 ÉTAT FINAL DU DATASET:")
     print("-"*70)
-    total_images = 0
-    for model_name, config in SNEAKER_MODELS.items():
-        folder_path = f"dataset/{config['folder']}"
-        if os.path.exists(folder_path):
-            count = len([f for f in os.listdir(folder_path) if f.endswith(('.jpg', '.jpeg', '.png'))])
-            total_images += count
-            status = "✅" if count >= 200 else "⚠️" if count >= 150 else "❌"
-            print(f"{status} {model_name:25} {count:3}/220 images")
-        else:
-            print(f"❌ {model_name:25}   0/220 images (dossier non créé)")
-    
-    print("-"*70)
-    print(f"📈 Total: {total_images}/2200 images")
-    avg = total_images / len(SNEAKER_MODELS) if total_images > 0 else 0
-    print(f"📊 Moyenne: {avg:.0f} images par classe")
-    print("="*70)
-
-# SCRAPING CIBLÉ - Seulement les classes incomplètes
-if __name__ == "__main__":
-    # Classes à compléter (< 220 images)
-    INCOMPLETE_MODELS = {
-        "Adidas Forum Low": {
-            "folder": "adidas_forum_low",
-            "queries": [
-                "Adidas Forum Low sneakers",
-                "Adidas Forum Low white",
-                "Adidas Forum Low side view",
-                "Adidas Forum Low on feet",
-                "Adidas Forum Low close up",
-                "Adidas Forum Low product photo",
-                "Adidas Forum 84 Low",
-                "Adidas Forum Low detail"
-            ]
-        },
-        "Jordan 4": {
-            "folder": "jordan_4",
-            "queries": [
-                "Air Jordan 4 sneakers",
-                "Jordan 4 retro",
-                "Jordan 4 military black",
-                "Jordan 4 side view",
-                "Jordan 4 on feet",
-                "Jordan 4 close up",
-                "Jordan 4 product photo",
-                "Jordan 4 detail"
-            ]
-        },
-        "New Balance 530": {
-            "folder": "new_balance_530",
-            "queries": [
-                "New Balance 530 sneakers",
-                "NB 530 grey",
-                "New Balance 530 side view",
-                "New Balance 530 on feet",
-                "New Balance 530 close up",
-                "New Balance 530 product",
-                "New Balance 530 colorway",
-                "New Balance 530 retro"
-            ]
-        },
-        "Nike P6000": {
-            "folder": "nike_p6000",
-            "queries": [
-                "Nike P6000 sneakers",
-                "Nike P6000 CNPT",
-                "Nike P6000 silver",
-                "Nike P6000 side view",
-                "Nike P6000 on feet",
-                "Nike P6000 close up",
-                "Nike P6000 product",
-                "Nike P6000 runner"
-            ]
-        }
-    }
-    
-    print("\n" + "="*70)
-    print("🔧 SCRAPING CIBLÉ - COMPLÉTION DES CLASSES INCOMPLÈTES")
-    print("="*70)
-    print(f"📊 {len(INCOMPLETE_MODELS)} classes à compléter")
-    print(f"🎯 Objectif: 220 images par classe")
-    print("="*70 + "\n")
-    
-    # Scraper uniquement les modèles incomplets
-    for model_name, config in INCOMPLETE_MODELS.items():
-        try:
-            scrape_model(
-                model_name=model_name,
-                folder_name=config["folder"],
-                search_variations=config["queries"],
-                max_images=220
-            )
-            print(f"\n⏳ Pause de 5 secondes avant le prochain modèle...\n")
-            time.sleep(5)
-        except Exception as e:
-            print(f"\n❌ ERREUR sur {model_name}: {e}\n")
-            continue
-    
-    print("\n" + "="*70)
-    print("🎉 COMPLÉTION TERMINÉE")
-    print("="*70)
-    
-    # Rapport final complet (toutes les 10 classes)
-    print("\n📊 ÉTAT FINAL DU DATASET COMPLET:")
-    print("-"*70)
-    total_images = 0
-    
-    for model_name, config in SNEAKER_MODELS.items():
-        folder_path = f"dataset/{config['folder']}"
-        if os.path.exists(folder_path):
-            count = len([f for f in os.listdir(folder_path) if f.endswith(('.jpg', '.jpeg', '.png'))])
-            total_images += count
-            status = "✅" if count >= 220 else "⚠️" if count >= 200 else "❌"
-            print(f"{status} {model_name:25} {count:3}/220 images")
-        else:
-            print(f"❌ {model_name:25}   0/220 images")
-    
-    print("-"*70)
-    print(f"📈 Total: {total_images}/2200 images")
-    avg = total_images / len(SNEAKER_MODELS) if total_images > 0 else 0
-    print(f"📊 Moyenne: {avg:.0f} images par classe")
-    
-    # Vérifier si toutes les classes sont >= 220
-    all_complete = all(
-        len([f for f in os.listdir(f"dataset/{config['folder']}") 
-             if f.endswith(('.jpg', '.jpeg', '.png'))]) >= 220
-        for config in SNEAKER_MODELS.values()
-        if os.path.exists(f"dataset/{config['folder']}")
-    )
-    
-    if all_complete:
-        print("\n🎉 DATASET COMPLET ! Toutes les classes ont >= 220 images")
-    else:
-        print("\n⚠️  Certaines classes sont encore incomplètes")
+    print_dataset_status(args.dataset)
     
-    print("="*70)
\ No newline at end of file
+    get_catalog(args.dataset).save_if_persistent()
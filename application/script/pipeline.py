@@ -0,0 +1,279 @@
+"""
+Pipeline complet scrape → clean → pack → train → export
+
+    python pipeline.py                       # tout, en sautant les étages inchangés
+    python pipeline.py --until pack          # prépare le dataset sans entraîner
+    python pipeline.py --force clean         # relance un type d'étage
+    python pipeline.py --classes jordan_4 --until pack   # restreint les étages par classe
+
+Le pipeline est un graphe d'étages ; chaque classe a sa propre chaîne
+scrape:<classe> → clean:<classe> → pack:<classe>, exécutée en parallèle des
+autres, puis train attend toutes les classes et export attend train.
+Un étage n'est relancé que si l'empreinte de ses entrées a changé : ajouter
+20 images à une classe ne relit que ces 20 images (cache des hash) et ne
+reconstruit que l'archive de cette classe. Le scrape d'une classe est relancé
+quand il lui manque des images (par exemple retirées par le nettoyage).
+"""
+
+import os
+import json
+import time
+import hashlib
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from class_registry import load_registry, scraper_models, balance_mode
+from dataset_catalog import get_catalog
+from dataset_cache import ensure_cache, load_split, class_fingerprint, CACHE_DIR
+from train_module import load_train_module
+
+PIPELINE_DIR = "pipeline_cache"
+STATE_FILE = "state.json"
+HASH_CACHE_FILE = "image_hashes.json"
+STAGE_KINDS = ("scrape", "clean", "pack", "train", "export")
+# Étages exécutés en même temps au maximum, par type (Chrome et TensorFlow sont lourds)
+CONCURRENCY = {"scrape": 2, "train": 1, "export": 1}
+
+def _digest(value):
+    return hashlib.sha256(json.dumps(value, sort_keys=True).encode()).hexdigest()[:16]
+
+def _write_json(path, data):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+def _read_json(path, default):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+# =====================================================================
+# MOTEUR
+# =====================================================================
+
+class Stage:
+    """Étage : dépendances, empreinte des entrées (key) et exécution (run)
+
+    run() peut retourner une empreinte de sortie : si l'étage modifie ses propres
+    entrées (clean), cette empreinte vaut aussi comme cache au passage suivant.
+    """
+
+    def __init__(self, name, deps, key, run):
+        self.name, self.deps, self.key, self.run = name, list(deps), key, run
+
+    @property
+    def kind(self):
+        return self.name.split(":")[0]
+
+class Pipeline:
+    def __init__(self, state_dir=PIPELINE_DIR, workers=4, force=()):
+        os.makedirs(state_dir, exist_ok=True)
+        self.state_path = os.path.join(state_dir, STATE_FILE)
+        self.state = _read_json(self.state_path, {})
+        self.workers, self.force = workers, set(force)
+        self.stages = {}
+        self._lock = threading.Lock()
+        self._slots = {kind: threading.Semaphore(n) for kind, n in CONCURRENCY.items()}
+
+    def add(self, name, deps, key, run):
+        self.stages[name] = Stage(name, deps, key, run)
+
+    def _execute(self, stage):
+        key = _digest(stage.key())
+        cached = self.state.get(stage.name, {})
+        if stage.kind not in self.force and key in (cached.get("key"), cached.get("output")):
+            print(f"⏭️  {stage.name} inchangé")
+            return "cached"
+
+        slot = self._slots.get(stage.kind)
+        if slot:
+            slot.acquire()
+        try:
+            print(f"▶️  {stage.name}")
+            start = time.perf_counter()
+            output = stage.run()
+            seconds = time.perf_counter() - start
+        finally:
+            if slot:
+                slot.release()
+
+        with self._lock:
+            self.state[stage.name] = {
+                "key": key,
+                "output": _digest(output) if output is not None else None,
+                "seconds": round(seconds, 1),
+                "finished": time.strftime("%Y-%m-%d %H:%M:%S"),
+            }
+            _write_json(self.state_path, self.state)
+        print(f"✅ {stage.name} ({seconds:.1f}s)")
+        return "ran"
+
+    def run(self):
+        """Exécute le graphe ; un étage démarre dès que ses dépendances sont terminées"""
+        pending = dict(self.stages)
+        status, futures = {}, {}
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            while pending or futures:
+                for name, stage in list(pending.items()):
+                    deps = [status.get(d) for d in stage.deps if d in self.stages]
+                    if "failed" in deps or "skipped" in deps:
+                        status[name] = "skipped"
+                        del pending[name]
+                    elif all(deps):
+                        futures[executor.submit(self._execute, stage)] = name
+                        del pending[name]
+                if not futures:
+                    continue
+                finished, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = futures.pop(future)
+                    try:
+                        status[name] = future.result()
+                    except Exception as e:
+                        print(f"❌ {name}: {e}")
+                        status[name] = "failed"
+        return status
+
+# =====================================================================
+# ÉTAGES DU PROJET
+# =====================================================================
+
+def export_model(train, dataset_dir="dataset", cache_dir=CACHE_DIR):
+    """Exporte OUTPUT_DIR/final_model.h5 en TensorFlow.js (vérifié sur un batch de validation)"""
+    from tensorflow import keras
+    model = keras.models.load_model(os.path.join(train.OUTPUT_DIR, "final_model.h5"))
+    report = _read_json(os.path.join(train.OUTPUT_DIR, "evaluation_report.json"), {})
+    metrics = report.get("metrics_no_tta", report.get("metrics"))
+    results = [metrics["loss"], metrics["accuracy"], metrics["top_3_accuracy"]] if metrics else None
+    ensure_cache(dataset_dir, train.CLASSES, tuple(model.input_shape[1:3]), cache_dir)
+    arrays, _, val_index = load_split(train.CLASSES, tuple(model.input_shape[1:3]),
+                                      train.VALIDATION_SPLIT, cache_dir)
+    batch = [arrays[label][row] / 255.0 for label, row in val_index[:train.BATCH_SIZE]]
+    train.export_to_tfjs(model, batch, results)
+
+def build_pipeline(args):
+    registry = load_registry()
+    models = scraper_models(registry)
+    last = STAGE_KINDS.index(args.until)
+    # TensorFlow n'est chargé que si un étage en a besoin (pack et au-delà)
+    train = load_train_module() if last >= 2 else None
+    if train is not None:
+        train.DATASET_DIR = args.dataset
+        train.EXPORT_TFJS = False
+
+    pipeline = Pipeline(args.state_dir, args.workers, args.force)
+    hash_cache_path = os.path.join(args.state_dir, HASH_CACHE_FILE)
+    hash_cache = _read_json(hash_cache_path, {})
+    hash_lock = threading.Lock()
+    dataset = args.dataset
+
+    def content(folder):
+        return {"content": class_fingerprint(dataset, folder)}
+
+    def scrape_key(config):
+        # Images manquantes : le nettoyage d'une classe relance son scrape pour la compléter
+        count = get_catalog(dataset).count(config["folder"])
+        return {**config, "missing": max(0, config["target"] - count)}
+
+    for model_name, config in models.items():
+        folder = config["folder"]
+        if args.classes and folder not in args.classes:
+            continue
+
+        def scrape(model_name=model_name, config=config):
+            from multi_brand_scraper import scrape_model
+            scrape_model(model_name, config["folder"], config["queries"],
+                         max_images=config["target"], dataset_dir=dataset)
+            get_catalog(dataset).invalidate(config["folder"])
+            return scrape_key(config)
+
+        def clean(folder=folder):
+            from script_supp_doublons import plan_duplicates_and_balance, apply_plan, new_manifest_path
+            with hash_lock:
+                class_hashes = {folder: hash_cache.get(folder, {})}
+            plan = plan_duplicates_and_balance(dataset, registry["balance_target"], [folder],
+                                               hash_cache=class_hashes,
+                                               move_excess=balance_mode(registry) == "move")
+            apply_plan(plan, new_manifest_path(dataset, folder))
+            with hash_lock:
+                hash_cache[folder] = class_hashes[folder]
+                _write_json(hash_cache_path, hash_cache)
+            return {**content(folder), "target": registry["balance_target"],
+                    "balance": balance_mode(registry)}
+
+        def pack(folder=folder):
+            ensure_cache(dataset, [folder], train.IMG_SIZE, args.cache_dir)
+
+        pipeline.add(f"scrape:{folder}", [], lambda config=config: scrape_key(config), scrape)
+        if last >= 1:
+            pipeline.add(f"clean:{folder}", [f"scrape:{folder}"],
+                         lambda folder=folder: {**content(folder),
+                                                "target": registry["balance_target"],
+                                                "balance": balance_mode(registry)}, clean)
+        if last >= 2:
+            pipeline.add(f"pack:{folder}", [f"clean:{folder}"],
+                         lambda folder=folder: {**content(folder),
+                                                "img_size": list(train.IMG_SIZE)}, pack)
+
+    if last >= 3:
+        def train_key():
+            return {"classes": {f: class_fingerprint(dataset, f) for f in train.CLASSES},
+                    "hyperparameters": train.hyperparameters()}
+
+        def run_train():
+            # Échec (dataset insuffisant...) : étage "failed", son empreinte n'est pas enregistrée
+            if train.main():
+                raise RuntimeError("entraînement non effectué")
+
+        pipeline.add("train", [f"pack:{f}" for f in train.CLASSES], train_key, run_train)
+
+    if last >= 4:
+        model_path = os.path.join(train.OUTPUT_DIR, "final_model.h5")
+
+        def export_key():
+            from training_state import file_fingerprint
+            return {"model": file_fingerprint(model_path), "labels": train.class_labels(train.CLASSES)}
+
+        def export():
+            export_model(train, dataset, args.cache_dir)
+
+        pipeline.add("export", ["train"], export_key, export)
+
+    return pipeline
+
+def main():
+    parser = argparse.ArgumentParser(description="Pipeline scrape → clean → pack → train → export")
+    parser.add_argument("--until", choices=STAGE_KINDS, default="export",
+                        help="Dernier type d'étage exécuté")
+    parser.add_argument("--force", nargs="*", default=[], choices=STAGE_KINDS,
+                        help="Types d'étages relancés même sans changement")
+    parser.add_argument("--classes", nargs="*", default=None, help="Dossiers de classes à traiter")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--dataset", default="dataset")
+    parser.add_argument("--cache-dir", default=CACHE_DIR)
+    parser.add_argument("--state-dir", default=PIPELINE_DIR)
+    args = parser.parse_args()
+    if args.classes and STAGE_KINDS.index(args.until) >= STAGE_KINDS.index("train"):
+        # train utilise toutes les classes : il ne peut pas attendre seulement celles-ci
+        parser.error("--classes s'utilise avec --until scrape, clean ou pack")
+
+    print("\n" + "="*70)
+    print(f"🏭 PIPELINE — jusqu'à '{args.until}'")
+    print("="*70)
+    start = time.perf_counter()
+    status = build_pipeline(args).run()
+    get_catalog(args.dataset).save_if_persistent()
+
+    print("\n" + "="*70)
+    counts = {s: sum(1 for v in status.values() if v == s) for s in ("ran", "cached", "failed", "skipped")}
+    print(f"🏁 {counts['ran']} exécutés | {counts['cached']} en cache | "
+          f"{counts['failed']} en échec | {counts['skipped']} sautés "
+          f"({time.perf_counter() - start:.1f}s)")
+    print("="*70)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+"""
+Élagage structuré du modèle fine-tuné avant export
+
+    python pruning.py --model trained_model/final_model.h5 --ratio 0.3 --recovery-epochs 5
+
+Dans chaque bloc inversé de MobileNetV2, les canaux d'expansion les moins utiles
+(norme L1 du noyau × |gamma| de la BatchNorm) sont retirés : expand, depthwise et
+project sont reconstruits plus étroits, ce qui donne un graphe dense réellement
+plus petit (moins de poids et de FLOPs pour TF.js), puis un court fine-tuning
+récupère l'accuracy perdue.
+"""
+
+import os
+import json
+import argparse
+import numpy as np
+from tensorflow import keras
+
+from train_module import load_train_module
+from backbone_report import tfjs_size, cpu_latency_ms
+
+# Nombre de canaux conservés arrondi à un multiple de 8 (noyaux CPU/WebGL plus efficaces)
+CHANNEL_ROUNDING = 8
+
+# =====================================================================
+# SÉLECTION DES CANAUX
+# =====================================================================
+
+def expansion_blocks(base):
+    """Numéros des blocs MobileNetV2 qui ont une couche d'expansion"""
+    names = {layer.name for layer in base.layers}
+    return [i for i in range(1, 64) if f"block_{i}_expand" in names]
+
+def channel_scores(base, block):
+    """Importance de chaque canal d'expansion : L1 du noyau × |gamma|"""
+    kernel = base.get_layer(f"block_{block}_expand").get_weights()[0]
+    gamma = base.get_layer(f"block_{block}_expand_BN").get_weights()[0]
+    return np.abs(kernel).sum(axis=(0, 1, 2)) * np.abs(gamma)
+
+def select_channels(base, ratio):
+    """{bloc: indices des canaux conservés} pour un taux d'élagage donné"""
+    keep = {}
+    for block in expansion_blocks(base):
+        scores = channel_scores(base, block)
+        n_keep = int(np.ceil(len(scores) * (1 - ratio) / CHANNEL_ROUNDING) * CHANNEL_ROUNDING)
+        n_keep = min(len(scores), max(CHANNEL_ROUNDING, n_keep))
+        keep[block] = np.sort(np.argsort(scores)[::-1][:n_keep])
+    return keep
+
+# =====================================================================
+# RECONSTRUCTION DU GRAPHE
+# =====================================================================
+
+def _sliced_weights(layer_name, weights, keep):
+    """Poids d'une couche restreints aux canaux conservés (ou inchangés)"""
+    for block, idx in keep.items():
+        prefix = f"block_{block}_"
+        if layer_name == prefix + "expand":
+            return [weights[0][..., idx]] + weights[1:]
+        if layer_name in (prefix + "expand_BN", prefix + "depthwise_BN"):
+            return [w[idx] for w in weights]
+        if layer_name == prefix + "depthwise":
+            return [weights[0][:, :, idx, :]] + [w[idx] for w in weights[1:]]
+        if layer_name == prefix + "project":
+            return [weights[0][:, :, idx, :]] + weights[1:]
+    return weights
+
+def prune_base(base, keep):
+    """Nouveau MobileNetV2 dense avec des couches d'expansion plus étroites"""
+    config = base.get_config()
+    for layer_config in config["layers"]:
+        name = layer_config["config"]["name"]
+        # Les formes mémorisées sont celles du modèle d'origine : reconstruites depuis le graphe
+        layer_config.pop("build_config", None)
+        for block, idx in keep.items():
+            if name == f"block_{block}_expand":
+                layer_config["config"]["filters"] = int(len(idx))
+    pruned = keras.Model.from_config(config)
+
+    for layer in pruned.layers:
+        weights = base.get_layer(layer.name).get_weights()
+        if weights:
+            layer.set_weights(_sliced_weights(layer.name, weights, keep))
+    return pruned
+
+def prune_model(model, ratio):
+    """Modèle complet (Rescaling + backbone + tête) avec backbone élagué"""
+    base = model.layers[1]
+    if not expansion_blocks(base):
+        raise ValueError("Élagage structuré disponible uniquement pour MobileNetV2")
+
+    keep = select_channels(base, ratio)
+    pruned_base = prune_base(base, keep)
+
+    new_layers = [keras.Input(shape=model.input_shape[1:])]
+    for layer in model.layers:
+        if layer is base:
+            new_layers.append(pruned_base)
+        else:
+            new_layers.append(layer.__class__.from_config(layer.get_config()))
+    pruned = keras.Sequential(new_layers)
+
+    for old, new in zip(model.layers, pruned.layers):
+        if old is not base and old.get_weights():
+            new.set_weights(old.get_weights())
+
+    removed = sum(base.get_layer(f"block_{b}_expand").filters - len(idx) for b, idx in keep.items())
+    print(f"✂️  {removed} canaux d'expansion retirés sur {len(keep)} blocs")
+    return pruned
+
+# =====================================================================
+# COMPARAISON
+# =====================================================================
+
+def measure(model, val_gen, img_size):
+    """Taille, latence et métriques de validation (loss, accuracy, top-3) d'un modèle"""
+    results = model.evaluate(val_gen, verbose=0, return_dict=True)
+    size_bytes, measured = tfjs_size(model)
+    return {
+        "params": model.count_params(),
+        "tfjs_bytes": size_bytes,
+        "tfjs_measured": measured,
+        "cpu_latency_ms": cpu_latency_ms(model, img_size),
+        "val_loss": float(results["loss"]),
+        "val_accuracy": float(results["accuracy"]),
+        "val_top_3_accuracy": float(results["top_3_accuracy"]) if "top_3_accuracy" in results else None,
+    }
+
+def print_comparison(before, after):
+    print("\n" + "="*60)
+    print("AVANT / APRÈS ÉLAGAGE")
+    print("="*60)
+    for key, label, fmt in (("params", "Paramètres", "{:,.0f}"),
+                            ("tfjs_bytes", "Taille TF.js (o)", "{:,.0f}"),
+                            ("cpu_latency_ms", "Latence CPU (ms)", "{:.2f}"),
+                            ("val_accuracy", "Accuracy val", "{:.4f}")):
+        b, a = before[key], after[key]
+        change = (a - b) / b * 100 if b else 0
+        print(f"{label:18} {fmt.format(b):>14} → {fmt.format(a):>14} ({change:+.1f}%)")
+
+def main():
+    parser = argparse.ArgumentParser(description="Élagage structuré + fine-tuning de récupération")
+    parser.add_argument("--model", default=None, help="Modèle fine-tuné (.h5/.keras)")
+    parser.add_argument("--ratio", type=float, default=0.3,
+                        help="Part des canaux d'expansion retirés par bloc")
+    parser.add_argument("--recovery-epochs", type=int, default=5)
+    parser.add_argument("--export", action="store_true", help="Exporte le modèle élagué en TF.js")
+    args = parser.parse_args()
+
+    train = load_train_module()
+    model_path = args.model or os.path.join(train.OUTPUT_DIR, "final_model.h5")
+    model = keras.models.load_model(model_path)
+    train.IMG_SIZE = tuple(model.input_shape[1:3])
+    train_gen, val_gen = train.create_data_generators()
+
+    before = measure(model, val_gen, train.IMG_SIZE)
+    pruned = prune_model(model, args.ratio)
+
+    # Fine-tuning de récupération : tout le backbone élagué, learning rate faible
+    pruned.layers[1].trainable = True
+    pruned.compile(
+        optimizer=keras.optimizers.Adam(learning_rate=train.LEARNING_RATE / 10),
+        loss='categorical_crossentropy',
+        metrics=['accuracy', keras.metrics.TopKCategoricalAccuracy(k=3, name='top_3_accuracy')]
+    )
+    if args.recovery_epochs:
+        pruned.fit(train_gen, validation_data=val_gen, epochs=args.recovery_epochs, callbacks=[
+            keras.callbacks.EarlyStopping(monitor='val_accuracy', patience=3,
+                                          restore_best_weights=True)
+        ])
+
+    after = measure(pruned, val_gen, train.IMG_SIZE)
+    print_comparison(before, after)
+
+    pruned_path = os.path.join(train.OUTPUT_DIR, "pruned_model.h5")
+    pruned.save(pruned_path)
+    with open(os.path.join(train.OUTPUT_DIR, "pruning_report.json"), "w") as f:
+        json.dump({"ratio": args.ratio, "before": before, "after": after}, f, indent=2)
+    print(f"\n✅ Modèle élagué sauvegardé: {pruned_path}")
+
+    if args.export:
+        # Export vérifié sur un batch de validation, publié avec les métriques de l'élagué
+        train.export_to_tfjs(pruned, val_gen[0][0],
+                             [after["val_loss"], after["val_accuracy"], after["val_top_3_accuracy"]])
+
+if __name__ == "__main__":
+    main()
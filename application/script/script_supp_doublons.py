@@ -1,168 +1,411 @@
 import os
+import json
 import random
-import shutil
-import hashlib
+import argparse
+from datetime import datetime
 from PIL import Image
 from collections import defaultdict
+from dataset_catalog import get_catalog
+from class_registry import load_registry, class_folders, balance_mode, BALANCE_MODES
+from image_hashing import load_thumbnails, duplicate_keys, image_key
+from image_store import find_store, print_collisions
+
+HASH_VERSION = 2   # Clés du cache de hash calculées avec image_hashing
 
 def compute_image_hash(img):
-    """Calcule un hash perceptuel pour détecter les doublons"""
-    # Redimensionner à 8x8 pour comparaison rapide
-    img_small = img.resize((8, 8), Image.Resampling.LANCZOS).convert('L')
-    
-    # Calculer la moyenne
-    pixels = list(img_small.getdata())
-    avg = sum(pixels) / len(pixels)
-    
-    # Créer un hash basé sur les pixels au-dessus de la moyenne
-    bits = ''.join('1' if p > avg else '0' for p in pixels)
-    
-    # Convertir en hash hex
-    return hashlib.md5(bits.encode()).hexdigest()
+    """Calcule un hash perceptuel pour détecter les doublons (aHash + pHash)"""
+    return image_key(img)
 
 def get_image_quality_score(img_path):
     """Calcule un score de qualité pour prioriser les meilleures images"""
     try:
         img = Image.open(img_path)
-        
-        # Score basé sur :
-        # 1. Résolution (plus c'est grand, mieux c'est)
-        resolution_score = img.width * img.height
-        
-        # 2. Pas trop sombre/clair
-        import numpy as np
-        img_array = np.array(img.convert('L'))
-        brightness = img_array.mean()
-        brightness_score = 1000 if 30 < brightness < 230 else 0
-        
-        # 3. Format (JPEG > PNG pour les photos)
-        format_score = 500 if img.format == 'JPEG' else 0
-        
-        total_score = resolution_score + brightness_score + format_score
-        
-        return total_score
+        return compute_quality_score(img)
     except:
         return 0
 
-def remove_duplicates_and_balance(dataset_dir="dataset", target=150):
-    """Supprime les doublons ET équilibre à 'target' images par classe"""
+def compute_quality_score(img):
+    """Score de qualité d'une image déjà ouverte (évite de relire le fichier)"""
+    import numpy as np
+    return quality_score(img.width, img.height, img.format, np.array(img.convert('L')).mean())
+
+def quality_score(width, height, image_format, brightness):
+    # Score basé sur :
+    # 1. Résolution (plus c'est grand, mieux c'est)
+    resolution_score = width * height
     
-    print("\n" + "="*70)
-    print(f"🔧 NETTOYAGE + ÉQUILIBRAGE DU DATASET")
-    print("="*70)
-    print(f"1️⃣  Suppression des doublons")
-    print(f"2️⃣  Équilibrage à {target} images par classe")
-    print("="*70 + "\n")
+    # 2. Pas trop sombre/clair
+    brightness_score = 1000 if 30 < brightness < 230 else 0
+    
+    # 3. Format (JPEG > PNG pour les photos)
+    format_score = 500 if image_format == 'JPEG' else 0
+    
+    return resolution_score + brightness_score + format_score
+
+def is_cache_fresh(entry, size):
+    """Entrée [taille, clé, score, version] du cache de hash encore valable pour ce fichier"""
+    if entry is None or len(entry) != 4:
+        return False
+    cached_size, _key, _score, version = entry
+    return cached_size == size and version == HASH_VERSION
+
+# =====================================================================
+# PLAN / APPLY / ROLLBACK
+# =====================================================================
+
+MANIFEST_PREFIX = "_dedup_manifest"
+BACKUP_SUFFIXES = {"duplicate": "duplicates", "excess": "excess"}
+
+def _unique_destination(backup_dir, img_file, reserved):
+    """Nom de destination libre dans le backup (ne jamais écraser un ancien backup)"""
+    stem, ext = os.path.splitext(img_file)
+    candidate = img_file
+    suffix = 1
+    while (os.path.exists(os.path.join(backup_dir, candidate))
+           or os.path.join(backup_dir, candidate) in reserved):
+        candidate = f"{stem}_{suffix}{ext}"
+        suffix += 1
+    reserved.add(os.path.join(backup_dir, candidate))
+    return candidate
+
+def plan_duplicates_and_balance(dataset_dir="dataset", target=150, folders=None, hash_cache=None,
+                                move_excess=True):
+    """Calcule en une seule passe le plan keep/duplicate/excess sans déplacer aucun fichier
+    
+    folders    : classes à traiter (toutes les classes du dataset par défaut)
+    move_excess: False : les images en trop restent dans leur classe (marquées "excess"),
+                 l'équilibre est fait à l'entraînement (class_balance)
+    hash_cache : {classe: {fichier: [taille, clé, score, version]}} réutilisé et mis à jour,
+                 seules les images nouvelles ou modifiées sont relues
+    Si le dataset a un store (image_store.py), les clés et infos de ses blobs
+    sont reprises telles quelles : une image connue du store n'est pas relue.
+    """
     
-    total_duplicates = 0
-    total_removed = 0
+    plan = {
+        "version": 1,
+        "dataset_dir": os.path.abspath(dataset_dir),
+        "target": target,
+        "created": datetime.now().isoformat(),
+        "status": "planned",
+        "move_excess": move_excess,
+        "classes": {}
+    }
+    reserved = set()
+    catalog = get_catalog(dataset_dir)
+    store = find_store(dataset_dir)
     
-    for folder in sorted(os.listdir(dataset_dir)):
+    for folder in (catalog.folders() if folders is None else folders):
         folder_path = os.path.join(dataset_dir, folder)
-        
-        if not os.path.isdir(folder_path) or folder.startswith('_backup'):
+        if not catalog.exists(folder):
+            print(f"\n⚠️  Classe absente du dataset : {folder}")
             continue
         
-        print(f"\n📁 Traitement : {folder}")
+        print(f"\n📁 Analyse : {folder}")
         print("-" * 70)
         
-        # Lister toutes les images
-        image_files = [f for f in os.listdir(folder_path) 
-                       if f.lower().endswith(('.jpg', '.jpeg', '.png'))]
-        
-        initial_count = len(image_files)
-        print(f"   Images initiales : {initial_count}")
-        
-        # ====================================================================
-        # ÉTAPE 1 : DÉTECTION ET SUPPRESSION DES DOUBLONS
-        # ====================================================================
+        image_files = catalog.files(folder)
+        sizes = catalog.entries(folder)
+        cached = hash_cache.setdefault(folder, {}) if hash_cache is not None else {}
         
+        # Une seule lecture par image : hash + score de qualité
         hash_to_images = defaultdict(list)
+        entries = {}
+        
+        # Images nouvelles ou modifiées : décodées et hachées en un seul lot
+        stale = [f for f in image_files if not is_cache_fresh(cached.get(f), sizes[f])]
+        if stale and store is not None:
+            store.sync([folder])
+            known = store.describe(folder)
+            for img_file in [f for f in stale if f in known]:
+                key, info = known[img_file]
+                score = quality_score(info["width"], info["height"], info["format"], info["brightness"])
+                cached[img_file] = [sizes[img_file], key, score, HASH_VERSION]
+            stale = [f for f in stale if f not in known]
+        if stale:
+            stack, infos = load_thumbnails([os.path.join(folder_path, f) for f in stale])
+            keys = duplicate_keys(stack)
+            for img_file, info, key in zip(stale, infos, keys):
+                if info is None:
+                    cached.pop(img_file, None)
+                    continue
+                score = quality_score(info["width"], info["height"], info["format"], info["brightness"])
+                cached[img_file] = [sizes[img_file], key, score, HASH_VERSION]
         
-        # Calculer le hash de chaque image
         for img_file in image_files:
-            img_path = os.path.join(folder_path, img_file)
-            try:
-                img = Image.open(img_path).convert("RGB")
-                img_hash = compute_image_hash(img)
-                
-                # Stocker avec score de qualité
-                quality_score = get_image_quality_score(img_path)
-                hash_to_images[img_hash].append((img_file, quality_score))
-            except Exception as e:
-                print(f"   ⚠️  Erreur sur {img_file}: {e}")
+            if img_file not in cached:
+                print(f"   ⚠️  Image illisible : {img_file}")
+                entries[img_file] = {"file": img_file, "hash": None,
+                                     "score": 0, "action": "error"}
+                continue
+            _, img_hash, quality, _ = cached[img_file]
+            hash_to_images[img_hash].append((img_file, quality))
+            entries[img_file] = {"file": img_file, "hash": img_hash,
+                                 "score": quality, "action": "keep"}
         
-        # Créer backup pour doublons
-        backup_dir = os.path.join(dataset_dir, f"_backup_{folder}_duplicates")
-        os.makedirs(backup_dir, exist_ok=True)
+        for img_file in set(cached) - set(image_files):
+            del cached[img_file]
         
-        # Garder la meilleure image de chaque groupe de doublons
+        # Doublons : garder la meilleure image de chaque groupe
         unique_images = []
-        duplicates_found = 0
-        
-        for img_hash, images in hash_to_images.items():
-            if len(images) > 1:
-                duplicates_found += len(images) - 1
-                # Trier par qualité décroissante
-                images.sort(key=lambda x: x[1], reverse=True)
-            
-            # Garder la meilleure
-            best_image = images[0][0]
-            unique_images.append(best_image)
-            
-            # Déplacer les doublons vers backup
+        for images in hash_to_images.values():
+            images.sort(key=lambda x: x[1], reverse=True)
+            unique_images.append(images[0])
             for img_file, _ in images[1:]:
-                src = os.path.join(folder_path, img_file)
-                dst = os.path.join(backup_dir, img_file)
-                shutil.move(src, dst)
-        
-        if duplicates_found > 0:
-            print(f"   🗑️  Doublons supprimés : {duplicates_found}")
-            total_duplicates += duplicates_found
-        else:
-            print(f"   ✅ Aucun doublon détecté")
+                entries[img_file]["action"] = "duplicate"
         
-        after_dedup_count = len(unique_images)
+        # Équilibrage : garder les 'target' meilleures images uniques
+        unique_images.sort(key=lambda x: x[1], reverse=True)
+        for img_file, _ in unique_images[target:]:
+            entries[img_file]["action"] = "excess"
         
-        # ====================================================================
-        # ÉTAPE 2 : ÉQUILIBRAGE À TARGET IMAGES
-        # ====================================================================
+        # Destinations des déplacements
+        moved_actions = ("duplicate", "excess") if move_excess else ("duplicate",)
+        for entry in entries.values():
+            if entry["action"] in moved_actions:
+                backup_name = f"_backup_{folder}_{BACKUP_SUFFIXES[entry['action']]}"
+                backup_dir = os.path.join(dataset_dir, backup_name)
+                dest = _unique_destination(backup_dir, entry["file"], reserved)
+                entry["dest"] = os.path.join(backup_name, dest)
         
-        if after_dedup_count > target:
-            # Créer backup pour images en trop
-            backup_excess_dir = os.path.join(dataset_dir, f"_backup_{folder}_excess")
-            os.makedirs(backup_excess_dir, exist_ok=True)
-            
-            # Sélectionner les meilleures images
-            images_with_scores = []
-            for img_file in unique_images:
-                img_path = os.path.join(folder_path, img_file)
-                score = get_image_quality_score(img_path)
-                images_with_scores.append((img_file, score))
-            
-            # Trier par qualité et garder les N meilleures
-            images_with_scores.sort(key=lambda x: x[1], reverse=True)
-            images_to_keep = [img for img, _ in images_with_scores[:target]]
-            images_to_remove = [img for img, _ in images_with_scores[target:]]
-            
-            # Déplacer les images en trop
-            for img_file in images_to_remove:
-                src = os.path.join(folder_path, img_file)
-                dst = os.path.join(backup_excess_dir, img_file)
-                if os.path.exists(src):
-                    shutil.move(src, dst)
-            
-            removed_count = len(images_to_remove)
-            total_removed += removed_count
-            print(f"   ✂️  Images en trop : {removed_count} (gardées les {target} meilleures)")
-        
-        elif after_dedup_count < target:
-            print(f"   ⚠️  Seulement {after_dedup_count} images (manque {target - after_dedup_count})")
+        duplicates = sum(1 for e in entries.values() if e["action"] == "duplicate")
+        excess = sum(1 for e in entries.values() if e["action"] == "excess")
+        kept = sum(1 for e in entries.values() if e["action"] == "keep")
+        print(f"   Images initiales : {len(image_files)}")
+        if move_excess:
+            print(f"   🗑️  Doublons : {duplicates} | ✂️  En trop : {excess} | ✅ Gardées : {kept}")
         else:
-            print(f"   ✅ Exactement {target} images")
+            print(f"   🗑️  Doublons : {duplicates} | ✅ Gardées : {kept + excess} "
+                  f"(dont {excess} au-delà de {target}, équilibrées à l'entraînement)")
         
-        final_count = min(after_dedup_count, target)
-        print(f"   📊 Résultat : {initial_count} → {final_count} images")
+        plan["classes"][folder] = {
+            "initial": len(image_files),
+            "entries": [entries[f] for f in image_files]
+        }
+    
+    return plan
+
+def new_manifest_path(dataset_dir, name=None):
+    """Chemin horodaté d'un nouveau manifest : un plan n'écrase jamais un manifest précédent"""
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    base = os.path.join(dataset_dir, "_".join(filter(None, [MANIFEST_PREFIX, name, stamp])))
+    path, suffix = base + ".json", 1
+    while os.path.exists(path):
+        path = f"{base}_{suffix}.json"
+        suffix += 1
+    return path
+
+def save_manifest(plan, manifest_path):
+    """Écrit le manifest de façon atomique (fichier temporaire + rename)
+
+    Refuse d'écraser le manifest appliqué d'un autre plan : son annulation serait perdue.
+    """
+    try:
+        existing = load_manifest(manifest_path)
+    except (OSError, ValueError):
+        existing = None
+    if (existing and existing.get("status") in ("applied", "partial")
+            and existing.get("created") != plan["created"]):
+        raise FileExistsError(f"Manifest appliqué d'un autre plan (annulation perdue) : {manifest_path}")
+    
+    tmp_path = manifest_path + ".tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(plan, f, indent=2)
+    os.replace(tmp_path, manifest_path)
+
+def load_manifest(manifest_path):
+    """Charge un manifest produit par plan_duplicates_and_balance"""
+    with open(manifest_path) as f:
+        return json.load(f)
+
+def _plan_entries(plan):
+    """Entrées à déplacer et leurs déplacements (src, dst), dans le même ordre"""
+    dataset_dir = plan["dataset_dir"]
+    entries, moves = [], []
+    for folder, info in plan["classes"].items():
+        for entry in info["entries"]:
+            if entry.get("dest"):
+                entries.append((folder, entry))
+                moves.append((os.path.join(dataset_dir, folder, entry["file"]),
+                              os.path.join(dataset_dir, entry["dest"])))
+    return entries, moves
+
+def _plan_moves(plan):
+    """Liste des déplacements (src, dst) décrits par le plan"""
+    return _plan_entries(plan)[1]
+
+def _transactional_moves(moves, on_moved=None):
+    """Déplace tout ou rien : hardlinks puis suppression des sources, sinon renames annulables
+    
+    on_moved(i) est appelé dès que le déplacement i est terminé (source retirée) :
+    si la phase 2 échoue, l'appelant sait quelles entrées sont déjà déplacées.
+    """
+    on_moved = on_moved or (lambda i: None)
+    for src, dst in moves:
+        if not os.path.exists(src):
+            raise FileNotFoundError(f"Source manquante : {src}")
+        if os.path.exists(dst):
+            raise FileExistsError(f"Destination déjà présente : {dst}")
+    
+    for _, dst in moves:
+        os.makedirs(os.path.dirname(dst), exist_ok=True)
+    
+    # Phase 1 : hardlinks (les sources restent intactes tant que tout n'a pas réussi)
+    linked = []
+    try:
+        for src, dst in moves:
+            os.link(src, dst)
+            linked.append(dst)
+    except OSError:
+        for dst in linked:
+            os.unlink(dst)
+        linked = None
+    
+    if linked is not None:
+        # Phase 2 : suppression des sources, progression notée entrée par entrée
+        for i, (src, _) in enumerate(moves):
+            os.unlink(src)
+            on_moved(i)
+        return "link"
+    
+    # Système de fichiers sans hardlinks : renames, annulés en cas d'échec
+    done = []
+    try:
+        for src, dst in moves:
+            os.replace(src, dst)
+            done.append((src, dst))
+    except OSError:
+        for src, dst in reversed(done):
+            os.replace(dst, src)
+        raise
+    for i in range(len(moves)):
+        on_moved(i)
+    return "rename"
+
+def apply_plan(plan, manifest_path=None):
+    """Applique un plan de façon atomique, sans relire aucune image"""
+    if plan["status"] == "applied":
+        print("ℹ️  Plan déjà appliqué")
+        return plan
+    if plan["status"] == "partial":
+        print("⚠️  Plan appliqué en partie : l'annuler d'abord (--rollback)")
+        return plan
+    
+    entries, moves = _plan_entries(plan)
+    
+    def on_moved(i):
+        entries[i][1]["moved"] = True
+    
+    try:
+        method = _transactional_moves(moves, on_moved)
+    except OSError:
+        # Échec en phase 2 : le manifest garde les entrées déjà déplacées pour le rollback
+        moved = sum(1 for _, entry in entries if entry.get("moved"))
+        if moved:
+            plan["status"] = "partial"
+            if manifest_path:
+                save_manifest(plan, manifest_path)
+            print(f"❌ Application interrompue après {moved}/{len(moves)} fichiers déplacés")
+            if manifest_path:
+                print(f"   Annuler : python script_supp_doublons.py --rollback {manifest_path}")
+        raise
+    
+    # Le catalogue et le store restent à jour sans re-lister les dossiers
+    catalog = get_catalog(plan["dataset_dir"])
+    store = find_store(plan["dataset_dir"])
+    for folder, entry in entries:
+        catalog.discard(folder, entry["file"])
+        if store is not None:
+            store.discard(folder, entry["file"])
+    if store is not None:
+        store.save()
+    
+    plan["status"] = "applied"
+    plan["applied"] = datetime.now().isoformat()
+    plan["method"] = method
+    if manifest_path:
+        save_manifest(plan, manifest_path)
+    
+    print(f"✅ {len(moves)} fichiers déplacés ({method})")
+    return plan
+
+def rollback_plan(plan, manifest_path=None):
+    """Restaure le dataset à partir du manifest, sans relire aucune image"""
+    if plan["status"] not in ("applied", "partial"):
+        print("ℹ️  Rien à annuler (plan non appliqué)")
+        return plan
+    
+    entries, moves = _plan_entries(plan)
+    if plan["status"] == "partial":
+        # Entrées non déplacées : seul le hardlink de la phase 1 reste à retirer
+        for (_, entry), (src, dst) in zip(entries, moves):
+            if not entry.get("moved") and os.path.exists(dst) and os.path.samefile(src, dst):
+                os.unlink(dst)
+        moves = [move for (_, entry), move in zip(entries, moves) if entry.get("moved")]
+    
+    moves = [(dst, src) for src, dst in moves]
+    method = _transactional_moves(moves)
+    get_catalog(plan["dataset_dir"]).invalidate()
+    
+    # Les images restaurées redeviennent des vues du store (blobs encore présents)
+    store = find_store(plan["dataset_dir"])
+    if store is not None:
+        store.sync(list(plan["classes"]))
+        store.save()
+    
+    for _, entry in entries:
+        entry.pop("moved", None)
+    plan["status"] = "rolled_back"
+    plan["rolled_back"] = datetime.now().isoformat()
+    if manifest_path:
+        save_manifest(plan, manifest_path)
+    
+    print(f"↩️  {len(moves)} fichiers restaurés ({method})")
+    return plan
+
+def remove_duplicates_and_balance(dataset_dir="dataset", target=150, dry_run=False, folders=None,
+                                  move_excess=True):
+    """Supprime les doublons ET équilibre à 'target' images par classe
+    
+    move_excess=False : seuls les doublons sont déplacés, l'équilibrage est
+    laissé à l'entraînement (aucune image collectée n'est mise de côté)
+    """
+    
+    print("\n" + "="*70)
+    print(f"🔧 NETTOYAGE + ÉQUILIBRAGE DU DATASET")
+    print("="*70)
+    print(f"1️⃣  Suppression des doublons")
+    if move_excess:
+        print(f"2️⃣  Équilibrage à {target} images par classe")
+    else:
+        print(f"2️⃣  Équilibrage à l'entraînement (images en trop conservées)")
+    if dry_run:
+        print(f"🧪 Mode plan : aucun fichier ne sera déplacé")
+    print("="*70 + "\n")
+    
+    plan = plan_duplicates_and_balance(dataset_dir, target, folders, move_excess=move_excess)
+    
+    # Conflits d'étiquette : une passe globale sur toutes les classes
+    store = find_store(dataset_dir)
+    if store is not None:
+        print_collisions(store)
+        store.save()
+    
+    manifest_path = new_manifest_path(dataset_dir)
+    save_manifest(plan, manifest_path)
+    
+    total_duplicates = sum(1 for info in plan["classes"].values()
+                           for e in info["entries"] if e["action"] == "duplicate")
+    total_removed = sum(1 for info in plan["classes"].values()
+                        for e in info["entries"] if e["action"] == "excess" and e.get("dest"))
+    
+    if dry_run:
+        print(f"\n💾 Plan sauvegardé : {manifest_path}")
+        print(f"   Appliquer : python script_supp_doublons.py --apply {manifest_path}")
+        print(f"🗑️  Doublons prévus : {total_duplicates}")
+        print(f"✂️  Images en trop prévues : {total_removed}")
+        return plan
+    
+    apply_plan(plan, manifest_path)
     
     # ====================================================================
     # RAPPORT FINAL
@@ -175,24 +418,27 @@ def remove_duplicates_and_balance(dataset_dir="dataset", target=150):
     print(f"✂️  Total images en trop : {total_removed}")
     print("="*70)
     
-    # Rapport final du dataset
+    print_dataset_report(dataset_dir, target)
+    print(f"↩️  Annulation possible : python script_supp_doublons.py --rollback {manifest_path}")
+    return plan
+
+def print_dataset_report(dataset_dir="dataset", target=150):
+    """Rapport final du dataset"""
     print("\n📊 DATASET FINAL :")
     print("-"*70)
     total = 0
     classes_below_target = []
+    catalog = get_catalog(dataset_dir)
     
-    for folder in sorted(os.listdir(dataset_dir)):
-        folder_path = os.path.join(dataset_dir, folder)
-        if os.path.isdir(folder_path) and not folder.startswith('_backup'):
-            count = len([f for f in os.listdir(folder_path) 
-                        if f.lower().endswith(('.jpg', '.jpeg', '.png'))])
-            total += count
-            
-            status = "✅" if count >= target else "⚠️"
-            print(f"{status} {folder:25} {count:3}/{target} images")
-            
-            if count < target:
-                classes_below_target.append((folder, count, target - count))
+    for folder in catalog.folders():
+        count = catalog.count(folder)
+        total += count
+        
+        status = "✅" if count >= target else "⚠️"
+        print(f"{status} {folder:25} {count:3}/{target} images")
+        
+        if count < target:
+            classes_below_target.append((folder, count, target - count))
     
     print("-"*70)
     print(f"📈 Total: {total} images")
@@ -204,6 +450,7 @@ def remove_duplicates_and_balance(dataset_dir="dataset", target=150):
     else:
         print(f"\n🎉 DATASET PARFAITEMENT ÉQUILIBRÉ !")
     
+    catalog.save_if_persistent()
     print(f"\n💾 Backups sauvegardés dans dataset/_backup_*")
     print(f"🚀 Dataset prêt pour l'entraînement !")
     print("="*70)
@@ -217,4 +464,23 @@ if __name__ == "__main__":
         os.system("pip install numpy")
         import numpy
     
-    remove_duplicates_and_balance(target=150)
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Nettoyage + équilibrage du dataset")
+    parser.add_argument("--dataset", default="dataset", help="Dossier du dataset")
+    parser.add_argument("--target", type=int, default=load_registry()["balance_target"],
+                        help="Images par classe (défaut : balance_target de classes.json)")
+    parser.add_argument("--balance", choices=BALANCE_MODES, default=balance_mode(),
+                        help="move : déplace les images en trop ; weights / sampler : "
+                             "les garde, équilibrage à l'entraînement (défaut : classes.json)")
+    parser.add_argument("--plan", action="store_true",
+                        help="Calcule le manifest sans déplacer de fichiers")
+    parser.add_argument("--apply", metavar="MANIFEST", help="Applique un manifest existant")
+    parser.add_argument("--rollback", metavar="MANIFEST", help="Annule un manifest appliqué")
+    args = parser.parse_args()
+    
+    if args.apply:
+        apply_plan(load_manifest(args.apply), args.apply)
+    elif args.rollback:
+        rollback_plan(load_manifest(args.rollback), args.rollback)
+    else:
+        remove_duplicates_and_balance(args.dataset, target=args.target, dry_run=args.plan,
+                                      folders=class_folders(), move_excess=args.balance == "move")
@@ -0,0 +1,224 @@
+"""
+Enregistrement / rejeu des sessions du scraper (sans réseau)
+
+    python multi_brand_scraper.py --record sessions/run1     # session réelle enregistrée
+    python multi_brand_scraper.py --replay sessions/run1     # même session, hors ligne
+
+L'archive contient, par requête de recherche, la suite des appels au
+navigateur (scripts et leurs résultats, instantanés du HTML), et toutes les
+réponses HTTP (pages de recherche JSON et images). Au rejeu, ReplayDriver et
+ReplaySession renvoient ces résultats dans le même ordre : extraction,
+filtrage, hash et téléchargement passent par le code réel, sans attente.
+"""
+
+import os
+import json
+import gzip
+import hashlib
+import tempfile
+import threading
+import requests
+
+INDEX_FILE = "session.json"
+
+def _key(method, url):
+    return f"{method.upper()} {url}"
+
+def _request_key(method, url, params=None):
+    """Clé d'une requête : URL demandée (avant redirections), paramètres compris"""
+    return _key(method, requests.Request(method, url, params=params).prepare().url)
+
+class SessionArchive:
+    """Archive d'une session : mode 'record' ou 'replay'"""
+
+    def __init__(self, path, mode):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Mode inconnu: {mode}")
+        self.path, self.mode = path, mode
+        self._lock = threading.Lock()
+        self._http = None
+        if mode == "replay":
+            with open(os.path.join(path, INDEX_FILE)) as f:
+                self.index = json.load(f)
+        else:
+            os.makedirs(os.path.join(path, "pages"), exist_ok=True)
+            os.makedirs(os.path.join(path, "responses"), exist_ok=True)
+            self.index = {"drivers": {}, "responses": {}}
+
+    @property
+    def replay(self):
+        return self.mode == "replay"
+
+    def save(self):
+        if self.mode != "record":
+            return
+        with self._lock:
+            tmp_path = os.path.join(self.path, INDEX_FILE + ".tmp")
+            with open(tmp_path, "w") as f:
+                json.dump(self.index, f, indent=1)
+            os.replace(tmp_path, os.path.join(self.path, INDEX_FILE))
+
+    # -----------------------------------------------------------------
+    # Fichiers
+    # -----------------------------------------------------------------
+
+    def write_blob(self, folder, data, suffix=""):
+        """Écrit un contenu adressé par son hash (dédupliqué) ; retourne son chemin relatif"""
+        name = os.path.join(folder, hashlib.sha256(data).hexdigest()[:20] + suffix)
+        path = os.path.join(self.path, name)
+        if not os.path.exists(path):
+            # Fichier temporaire propre à l'appel : deux threads peuvent écrire le même contenu
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        return name
+
+    def read_blob(self, name):
+        with open(os.path.join(self.path, name), "rb") as f:
+            return f.read()
+
+    # -----------------------------------------------------------------
+    # Fabriques
+    # -----------------------------------------------------------------
+
+    def driver(self, query, factory=None):
+        """Navigateur pour une recherche : réel et enregistré, ou rejoué"""
+        if self.replay:
+            return ReplayDriver(self, self.index["drivers"].get(query, []))
+        events = self.index["drivers"].setdefault(query, [])
+        return RecordingDriver(self, factory(), events)
+
+    def http(self):
+        """Session HTTP partagée (thread-safe) : enregistrée ou rejouée"""
+        if self._http is None:
+            self._http = ReplaySession(self) if self.replay else RecordingSession(self)
+        return self._http
+
+# =====================================================================
+# NAVIGATEUR
+# =====================================================================
+
+class RecordingDriver:
+    """Enveloppe un driver Selenium et enregistre ses résultats
+
+    Les appels consécutifs au même script (attente qui scrute la hauteur de
+    page) sont fusionnés : seul le dernier résultat est gardé, ce qui rend le
+    rejeu indépendant du nombre de sondages faits pendant l'enregistrement.
+    """
+
+    def __init__(self, archive, driver, events):
+        self.archive, self._driver, self.events = archive, driver, events
+
+    def _record(self, call, arg=None, **data):
+        last = self.events[-1] if self.events else None
+        if last and last["call"] == call and last.get("arg") == arg:
+            last.update(data)
+        else:
+            self.events.append({"call": call, "arg": arg, **data})
+
+    def get(self, url):
+        self._record("get", url)
+        return self._driver.get(url)
+
+    def execute_script(self, script, *args):
+        value = self._driver.execute_script(script, *args)
+        self._record("script", script, value=value)
+        return value
+
+    @property
+    def page_source(self):
+        html = self._driver.page_source
+        self._record("page_source", file=self.archive.write_blob("pages", gzip.compress(html.encode()), ".html.gz"))
+        return html
+
+    def quit(self):
+        self.archive.save()
+        return self._driver.quit()
+
+class DivergedSession(RuntimeError):
+    """Le code rejoué ne fait plus les mêmes appels que pendant l'enregistrement"""
+
+class ReplayDriver:
+    """Rejoue les appels enregistrés d'un navigateur, dans l'ordre"""
+
+    replay = True
+
+    def __init__(self, archive, events):
+        self.archive, self.events = archive, events
+        self._position = -1
+
+    def _next(self, call, arg=None):
+        # Un même appel répété reste sur l'événement courant (attente qui sonde)
+        current = self.events[self._position] if self._position >= 0 else None
+        if current and current["call"] == call and current.get("arg") == arg:
+            return current
+        for position in range(self._position + 1, len(self.events)):
+            event = self.events[position]
+            if event["call"] == call and event.get("arg") == arg:
+                self._position = position
+                return event
+        raise DivergedSession(f"Appel absent de l'archive: {call} {str(arg)[:60]}")
+
+    def get(self, url):
+        self._next("get", url)
+
+    def execute_script(self, script, *args):
+        return self._next("script", script).get("value")
+
+    @property
+    def page_source(self):
+        event = self._next("page_source")
+        return gzip.decompress(self.archive.read_blob(event["file"])).decode()
+
+    def quit(self):
+        pass
+
+# =====================================================================
+# HTTP
+# =====================================================================
+
+class RecordingSession(requests.Session):
+    """Session requests qui archive chaque réponse (corps compris)"""
+
+    def __init__(self, archive):
+        super().__init__()
+        self.archive = archive
+
+    def request(self, method, url, *args, **kwargs):
+        response = super().request(method, url, *args, **kwargs)
+        body = response.content      # Lit tout le corps (stream=True compris)
+        entry = {"status": response.status_code,
+                 "content_type": response.headers.get("Content-Type"),
+                 "file": self.archive.write_blob("responses", body)}
+        with self.archive._lock:
+            # Clé de l'URL demandée (comme au rejeu), pas de l'URL finale après redirections
+            self.archive.index["responses"][_request_key(method, url, kwargs.get("params"))] = entry
+        return response
+
+class ReplaySession(requests.Session):
+    """Session requests servie depuis l'archive (404 pour une URL jamais vue)"""
+
+    replay = True
+
+    def __init__(self, archive):
+        super().__init__()
+        self.archive = archive
+
+    def request(self, method, url, *args, **kwargs):
+        prepared = requests.Request(method, url, params=kwargs.get("params")).prepare()
+        entry = self.archive.index["responses"].get(_request_key(method, url, kwargs.get("params")))
+
+        response = requests.Response()
+        response.url, response.request = prepared.url, prepared
+        if entry is None:
+            response.status_code, response._content = 404, b""
+        else:
+            response.status_code = entry["status"]
+            response._content = self.archive.read_blob(entry["file"])
+            if entry["content_type"]:
+                response.headers["Content-Type"] = entry["content_type"]
+        # Corps déjà en mémoire : iter_content() le découpe sans lire de socket
+        response._content_consumed = True
+        response.encoding = "utf-8"
+        return response
@@ -0,0 +1,186 @@
+"""
+Vérification d'un export TensorFlow.js
+
+    python tfjs_validator.py --model trained_model/final_model.h5 --tfjs-dir ../../SneackScan/assets/model
+
+Relit model.json + shards tels que l'application les chargera (dtype et
+quantification du manifeste), reconstruit le modèle avec ces poids, compare ses
+prédictions à celles du modèle Keras sur un batch fixe et mesure temps de
+chargement, poids téléchargés et latence par image. Une dérive lève une erreur.
+"""
+
+import os
+import json
+import time
+import argparse
+import numpy as np
+from tensorflow import keras
+
+from backbone_report import cpu_latency_ms
+
+# Tolérances sur les probabilités (max |Δ|) et accord minimal du top-1
+FLOAT_TOLERANCE = 1e-4
+QUANTIZED_TOLERANCE = 5e-2
+MIN_TOP1_AGREEMENT = 1.0
+QUANTIZED_MIN_TOP1_AGREEMENT = 0.98
+
+SAMPLE_SIZE = 32
+SAMPLE_SEED = 1234
+
+DTYPES = {"float32": np.float32, "int32": np.int32, "bool": np.bool_}
+
+# =====================================================================
+# LECTURE DES ARTEFACTS
+# =====================================================================
+
+def _stored_dtype(spec):
+    quantization = spec.get("quantization")
+    return np.dtype(quantization["dtype"] if quantization else DTYPES[spec["dtype"]])
+
+def weight_nbytes(spec):
+    """Octets occupés par un poids dans les shards (après quantification éventuelle)"""
+    count = int(np.prod(spec["shape"])) if spec["shape"] else 1
+    return count * _stored_dtype(spec).itemsize
+
+def _decode(buffer, offset, spec):
+    """Décode un poids du manifeste (float32/int32/bool ou quantifié uint8/uint16/float16)"""
+    count = int(np.prod(spec["shape"])) if spec["shape"] else 1
+    dtype = _stored_dtype(spec)
+    values = np.frombuffer(buffer, dtype, count, offset)
+    quantization = spec.get("quantization")
+    if quantization and dtype != np.float16:
+        values = values.astype(np.float32) * quantization["scale"] + quantization["min"]
+    elif quantization:
+        values = values.astype(np.float32)
+    return values.reshape(spec["shape"]), weight_nbytes(spec)
+
+def read_tfjs_weights(tfjs_dir):
+    """Poids d'un export TF.js par nom, octets lus et temps de chargement"""
+    start = time.perf_counter()
+    with open(os.path.join(tfjs_dir, "model.json")) as f:
+        model_json = json.load(f)
+
+    weights, total_bytes, quantized = {}, 0, False
+    for group in model_json["weightsManifest"]:
+        buffer = b""
+        for path in group["paths"]:
+            with open(os.path.join(tfjs_dir, path), "rb") as f:
+                buffer += f.read()
+        total_bytes += len(buffer)
+        offset = 0
+        for spec in group["weights"]:
+            weights[spec["name"]], size = _decode(buffer, offset, spec)
+            quantized = quantized or "quantization" in spec
+            offset += size
+    load_seconds = time.perf_counter() - start
+    return model_json, weights, total_bytes, load_seconds, quantized
+
+def weight_key(name):
+    """Clé comparable entre TF.js et Keras : 'couche/variable' sans suffixe ':0'"""
+    return "/".join(name.split(":")[0].split("/")[-2:])
+
+def rebuild_model(reference, tfjs_dir, model_json, weights):
+    """Modèle reconstruit depuis l'export : topologie TF.js si possible, sinon celle de référence"""
+    try:
+        import tensorflowjs as tfjs
+        return tfjs.converters.load_keras_model(os.path.join(tfjs_dir, "model.json"))
+    except ImportError:
+        pass
+
+    if model_json.get("format") == "graph-model":
+        raise RuntimeError("Export graph-model : vérification possible uniquement avec tensorflowjs")
+    model = keras.models.clone_model(reference)
+    model.build(reference.input_shape)
+    variables = model.weights
+    by_key = {}
+    for variable in variables:
+        by_key.setdefault(weight_key(getattr(variable, "path", variable.name)), []).append(variable)
+
+    names = list(weights)
+    if len(names) != len(variables):
+        raise RuntimeError(f"Export incomplet: {len(names)} poids TF.js pour {len(variables)} variables")
+    for i, name in enumerate(names):
+        matches = by_key.get(weight_key(name), [])
+        # Nom ambigu ou inconnu : l'ordre du manifeste suit celui de model.weights
+        variable = matches[0] if len(matches) == 1 else variables[i]
+        if tuple(variable.shape) != weights[name].shape:
+            raise RuntimeError(f"Forme incompatible pour {name}: "
+                               f"{weights[name].shape} vs {tuple(variable.shape)}")
+        variable.assign(weights[name].astype(variable.dtype))
+    return model
+
+# =====================================================================
+# VALIDATION
+# =====================================================================
+
+def sample_batch(model, validation_batch=None):
+    """Batch de validation fixe (ou images aléatoires reproductibles à défaut)"""
+    if validation_batch is not None:
+        return np.asarray(validation_batch[:SAMPLE_SIZE], dtype=np.float32)
+    rng = np.random.default_rng(SAMPLE_SEED)
+    return rng.uniform(0, 1, (SAMPLE_SIZE, *model.input_shape[1:])).astype(np.float32)
+
+def validate_export(model, tfjs_dir, validation_batch=None, report_path=None):
+    """Compare l'export TF.js au modèle Keras ; lève RuntimeError en cas de dérive"""
+    print("\n" + "="*60)
+    print("VÉRIFICATION DE L'EXPORT TF.JS")
+    print("="*60)
+
+    model_json, weights, total_bytes, load_seconds, quantized = read_tfjs_weights(tfjs_dir)
+    exported = rebuild_model(model, tfjs_dir, model_json, weights)
+
+    x = sample_batch(model, validation_batch)
+    expected = model.predict_on_batch(x)
+    exported.predict_on_batch(x)  # Échauffement (traçage du graphe)
+    start = time.perf_counter()
+    actual = exported.predict_on_batch(x)
+    batch_ms = (time.perf_counter() - start) * 1000 / len(x)
+
+    max_diff = float(np.abs(expected - actual).max())
+    agreement = float((expected.argmax(1) == actual.argmax(1)).mean())
+    tolerance = QUANTIZED_TOLERANCE if quantized else FLOAT_TOLERANCE
+    min_agreement = QUANTIZED_MIN_TOP1_AGREEMENT if quantized else MIN_TOP1_AGREEMENT
+
+    report = {
+        "tfjs_dir": tfjs_dir,
+        "weight_bytes": total_bytes,
+        "quantized": quantized,
+        "load_seconds": load_seconds,
+        "ms_per_image_batch": batch_ms,
+        "ms_per_image_single": cpu_latency_ms(exported, tuple(model.input_shape[1:3])),
+        "max_abs_diff": max_diff,
+        "top1_agreement": agreement,
+        "tolerance": tolerance,
+        "samples": len(x),
+        "passed": max_diff <= tolerance and agreement >= min_agreement,
+    }
+
+    print(f"Poids:            {total_bytes / 1024 ** 2:.2f} Mo" + (" (quantifiés)" if quantized else ""))
+    print(f"Chargement:       {load_seconds * 1000:.0f} ms")
+    print(f"Latence / image:  {report['ms_per_image_single']:.2f} ms (batch 1), "
+          f"{batch_ms:.2f} ms (batch {len(x)})")
+    print(f"Écart max:        {max_diff:.2e} (tolérance {tolerance:.0e})")
+    print(f"Accord top-1:     {agreement * 100:.1f}% sur {len(x)} images")
+
+    if report_path:
+        with open(report_path, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if not report["passed"]:
+        raise RuntimeError(f"❌ Export TF.js divergent (écart {max_diff:.2e}, "
+                           f"accord top-1 {agreement * 100:.1f}%)")
+    print("✅ Export TF.js conforme au modèle Keras")
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description="Vérifie un export TF.js contre le modèle Keras")
+    parser.add_argument("--model", default="trained_model/final_model.h5")
+    parser.add_argument("--tfjs-dir", default="../../SneackScan/assets/model")
+    parser.add_argument("--report", default=None, help="Rapport JSON (optionnel)")
+    args = parser.parse_args()
+
+    model = keras.models.load_model(args.model)
+    validate_export(model, args.tfjs_dir, report_path=args.report)
+
+if __name__ == "__main__":
+    main()
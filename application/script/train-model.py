@@ -5,15 +5,26 @@ Export automatique en TensorFlow.js pour React Native
 """
 
 import os
+import sys
 import json
+import argparse
 import numpy as np
 import tensorflow as tf
 from tensorflow import keras
 from tensorflow.keras import layers, models
-from tensorflow.keras.applications import MobileNetV2
+from tensorflow.keras.applications import (MobileNetV2, MobileNetV3Small,
+                                           MobileNetV3Large, EfficientNetV2B0)
 from tensorflow.keras.preprocessing.image import ImageDataGenerator
-import matplotlib.pyplot as plt
 from datetime import datetime
+from training_profiler import StepProfiler, EpochTimer
+from training_state import (PhaseState, ResumableCheckpoint, StageCarry, dataset_fingerprint,
+                            file_fingerprint, fingerprint)
+from tfjs_validator import validate_export
+from model_store import publish, backbone_keys
+from evaluation import evaluate, print_report
+from class_registry import class_folders, class_labels, balance_mode, BALANCE_MODES
+from class_balance import ManifestBatches, class_weights, planned_exclusions
+from dataset_report import verify_dataset as check_dataset
 
 # =====================================================================
 # CONFIGURATION
@@ -23,6 +34,11 @@ from datetime import datetime
 DATASET_DIR = "dataset"  # Dossier contenant les 10 sous-dossiers de classes
 OUTPUT_DIR = "trained_model"
 TFJS_DIR = "../../SneackScan/assets/model"  # Export vers React Native
+MODEL_STORE_DIR = "model_store"  # Versions publiées (shards par hash de contenu)
+
+# Backbone pré-entraîné (voir BACKBONES) et largeur (alpha, MobileNet uniquement)
+BACKBONE = "mobilenet_v2"
+BACKBONE_ALPHA = 1.0
 
 # Hyperparamètres
 IMG_SIZE = (224, 224)
@@ -30,71 +46,107 @@ BATCH_SIZE = 32
 EPOCHS = 50
 LEARNING_RATE = 0.0001
 VALIDATION_SPLIT = 0.2
+DENSE_UNITS = 128
+DROPOUT_RATE = 0.3        # Après le GlobalAveragePooling
+DENSE_DROPOUT_RATE = 0.2  # Après la couche dense
+FINE_TUNE_LAYERS = 30     # Couches du backbone dégelées au fine-tuning
+FINE_TUNE_EPOCHS = 20
+
+# Redimensionnement progressif (--progressive) : les premières epochs de chaque phase
+# tournent à basse résolution, avec un batch agrandi d'autant (même coût par step) ;
+# la validation reste à IMG_SIZE et le modèle exporté a une entrée IMG_SIZE fixe
+PROGRESSIVE_RESIZING = False
+PROGRESSIVE_SCHEDULE = ((128, 0.4), (160, 0.3))   # (résolution, part des epochs), IMG_SIZE ensuite
+TARGET_ACCURACY = None    # Temps pour atteindre cette val_accuracy (défaut : la meilleure du run)
+
+# Équilibrage des classes (voir class_balance) : "move" (déjà équilibré sur disque),
+# "weights" (perte pondérée) ou "sampler" (epochs à parts égales entre classes)
+CLASS_BALANCE = balance_mode()
+EVAL_TTA = ("flip",)      # Vues TTA de l'évaluation finale (voir evaluation.TTA_MODES)
+EXPORT_TFJS = True        # False : l'export est laissé à un autre étage (pipeline.py)
+
+# Profilage (--profile) : temps par step, mémoire, trace TF Profiler
+PROFILE_TRAINING = False
+PROFILE_STEPS = (20, 30)  # Fenêtre de steps tracée par le TF Profiler
+HISTOGRAM_FREQ = 1        # Histogrammes TensorBoard (coûteux, désactivés en profilage)
+
+# Reprise : chaque phase est sauvegardée à chaque epoch dans OUTPUT_DIR/state/
+RESUME_TRAINING = True    # False (--fresh) : ignore les états sauvegardés
+HEAD_MODEL_PATH = None    # --from-head : démarre directement au fine-tuning
+
+# Classes = dossiers du dataset, dans l'ordre des sorties du modèle (registre classes.json)
+# Les libellés exportés vers l'application viennent du même registre (class_labels)
+CLASSES = class_folders()
+
+# Backbones disponibles : tous reçoivent des entrées dans [-1, 1] (couche Rescaling)
+BACKBONES = {
+    "mobilenet_v2": lambda shape, alpha: MobileNetV2(
+        input_shape=shape, alpha=alpha, include_top=False, weights='imagenet'),
+    "mobilenet_v3_small": lambda shape, alpha: MobileNetV3Small(
+        input_shape=shape, alpha=alpha, include_top=False, weights='imagenet',
+        include_preprocessing=False),
+    "mobilenet_v3_large": lambda shape, alpha: MobileNetV3Large(
+        input_shape=shape, alpha=alpha, include_top=False, weights='imagenet',
+        include_preprocessing=False),
+    # Plus proche équivalent d'EfficientNet-Lite disponible dans keras.applications
+    "efficientnet_v2_b0": lambda shape, alpha: EfficientNetV2B0(
+        input_shape=shape, include_top=False, weights='imagenet',
+        include_preprocessing=False),
+}
+
+def hyperparameters():
+    """Hyperparamètres qui conditionnent le résultat d'une phase d'entraînement"""
+    return {
+        "classes": CLASSES,
+        "backbone": BACKBONE,
+        "backbone_alpha": BACKBONE_ALPHA,
+        "img_size": list(IMG_SIZE),
+        "batch_size": BATCH_SIZE,
+        "epochs": EPOCHS,
+        "learning_rate": LEARNING_RATE,
+        "validation_split": VALIDATION_SPLIT,
+        "dense_units": DENSE_UNITS,
+        "dropout_rate": DROPOUT_RATE,
+        "dense_dropout_rate": DENSE_DROPOUT_RATE,
+        "fine_tune_layers": FINE_TUNE_LAYERS,
+        "fine_tune_epochs": FINE_TUNE_EPOCHS,
+        "class_balance": CLASS_BALANCE,
+        "progressive": [list(stage) for stage in PROGRESSIVE_SCHEDULE] if PROGRESSIVE_RESIZING else None,
+    }
 
-# Classes (ordre alphabétique - important pour la cohérence)
-CLASSES = [
-    "adidas forum low",
-    "adidas spezial",
-    "asics gel-kayano",
-    "asics gel-NYC",
-    "jordan 4",
-    "new balance 530",
-    "new balance 550",
-    "new balance 2002r",
-    "nike dunk low",
-    "nike p6000"
-]
+def resolution_schedule(first_epoch, end_epoch):
+    """[(résolution, batch, première epoch, epoch de fin)] d'une phase d'entraînement"""
+    stages = []
+    start = first_epoch
+    if PROGRESSIVE_RESIZING:
+        for size, share in PROGRESSIVE_SCHEDULE:
+            if size >= IMG_SIZE[0]:
+                continue
+            end = min(end_epoch, start + round(share * (end_epoch - first_epoch)))
+            # Batch agrandi comme la baisse du nombre de pixels (multiple de 8)
+            batch_size = max(BATCH_SIZE, int(BATCH_SIZE * (IMG_SIZE[0] / size) ** 2) // 8 * 8)
+            if end > start:
+                stages.append((size, batch_size, start, end))
+            start = end
+    stages.append((IMG_SIZE[0], BATCH_SIZE, start, end_epoch))
+    return stages
 
 # =====================================================================
 # VÉRIFICATION DU DATASET
 # =====================================================================
 
 def verify_dataset():
-    """Vérifie que le dataset est équilibré et suffisant"""
-    print("\n" + "="*60)
-    print("VÉRIFICATION DU DATASET")
-    print("="*60)
-    
-    total_images = 0
-    class_counts = {}
-    
-    for class_name in CLASSES:
-        class_path = os.path.join(DATASET_DIR, class_name)
-        if not os.path.exists(class_path):
-            print(f"❌ Dossier manquant: {class_name}")
-            return False
-        
-        count = len([f for f in os.listdir(class_path) 
-                    if f.lower().endswith(('.jpg', '.jpeg', '.png'))])
-        class_counts[class_name] = count
-        total_images += count
-        
-        status = "✅" if count >= 150 else "⚠️" if count >= 100 else "❌"
-        print(f"{status} {class_name:25} {count:4} images")
-    
-    print("-"*60)
-    print(f"Total: {total_images} images")
-    
-    # Vérification de l'équilibre
-    counts = list(class_counts.values())
-    min_count, max_count = min(counts), max(counts)
-    imbalance_ratio = (max_count - min_count) / max_count * 100
-    
-    print(f"\nDéséquilibre: {imbalance_ratio:.1f}%")
-    if imbalance_ratio > 20:
-        print("⚠️  ATTENTION: Dataset déséquilibré (>20%)")
-        print("   Recommandation: Équilibrer à ~150 images par classe")
-    else:
-        print("✅ Dataset bien équilibré")
-    
-    return min_count >= 80  # Au moins 80 images par classe
+    """Vérifie que le dataset est équilibré et suffisant (voir dataset_report)"""
+    return check_dataset(DATASET_DIR, CLASSES)
 
 # =====================================================================
 # GÉNÉRATEURS DE DONNÉES AVEC AUGMENTATION
 # =====================================================================
 
-def create_data_generators():
-    """Crée les générateurs avec data augmentation pour training"""
+def create_data_generators(img_size=None, batch_size=None):
+    """Crée les générateurs avec data augmentation pour training (IMG_SIZE / BATCH_SIZE par défaut)"""
+    img_size = img_size or IMG_SIZE
+    batch_size = batch_size or BATCH_SIZE
     
     # Augmentation pour l'entraînement (simule variations réelles)
     train_datagen = ImageDataGenerator(
@@ -119,8 +171,8 @@ def create_data_generators():
     # Générateur d'entraînement
     train_generator = train_datagen.flow_from_directory(
         DATASET_DIR,
-        target_size=IMG_SIZE,
-        batch_size=BATCH_SIZE,
+        target_size=img_size,
+        batch_size=batch_size,
         class_mode='categorical',
         classes=CLASSES,  # Force l'ordre des classes
         subset='training',
@@ -130,41 +182,60 @@ def create_data_generators():
     # Générateur de validation
     val_generator = val_datagen.flow_from_directory(
         DATASET_DIR,
-        target_size=IMG_SIZE,
-        batch_size=BATCH_SIZE,
+        target_size=img_size,
+        batch_size=batch_size,
         class_mode='categorical',
         classes=CLASSES,
         subset='validation',
         shuffle=False
     )
     
+    # Équilibrage et doublons d'un plan non appliqué : aucun fichier déplacé
+    excluded = planned_exclusions(DATASET_DIR)
+    if CLASS_BALANCE == "sampler" or excluded:
+        train_generator = ManifestBatches(train_generator, excluded,
+                                          balanced=CLASS_BALANCE == "sampler")
+    if excluded:
+        val_generator = ManifestBatches(val_generator, excluded, shuffle=False)
+    
     print("\n" + "="*60)
     print("GÉNÉRATEURS DE DONNÉES")
     print("="*60)
     print(f"Training samples:   {train_generator.samples}")
     print(f"Validation samples: {val_generator.samples}")
     print(f"Classes: {len(CLASSES)}")
-    print(f"Batch size: {BATCH_SIZE}")
+    print(f"Résolution: {img_size[0]}x{img_size[1]} | Batch size: {batch_size}")
+    print(f"Équilibrage: {CLASS_BALANCE}" + (f" ({len(excluded)} doublons planifiés ignorés)" if excluded else ""))
     
     return train_generator, val_generator
 
+def training_class_weights(train_gen):
+    """Poids par classe passés à model.fit (mode "weights" uniquement)"""
+    if CLASS_BALANCE != "weights":
+        return None
+    weights = class_weights(train_gen.classes, len(CLASSES))
+    print(f"⚖️  Poids des classes: {min(weights.values()):.2f} à {max(weights.values()):.2f}")
+    return weights
+
 # =====================================================================
 # CONSTRUCTION DU MODÈLE
 # =====================================================================
 
-def build_model():
-    """Construit le modèle avec Transfer Learning (MobileNetV2)"""
+def build_model(input_size=None):
+    """Construit le modèle avec Transfer Learning (BACKBONE, MobileNetV2 par défaut)
+
+    En redimensionnement progressif, l'entrée est de taille variable (None, None)
+    pour enchaîner les résolutions sans reconstruire le modèle.
+    """
+    if input_size is None:
+        input_size = (None, None) if PROGRESSIVE_RESIZING else IMG_SIZE
     
     print("\n" + "="*60)
     print("CONSTRUCTION DU MODÈLE")
     print("="*60)
     
-    # Base pré-entraînée MobileNetV2 (ImageNet)
-    base_model = MobileNetV2(
-        input_shape=(*IMG_SIZE, 3),
-        include_top=False,
-        weights='imagenet'
-    )
+    # Base pré-entraînée (ImageNet)
+    base_model = BACKBONES[BACKBONE]((*input_size, 3), BACKBONE_ALPHA)
     
     # Gèle les couches de base (Transfer Learning)
     base_model.trainable = False
@@ -172,16 +243,16 @@ def build_model():
     # Construction du modèle complet
     model = models.Sequential([
         # Rescaling (cohérent avec le modèle actuel)
-        layers.Rescaling(1./127.5, offset=-1, input_shape=(*IMG_SIZE, 3)),
+        layers.Rescaling(1./127.5, offset=-1, input_shape=(*input_size, 3)),
         
         # Base pré-entraînée
         base_model,
         
         # Tête de classification personnalisée
         layers.GlobalAveragePooling2D(),
-        layers.Dropout(0.3),
-        layers.Dense(128, activation='relu'),
-        layers.Dropout(0.2),
+        layers.Dropout(DROPOUT_RATE),
+        layers.Dense(DENSE_UNITS, activation='relu'),
+        layers.Dropout(DENSE_DROPOUT_RATE),
         layers.Dense(len(CLASSES), activation='softmax')
     ])
     
@@ -193,21 +264,73 @@ def build_model():
     )
     
     print(f"\n✅ Modèle créé: {model.count_params():,} paramètres")
-    print(f"   Base MobileNetV2: {base_model.count_params():,} paramètres (gelés)")
+    print(f"   Base {BACKBONE} (alpha {BACKBONE_ALPHA}): {base_model.count_params():,} paramètres (gelés)")
     
     return model
 
+def fixed_resolution_model(model):
+    """Même modèle avec une entrée IMG_SIZE fixe (export TF.js), si son entrée est variable"""
+    if model.input_shape[1] is not None:
+        return model
+    fixed = build_model(IMG_SIZE)
+    fixed.set_weights(model.get_weights())
+    return fixed
+
 # =====================================================================
 # ENTRAÎNEMENT
 # =====================================================================
 
-def train_model(model, train_gen, val_gen):
+def fit_schedule(model, train_gen, val_gen, first_epoch, end_epoch, initial_epoch, callbacks):
+    """model.fit sur le calendrier de résolutions de la phase (une seule étape par défaut)
+
+    EarlyStopping / ReduceLROnPlateau gardent leur état d'une étape à l'autre
+    (StageCarry) : un arrêt anticipé termine la phase.
+    """
+    history = None
+    schedule = resolution_schedule(first_epoch, end_epoch)
+    carry = StageCarry(callbacks)
+    for size, batch_size, start, end in schedule:
+        if end <= initial_epoch and size != IMG_SIZE[0]:
+            continue
+        carry.last_stage = size == schedule[-1][0]
+        stage_gen = train_gen
+        if size != IMG_SIZE[0]:
+            print(f"\n📐 Epochs {max(start, initial_epoch) + 1}-{end} en {size}x{size} (batch {batch_size})")
+            stage_gen, _ = create_data_generators((size, size), batch_size)
+        elif PROGRESSIVE_RESIZING:
+            print(f"\n📐 Epochs {max(start, initial_epoch) + 1}-{end} en {size}x{size} (batch {batch_size})")
+        
+        # Chargement des batchs chronométré à la source si le profilage est actif
+        for callback in callbacks:
+            if isinstance(callback, StepProfiler):
+                stage_gen = callback.wrap(stage_gen)
+        
+        # Validation toujours à IMG_SIZE : val_accuracy comparable d'une étape à l'autre
+        stage_history = model.fit(
+            stage_gen,
+            validation_data=val_gen,
+            epochs=end,
+            initial_epoch=max(start, initial_epoch),
+            class_weight=training_class_weights(stage_gen),
+            callbacks=[carry] + callbacks,
+            verbose=1
+        )
+        history = stage_history if history is None else merge_histories(history, stage_history)
+        if model.stop_training:
+            break
+    return history
+
+def train_model(model, train_gen, val_gen, state=None, extra_callbacks=None):
     """Entraîne le modèle avec callbacks"""
     
     print("\n" + "="*60)
     print("ENTRAÎNEMENT")
     print("="*60)
     
+    initial_epoch = state.epoch if state else 0
+    if initial_epoch:
+        print(f"🔁 Reprise à l'epoch {initial_epoch}")
+    
     # Callbacks
     callbacks = [
         # Sauvegarde du meilleur modèle
@@ -238,18 +361,25 @@ def train_model(model, train_gen, val_gen):
         # TensorBoard
         keras.callbacks.TensorBoard(
             log_dir=os.path.join(OUTPUT_DIR, 'logs'),
-            histogram_freq=1
+            histogram_freq=0 if PROFILE_TRAINING else HISTOGRAM_FREQ
         )
     ]
     
-    # Entraînement
-    history = model.fit(
-        train_gen,
-        validation_data=val_gen,
-        epochs=EPOCHS,
-        callbacks=callbacks,
-        verbose=1
-    )
+    if PROFILE_TRAINING:
+        callbacks.append(StepProfiler(os.path.join(OUTPUT_DIR, 'profile'),
+                                      name="train", trace_steps=PROFILE_STEPS))
+    
+    if state:
+        callbacks.append(ResumableCheckpoint(state, tracked=list(callbacks)))
+    
+    callbacks.extend(extra_callbacks or [])
+    
+    # Entraînement (par résolutions croissantes en mode progressif)
+    history = fit_schedule(model, train_gen, val_gen, 0, EPOCHS, initial_epoch, callbacks)
+    
+    # Historique complet, y compris les epochs d'avant la reprise
+    if state:
+        history = state.keras_history()
     
     return history
 
@@ -257,54 +387,74 @@ def train_model(model, train_gen, val_gen):
 # FINE-TUNING
 # =====================================================================
 
-def fine_tune_model(model, train_gen, val_gen, history):
-    """Dégèle et fine-tune les dernières couches de MobileNetV2"""
+def fine_tune_model(model, train_gen, val_gen, history, state=None, extra_callbacks=None):
+    """Dégèle et fine-tune les dernières couches du backbone"""
     
     print("\n" + "="*60)
     print("FINE-TUNING")
     print("="*60)
     
-    # Dégèle les 30 dernières couches de MobileNetV2
-    base_model = model.layers[1]
-    base_model.trainable = True
+    if state and state.resumable:
+        # Modèle rechargé : couches dégelées et optimiseur déjà restaurés
+        initial_epoch = state.epoch
+        print(f"🔁 Reprise à l'epoch {initial_epoch}")
+    else:
+        initial_epoch = len(history.history.get('loss', []))
+        
+        # Dégèle les FINE_TUNE_LAYERS dernières couches du backbone
+        base_model = model.layers[1]
+        base_model.trainable = True
+        
+        for layer in base_model.layers[:-FINE_TUNE_LAYERS]:
+            layer.trainable = False
+        
+        print(f"Couches dégelées: {sum(1 for l in base_model.layers if l.trainable)}")
+        
+        # Recompilation avec learning rate plus faible
+        model.compile(
+            optimizer=keras.optimizers.Adam(learning_rate=LEARNING_RATE / 10),
+            loss='categorical_crossentropy',
+            metrics=['accuracy', keras.metrics.TopKCategoricalAccuracy(k=3, name='top_3_accuracy')]
+        )
     
-    for layer in base_model.layers[:-30]:
-        layer.trainable = False
+    callbacks = [
+        keras.callbacks.ModelCheckpoint(
+            os.path.join(OUTPUT_DIR, 'best_model_finetuned.h5'),
+            monitor='val_accuracy',
+            save_best_only=True,
+            verbose=1
+        ),
+        keras.callbacks.EarlyStopping(
+            monitor='val_accuracy',
+            patience=5,
+            restore_best_weights=True
+        )
+    ]
     
-    print(f"Couches dégelées: {sum(1 for l in base_model.layers if l.trainable)}")
+    if PROFILE_TRAINING:
+        callbacks.append(StepProfiler(os.path.join(OUTPUT_DIR, 'profile'),
+                                      name="fine_tune", trace_steps=PROFILE_STEPS))
     
-    # Recompilation avec learning rate plus faible
-    model.compile(
-        optimizer=keras.optimizers.Adam(learning_rate=LEARNING_RATE / 10),
-        loss='categorical_crossentropy',
-        metrics=['accuracy', keras.metrics.TopKCategoricalAccuracy(k=3, name='top_3_accuracy')]
-    )
+    if state:
+        callbacks.append(ResumableCheckpoint(state, tracked=list(callbacks)))
     
-    # Fine-tuning (moins d'epochs)
-    history_fine = model.fit(
-        train_gen,
-        validation_data=val_gen,
-        epochs=20,
-        initial_epoch=len(history.history['loss']),
-        callbacks=[
-            keras.callbacks.ModelCheckpoint(
-                os.path.join(OUTPUT_DIR, 'best_model_finetuned.h5'),
-                monitor='val_accuracy',
-                save_best_only=True,
-                verbose=1
-            ),
-            keras.callbacks.EarlyStopping(
-                monitor='val_accuracy',
-                patience=5,
-                restore_best_weights=True
-            )
-        ]
-    )
+    callbacks.extend(extra_callbacks or [])
     
-    # Combine les historiques
-    for key in history.history:
-        history.history[key].extend(history_fine.history[key])
+    # Fine-tuning (moins d'epochs), même calendrier de résolutions que la tête
+    phase_start = len(history.history.get('loss', []))
+    history_fine = fit_schedule(model, train_gen, val_gen, phase_start, FINE_TUNE_EPOCHS,
+                                initial_epoch, callbacks)
     
+    if state:
+        history_fine = state.keras_history()
+    
+    return merge_histories(history, history_fine)
+
+def merge_histories(history, history_fine):
+    """Combine les historiques des deux phases (union des métriques : la première
+    peut être vide, par exemple avec --from-head)"""
+    for key, values in history_fine.history.items():
+        history.history.setdefault(key, []).extend(values)
     return history
 
 # =====================================================================
@@ -313,6 +463,7 @@ def fine_tune_model(model, train_gen, val_gen, history):
 
 def plot_training_history(history):
     """Affiche les courbes d'entraînement"""
+    import matplotlib.pyplot as plt   # Seulement en fin d'entraînement
     
     fig, axes = plt.subplots(2, 2, figsize=(15, 10))
     
@@ -360,27 +511,29 @@ def plot_training_history(history):
 # ÉVALUATION
 # =====================================================================
 
-def evaluate_model(model, val_gen):
-    """Évalue le modèle final"""
+def evaluate_model(model):
+    """Évalue le modèle final (TTA, matrice de confusion, précision/rappel, calibration)"""
     
     print("\n" + "="*60)
     print("ÉVALUATION FINALE")
     print("="*60)
     
-    results = model.evaluate(val_gen, verbose=0)
+    report = evaluate(model, DATASET_DIR, CLASSES, IMG_SIZE, VALIDATION_SPLIT, EVAL_TTA)
+    print_report(report)
     
-    print(f"Loss:          {results[0]:.4f}")
-    print(f"Accuracy:      {results[1]*100:.2f}%")
-    print(f"Top-3 Accuracy: {results[2]*100:.2f}%")
+    with open(os.path.join(OUTPUT_DIR, 'evaluation_report.json'), 'w') as f:
+        json.dump(report, f, indent=2)
     
-    return results
+    # Métriques sans TTA : ce que verra l'application
+    metrics = report.get("metrics_no_tta", report["metrics"])
+    return [metrics["loss"], metrics["accuracy"], metrics["top_3_accuracy"]]
 
 # =====================================================================
 # EXPORT TENSORFLOW.JS
 # =====================================================================
 
-def export_to_tfjs(model):
-    """Exporte le modèle en TensorFlow.js pour React Native"""
+def export_to_tfjs(model, validation_batch=None, results=None):
+    """Exporte le modèle en TensorFlow.js pour React Native (vérifié contre le modèle Keras)"""
     
     print("\n" + "="*60)
     print("EXPORT TENSORFLOW.JS")
@@ -394,13 +547,27 @@ def export_to_tfjs(model):
     # Export
     tfjs.converters.save_keras_model(model, TFJS_DIR)
     
+    # Relecture de l'export : échoue avant d'écrire le mapping si les prédictions divergent
+    validate_export(model, TFJS_DIR, validation_batch,
+                    report_path=os.path.join(OUTPUT_DIR, 'export_validation.json'))
+    
+    # Publication versionnée : seuls les shards modifiés (souvent la tête) sont nouveaux
+    metadata = {
+        "classes": class_labels(CLASSES),
+        "folders": CLASSES,
+        "num_classes": len(CLASSES),
+        "input_shape": list(model.input_shape[1:]),
+        "accuracy": float(results[1]) if results is not None else None,
+        "top_3_accuracy": float(results[2]) if results is not None else None,
+    }
+    base_keys, base_name = backbone_keys(model)
+    manifest = publish(TFJS_DIR, base_keys, base_name, metadata, MODEL_STORE_DIR)
+    
     # Sauvegarde le mapping des classes
     class_mapping = {
-        "classes": CLASSES,
-        "num_classes": len(CLASSES),
-        "input_shape": list(IMG_SIZE) + [3],
+        **metadata,
+        "version": manifest["version"],
         "trained_date": datetime.now().isoformat(),
-        "accuracy": None  # À remplir manuellement après évaluation
     }
     
     with open(os.path.join(TFJS_DIR, 'class_mapping.json'), 'w') as f:
@@ -408,6 +575,7 @@ def export_to_tfjs(model):
     
     print(f"✅ Modèle TensorFlow.js exporté vers: {TFJS_DIR}")
     print(f"✅ Mapping des classes sauvegardé: {TFJS_DIR}/class_mapping.json")
+    print(f"✅ Version publiée: {MODEL_STORE_DIR}/versions/{manifest['version']}")
     
     # Génère le code JavaScript pour CameraClassifier.js
     generate_js_code()
@@ -424,15 +592,16 @@ def generate_js_code():
     print("="*60)
     
     print("\nRemplace OUTPUT_CLASSES dans CameraClassifier.js par:\n")
+    labels = class_labels(CLASSES)
     print("const OUTPUT_CLASSES = {")
-    for i, class_name in enumerate(CLASSES):
+    for i, class_name in enumerate(labels):
         print(f"  {i}: \"{class_name}\",")
     print("};")
     
     # Sauvegarde dans un fichier
     with open(os.path.join(OUTPUT_DIR, 'output_classes.js'), 'w') as f:
         f.write("const OUTPUT_CLASSES = {\n")
-        for i, class_name in enumerate(CLASSES):
+        for i, class_name in enumerate(labels):
             f.write(f"  {i}: \"{class_name}\",\n")
         f.write("};\n\nexport default OUTPUT_CLASSES;\n")
     
@@ -443,7 +612,7 @@ def generate_js_code():
 # =====================================================================
 
 def main():
-    """Pipeline d'entraînement complet"""
+    """Pipeline d'entraînement complet ; retourne 0 si le modèle a été entraîné, 1 sinon"""
     
     print("\n" + "="*60)
     print("🚀 ENTRAÎNEMENT MODÈLE SNEAKERS - 10 CLASSES")
@@ -456,32 +625,77 @@ def main():
     # 1. Vérification du dataset
     if not verify_dataset():
         print("\n❌ Dataset insuffisant. Minimum 80 images par classe requis.")
-        return
+        return 1
     
     # 2. Création des générateurs
     train_gen, val_gen = create_data_generators()
-    
-    # 3. Construction du modèle
-    model = build_model()
-    
-    # 4. Entraînement initial
-    history = train_model(model, train_gen, val_gen)
+    timer = EpochTimer()   # Temps pour atteindre la val_accuracy (comparaison --progressive)
+    
+    # Empreintes des phases : une phase terminée dont les entrées n'ont pas changé est sautée
+    dataset_hash = dataset_fingerprint(DATASET_DIR, CLASSES)
+    head_state = PhaseState(OUTPUT_DIR, "head",
+                            fingerprint(dataset_hash, "head", hyperparameters()),
+                            reset=not RESUME_TRAINING)
+    
+    # 3-4. Construction du modèle + entraînement initial
+    if HEAD_MODEL_PATH:
+        print(f"\n⏭️  Phase tête ignorée : modèle chargé depuis {HEAD_MODEL_PATH}")
+        model = keras.models.load_model(HEAD_MODEL_PATH)
+        if PROGRESSIVE_RESIZING and model.input_shape[1] is not None:
+            print(f"\n❌ --progressive impossible avec ce modèle de tête : entrée fixe "
+                  f"{model.input_shape[1]}x{model.input_shape[2]} (entraîner la tête avec --progressive)")
+            return 1
+        history = head_state.keras_history()
+        head_key = file_fingerprint(HEAD_MODEL_PATH)
+    elif head_state.completed:
+        print("\n⏭️  Phase tête inchangée (dataset + hyperparamètres) : modèle en cache")
+        model = head_state.load_model()
+        history = head_state.keras_history()
+        head_key = head_state.fingerprint
+    else:
+        model = head_state.load_model() if head_state.resumable else build_model()
+        history = train_model(model, train_gen, val_gen, head_state, extra_callbacks=[timer])
+        head_state.mark_completed(model)
+        head_key = head_state.fingerprint
     
     # 5. Fine-tuning
-    history = fine_tune_model(model, train_gen, val_gen, history)
+    fine_state = PhaseState(OUTPUT_DIR, "fine_tune",
+                            fingerprint(head_key, "fine_tune", hyperparameters()),
+                            reset=not RESUME_TRAINING)
+    if fine_state.completed:
+        print("\n⏭️  Fine-tuning inchangé : modèle en cache")
+        model = fine_state.load_model()
+        history = merge_histories(history, fine_state.keras_history())
+    else:
+        if fine_state.resumable:
+            model = fine_state.load_model()
+        history = fine_tune_model(model, train_gen, val_gen, history, fine_state,
+                                  extra_callbacks=[timer])
+        fine_state.mark_completed(model)
+    
+    # Entrée à taille fixe pour l'évaluation, la sauvegarde et l'export
+    model = fixed_resolution_model(model)
+    timing = timer.report(TARGET_ACCURACY, os.path.join(OUTPUT_DIR, 'time_to_accuracy.json'))
+    if timing:
+        reached = timing["seconds_to_target"]
+        print(f"\n⏱️  Entraînement: {timing['total_seconds']:.0f}s | val_accuracy "
+              f"{timing['target_accuracy']:.3f} atteinte " +
+              (f"en {reached:.0f}s" if reached is not None else "jamais") +
+              (" (redimensionnement progressif)" if PROGRESSIVE_RESIZING else ""))
     
     # 6. Visualisation
     plot_training_history(history)
     
     # 7. Évaluation finale
-    results = evaluate_model(model, val_gen)
+    results = evaluate_model(model)
     
     # 8. Sauvegarde du modèle Keras
     model.save(os.path.join(OUTPUT_DIR, 'final_model.h5'))
     print(f"\n✅ Modèle Keras sauvegardé: {OUTPUT_DIR}/final_model.h5")
     
-    # 9. Export TensorFlow.js
-    export_to_tfjs(model)
+    # 9. Export TensorFlow.js (vérifié sur un batch de validation fixe)
+    if EXPORT_TFJS:
+        export_to_tfjs(model, val_gen[0][0], results)
     
     print("\n" + "="*60)
     print("✅ ENTRAÎNEMENT TERMINÉ")
@@ -496,13 +710,51 @@ def main():
     print(f"   - {TFJS_DIR}/model.json")
     print(f"   - {TFJS_DIR}/class_mapping.json")
     print(f"   - {OUTPUT_DIR}/output_classes.js")
+    print(f"   - {OUTPUT_DIR}/evaluation_report.json")
+    print(f"   - {OUTPUT_DIR}/export_validation.json")
+    print(f"   - {OUTPUT_DIR}/time_to_accuracy.json")
+    print(f"   - {MODEL_STORE_DIR}/latest.json")
     
     print("\n🔄 PROCHAINES ÉTAPES:")
     print("   1. Copie les fichiers model.json + .bin vers SneackScan/assets/model/")
     print("   2. Met à jour OUTPUT_CLASSES dans CameraClassifier.js")
     print("   3. Teste l'application avec le nouveau modèle")
+    return 0
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Entraînement du modèle sneakers")
+    parser.add_argument("--profile", action="store_true",
+                        help="Profile les steps (attente données vs calcul) et trace TF Profiler")
+    parser.add_argument("--profile-steps", type=int, nargs=2, default=PROFILE_STEPS,
+                        metavar=("DEBUT", "FIN"), help="Fenêtre de steps tracée")
+    parser.add_argument("--dataset", default=DATASET_DIR, help="Dossier du dataset")
+    parser.add_argument("--fresh", action="store_true",
+                        help="Ignore les états sauvegardés et repart de zéro")
+    parser.add_argument("--from-head", metavar="MODELE",
+                        help="Démarre au fine-tuning depuis un modèle de tête sauvegardé")
+    parser.add_argument("--backbone", choices=sorted(BACKBONES), default=BACKBONE)
+    parser.add_argument("--alpha", type=float, default=BACKBONE_ALPHA,
+                        help="Largeur du backbone (MobileNet)")
+    parser.add_argument("--img-size", type=int, default=IMG_SIZE[0], help="Résolution d'entrée")
+    parser.add_argument("--progressive", action="store_true",
+                        help="Premières epochs à basse résolution (PROGRESSIVE_SCHEDULE)")
+    parser.add_argument("--target-accuracy", type=float, default=TARGET_ACCURACY,
+                        help="val_accuracy dont on mesure le temps d'atteinte")
+    parser.add_argument("--balance", choices=BALANCE_MODES, default=CLASS_BALANCE,
+                        help="Équilibrage des classes (défaut : balance_mode de classes.json)")
+    args = parser.parse_args()
+    DATASET_DIR = args.dataset
+    BACKBONE = args.backbone
+    BACKBONE_ALPHA = args.alpha
+    IMG_SIZE = (args.img_size, args.img_size)
+    CLASS_BALANCE = args.balance
+    PROGRESSIVE_RESIZING = args.progressive
+    TARGET_ACCURACY = args.target_accuracy
+    PROFILE_TRAINING = args.profile
+    PROFILE_STEPS = tuple(args.profile_steps)
+    RESUME_TRAINING = not args.fresh
+    HEAD_MODEL_PATH = args.from_head
+    
     # Configuration GPU (optionnel)
     physical_devices = tf.config.list_physical_devices('GPU')
     if physical_devices:
@@ -511,4 +763,4 @@ if __name__ == "__main__":
     else:
         print("💻 Entraînement sur CPU")
     
-    main()
\ No newline at end of file
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,18 @@
+"""
+Chargement de train-model.py comme module
+
+Le nom de fichier contient un tiret : il n'est pas importable avec import.
+Partagé par le sweep, le pipeline, le CLI, les rapports et les benchmarks.
+"""
+
+import os
+import importlib.util
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def load_train_module():
+    """Importe train-model.py (nom de fichier non importable directement)"""
+    spec = importlib.util.spec_from_file_location("train_model", os.path.join(SCRIPT_DIR, "train-model.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
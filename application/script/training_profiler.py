@@ -0,0 +1,220 @@
+"""
+Profilage d'un entraînement Keras : temps par step (chargement des données vs step),
+mémoire hôte, fenêtre de trace TF Profiler et diagnostic input-bound / compute-bound
+"""
+
+import os
+import json
+import time
+import resource
+import numpy as np
+import tensorflow as tf
+from tensorflow import keras
+
+# Au-delà de cette part du temps passée à attendre les données, l'entraînement est input-bound
+INPUT_BOUND_RATIO = 0.3
+
+def host_memory_mb():
+    """Mémoire résidente du processus (Mo)"""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / 1024 ** 2
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # Repli : pic de mémoire (Linux : Ko)
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+class TimedBatches(keras.utils.PyDataset):
+    """Enveloppe d'un générateur de batchs qui chronomètre chaque chargement (__getitem__)
+
+    Avec Keras 3, le batch est tiré à l'intérieur de train_function : le temps
+    entre deux steps ne contient plus le chargement, il faut le mesurer à la source.
+    """
+
+    def __init__(self, dataset, fetch_times):
+        super().__init__()
+        self.dataset = dataset
+        self.fetch_times = fetch_times
+
+    def __getattr__(self, name):
+        # samples, classes, class_indices... du générateur d'origine
+        if name == "dataset":
+            raise AttributeError(name)
+        return getattr(self.dataset, name)
+
+    def __len__(self):
+        return len(self.dataset)
+
+    def __getitem__(self, i):
+        start = time.perf_counter()
+        batch = self.dataset[i]
+        self.fetch_times.append(time.perf_counter() - start)
+        return batch
+
+    def on_epoch_end(self):
+        self.dataset.on_epoch_end()
+
+class StepProfiler(keras.callbacks.Callback):
+    """Mesure pour chaque step le temps de chargement des données et la durée du step
+
+    Le chargement n'est mesuré que sur un générateur enveloppé par wrap() ; la
+    durée d'un step (batch_begin -> batch_end) contient l'attente des données.
+    """
+
+    def __init__(self, log_dir, name="train", trace_steps=(20, 30), memory_every=10):
+        super().__init__()
+        self.log_dir = log_dir
+        self.name = name
+        self.trace_steps = trace_steps
+        self.memory_every = memory_every
+        self.fetch_times = []
+        self.step_times = []
+        self.memory_samples = []
+        self._step = 0
+        self._batch_start = None
+        self._tracing = False
+
+    def wrap(self, dataset):
+        """Générateur d'entraînement dont chaque chargement de batch est chronométré"""
+        return TimedBatches(dataset, self.fetch_times)
+
+    def on_train_batch_begin(self, batch, logs=None):
+        if self.trace_steps and self._step == self.trace_steps[0] and not self._tracing:
+            tf.profiler.experimental.start(os.path.join(self.log_dir, f"trace_{self.name}"))
+            self._tracing = True
+
+        self._batch_start = time.perf_counter()
+
+    def on_train_batch_end(self, batch, logs=None):
+        self.step_times.append(time.perf_counter() - self._batch_start)
+
+        if self._step % self.memory_every == 0:
+            self.memory_samples.append((self._step, round(host_memory_mb(), 1)))
+
+        self._step += 1
+        if self._tracing and self._step >= self.trace_steps[1]:
+            self._stop_trace()
+
+    def on_train_end(self, logs=None):
+        if self._tracing:
+            self._stop_trace()
+        self.print_summary()
+        self.save_report()
+
+    def _stop_trace(self):
+        tf.profiler.experimental.stop()
+        self._tracing = False
+
+    # -----------------------------------------------------------------
+    # Rapport
+    # -----------------------------------------------------------------
+
+    def summary(self):
+        """Statistiques agrégées du profilage"""
+        # Le premier step inclut le traçage/compilation du graphe : exclu des stats
+        fetch = np.array(self.fetch_times[1:] or self.fetch_times or [0.0])
+        step = np.array(self.step_times[1:] or self.step_times or [0.0])
+        # Le chargement se recouvre avec le calcul (prefetch) : un step ne peut pas
+        # être plus court que le chargement de son batch
+        input_ratio = min(fetch.mean() / step.mean(), 1.0) if self.fetch_times and step.mean() > 0 else None
+        memory = [mb for _, mb in self.memory_samples]
+
+        return {
+            "phase": self.name,
+            "steps": self._step,
+            "fetch_ms": {"mean": fetch.mean() * 1000, "p50": np.percentile(fetch, 50) * 1000,
+                         "p95": np.percentile(fetch, 95) * 1000} if self.fetch_times else None,
+            "step_ms": {"mean": step.mean() * 1000, "p50": np.percentile(step, 50) * 1000,
+                        "p95": np.percentile(step, 95) * 1000},
+            "input_ratio": input_ratio,
+            "bound": None if input_ratio is None else
+                     "input" if input_ratio > INPUT_BOUND_RATIO else "compute",
+            "memory_mb": {"start": memory[0] if memory else None,
+                          "peak": max(memory) if memory else None},
+            "memory_samples": self.memory_samples,
+            "trace_dir": os.path.join(self.log_dir, f"trace_{self.name}") if self.trace_steps else None,
+        }
+
+    def print_summary(self):
+        s = self.summary()
+        print("\n" + "="*60)
+        print(f"PROFILAGE — {s['phase']}")
+        print("="*60)
+        print(f"Steps mesurés:     {s['steps']}")
+        if s["fetch_ms"]:
+            print(f"Chargement batch:  {s['fetch_ms']['mean']:.1f} ms "
+                  f"(p50 {s['fetch_ms']['p50']:.1f}, p95 {s['fetch_ms']['p95']:.1f})")
+        print(f"Durée d'un step:   {s['step_ms']['mean']:.1f} ms "
+              f"(p50 {s['step_ms']['p50']:.1f}, p95 {s['step_ms']['p95']:.1f})")
+        if s["memory_mb"]["peak"] is not None:
+            print(f"Mémoire hôte:      {s['memory_mb']['start']:.0f} → pic {s['memory_mb']['peak']:.0f} Mo")
+
+        if s["bound"] is None:
+            print("ℹ️  Chargement non mesuré (générateur non enveloppé par StepProfiler.wrap)")
+        elif s["bound"] == "input":
+            print(f"⚠️  Entraînement limité par les DONNÉES (input-bound) — "
+                  f"chargement = {s['input_ratio']*100:.0f}% d'un step")
+            print("   Piste: cache/prefetch du pipeline, décodage parallèle, moins d'augmentation CPU")
+        else:
+            print(f"✅ Entraînement limité par le CALCUL (compute-bound) — "
+                  f"chargement = {s['input_ratio']*100:.0f}% d'un step")
+            print("   Piste: backbone plus léger, résolution réduite, GPU")
+
+        if s["trace_dir"]:
+            print(f"📈 Trace TF Profiler: {s['trace_dir']} (onglet Profile de TensorBoard)")
+
+    def save_report(self):
+        os.makedirs(self.log_dir, exist_ok=True)
+        path = os.path.join(self.log_dir, f"profile_{self.name}.json")
+        with open(path, "w") as f:
+            json.dump(self.summary(), f, indent=2, default=float)
+        print(f"✅ Rapport de profilage: {path}")
+
+class EpochTimer(keras.callbacks.Callback):
+    """Temps écoulé depuis le premier fit à chaque fin d'epoch (toutes phases et résolutions)
+
+    Sert à mesurer le temps pour atteindre une val_accuracy donnée : construction
+    des générateurs et changements de résolution entre deux fit sont comptés.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.epochs = []
+        self._start = None
+
+    def on_train_begin(self, logs=None):
+        if self._start is None:
+            self._start = time.perf_counter()
+
+    def on_epoch_end(self, epoch, logs=None):
+        self.epochs.append({"epoch": epoch + 1,
+                            "seconds": round(time.perf_counter() - self._start, 2),
+                            "val_accuracy": float((logs or {}).get("val_accuracy", 0.0))})
+
+    def time_to_accuracy(self, target):
+        """Secondes pour atteindre 'target' en validation (None si jamais atteinte)"""
+        for entry in self.epochs:
+            if entry["val_accuracy"] >= target:
+                return entry["seconds"]
+        return None
+
+    def report(self, target=None, path=None):
+        """Temps total et temps pour atteindre target (par défaut la meilleure val_accuracy)"""
+        if not self.epochs:
+            return None
+        best = max(entry["val_accuracy"] for entry in self.epochs)
+        target = best if target is None else target
+        result = {"total_seconds": self.epochs[-1]["seconds"], "best_val_accuracy": best,
+                  "target_accuracy": target, "seconds_to_target": self.time_to_accuracy(target),
+                  "epochs": self.epochs}
+        if path:
+            with open(path, "w") as f:
+                json.dump(result, f, indent=2)
+        return result
@@ -0,0 +1,186 @@
+"""
+État reprenable des phases d'entraînement (tête puis fine-tuning)
+Chaque phase sauvegarde à chaque epoch modèle + optimiseur + epoch + historique
++ état des callbacks (EarlyStopping, ReduceLROnPlateau, ModelCheckpoint), et est
+identifiée par une empreinte (manifest du dataset + hyperparamètres)
+"""
+
+import os
+import json
+import hashlib
+import numpy as np
+from tensorflow import keras
+from dataset_catalog import get_catalog
+
+STATE_DIR = "state"
+
+# Compteurs des callbacks Keras à restaurer à la reprise (patience, meilleur score...)
+CALLBACK_STATE = ("wait", "best", "best_epoch", "stopped_epoch", "cooldown_counter")
+
+def dataset_fingerprint(dataset_dir, classes):
+    """Empreinte du dataset : classes, noms et tailles des images (via le catalogue)"""
+    catalog = get_catalog(dataset_dir)
+    digest = hashlib.sha256()
+    for class_name in classes:
+        digest.update(f"[{class_name}]".encode())
+        for name, size in sorted(catalog.entries(class_name).items()):
+            digest.update(f"{name}:{size};".encode())
+    return digest.hexdigest()
+
+def file_fingerprint(path):
+    """Empreinte du contenu d'un fichier (modèle de tête fourni à la main)"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def fingerprint(*parts):
+    """Empreinte stable d'un ensemble d'entrées (JSON trié)"""
+    payload = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+class PhaseState:
+    """Point de reprise d'une phase : <output>/state/<phase>/{checkpoint.keras, state.json}"""
+
+    def __init__(self, output_dir, phase, phase_fingerprint, reset=False):
+        self.phase = phase
+        self.fingerprint = phase_fingerprint
+        self.dir = os.path.join(output_dir, STATE_DIR, phase)
+        self.model_path = os.path.join(self.dir, "checkpoint.keras")
+        self.state_path = os.path.join(self.dir, "state.json")
+        self.best_weights_path = os.path.join(self.dir, "best_weights.npz")
+        self.epoch = 0
+        self.history = {}
+        self.callbacks = {}
+        self.completed = False
+        if not reset:
+            self._load()
+
+    def _load(self):
+        try:
+            with open(self.state_path) as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return
+        # Entrées modifiées (dataset ou hyperparamètres) : la phase repart de zéro
+        if state.get("fingerprint") != self.fingerprint or not os.path.exists(self.model_path):
+            return
+        self.epoch = state["epoch"]
+        self.history = state["history"]
+        self.callbacks = state.get("callbacks", {})
+        self.completed = state["completed"]
+
+    @property
+    def resumable(self):
+        return self.epoch > 0 and not self.completed
+
+    def load_model(self):
+        """Modèle compilé avec l'état de l'optimiseur"""
+        return keras.models.load_model(self.model_path)
+
+    def keras_history(self):
+        """Historique sous forme d'objet History (même interface que model.fit)"""
+        history = keras.callbacks.History()
+        history.history = {k: list(v) for k, v in self.history.items()}
+        return history
+
+    def save(self, model):
+        """Sauvegarde atomique du modèle (avec optimiseur) puis de l'état"""
+        os.makedirs(self.dir, exist_ok=True)
+        if model is not None:
+            tmp_model = os.path.join(self.dir, "checkpoint.tmp.keras")
+            model.save(tmp_model)
+            os.replace(tmp_model, self.model_path)
+
+        tmp_state = self.state_path + ".tmp"
+        with open(tmp_state, "w") as f:
+            json.dump({
+                "phase": self.phase,
+                "fingerprint": self.fingerprint,
+                "epoch": self.epoch,
+                "history": self.history,
+                "callbacks": self.callbacks,
+                "completed": self.completed,
+            }, f, indent=2)
+        os.replace(tmp_state, self.state_path)
+
+    def mark_completed(self, model):
+        """Fin de phase : on garde les poids restaurés par EarlyStopping"""
+        self.completed = True
+        self.save(model)
+
+class ResumableCheckpoint(keras.callbacks.Callback):
+    """Sauvegarde l'état de la phase à la fin de chaque epoch
+
+    tracked : callbacks de la phase dont les compteurs (patience, meilleur score,
+    meilleurs poids d'EarlyStopping) sont sauvegardés puis restaurés à la reprise.
+    Doit être placé après eux dans la liste : leur on_train_begin remet tout à zéro.
+    """
+
+    def __init__(self, state, tracked=()):
+        super().__init__()
+        self.state = state
+        tracked = [cb for cb in tracked if any(hasattr(cb, attr) for attr in CALLBACK_STATE)]
+        self.tracked = {f"{i}:{type(cb).__name__}": cb for i, cb in enumerate(tracked)}
+
+    def on_train_begin(self, logs=None):
+        for name, callback in self.tracked.items():
+            for attr, value in self.state.callbacks.get(name, {}).items():
+                setattr(callback, attr, value)
+            if getattr(callback, "restore_best_weights", False) and os.path.exists(self.state.best_weights_path):
+                with np.load(self.state.best_weights_path) as saved:
+                    callback.best_weights = [saved[f"arr_{i}"] for i in range(len(saved.files))]
+
+    def on_epoch_end(self, epoch, logs=None):
+        for key, value in (logs or {}).items():
+            self.state.history.setdefault(key, []).append(float(value))
+        self.state.epoch = epoch + 1
+
+        for name, callback in self.tracked.items():
+            self.state.callbacks[name] = {
+                attr: (None if getattr(callback, attr) is None else float(getattr(callback, attr))
+                       if attr == "best" else int(getattr(callback, attr)))
+                for attr in CALLBACK_STATE if hasattr(callback, attr)}
+            # Meilleurs poids d'EarlyStopping : réécrits seulement quand ils changent
+            if getattr(callback, "best_weights", None) is not None and callback.best_epoch == epoch:
+                os.makedirs(self.state.dir, exist_ok=True)
+                np.savez(self.state.best_weights_path, *callback.best_weights)
+        self.state.save(self.model)
+
+class StageCarry(keras.callbacks.Callback):
+    """Garde l'état des callbacks d'un model.fit au suivant (étapes de résolution d'une phase)
+
+    Patience, meilleur score et meilleurs poids continuent d'une étape à l'autre ;
+    les meilleurs poids ne sont restaurés qu'en fin de phase (dernière étape ou
+    arrêt anticipé). À placer en tête de liste : son on_train_end passe avant
+    celui d'EarlyStopping, et l'état est rendu au premier on_epoch_begin, après
+    la remise à zéro des on_train_begin.
+    """
+
+    def __init__(self, tracked):
+        super().__init__()
+        self.tracked = [cb for cb in tracked if any(hasattr(cb, attr) for attr in CALLBACK_STATE)]
+        self.last_stage = True
+        self._saved = None
+        self._restore = False
+
+    def on_train_begin(self, logs=None):
+        self._restore = self._saved is not None
+
+    def on_epoch_begin(self, epoch, logs=None):
+        if self._restore:
+            for callback, saved in zip(self.tracked, self._saved):
+                for attr, value in saved.items():
+                    setattr(callback, attr, value)
+            self._restore = False
+
+    def on_train_end(self, logs=None):
+        self.on_epoch_begin(None)   # Étape sans epoch : état rendu avant la fin de phase
+        self._saved = [{attr: getattr(callback, attr) for attr in CALLBACK_STATE + ("best_weights",)
+                        if hasattr(callback, attr)} for callback in self.tracked]
+        if not self.last_stage and not self.model.stop_training:
+            # Étape intermédiaire : pas de retour aux meilleurs poids
+            for callback in self.tracked:
+                if getattr(callback, "best_weights", None) is not None:
+                    callback.best_weights = None